@@ -29,10 +29,11 @@ class AccountBridge(QObject):
         取得帳號列表
         
         Args:
-            params_json: JSON 格式的參數 (limit, offset)
+            params_json: JSON 格式的參數 (limit, cursor 或 offset)
+                         有 cursor 時以 keyset 分頁查詢，否則使用 offset 跳頁
             
         Returns:
-            JSON 格式的帳號列表
+            JSON 格式的帳號列表，total 為帳號總數，next_cursor 為下一頁游標
         """
         try:
             if not self.db_manager:
@@ -45,12 +46,13 @@ class AccountBridge(QObject):
             limit = params.get('limit', 100)
             offset = params.get('offset', 0)
             
-            accounts = self.db_manager.get_accounts(limit=limit, offset=offset)
+            page = self.db_manager.get_accounts_page(limit=limit, cursor=params.get('cursor'), offset=offset)
             
             result = {
                 'success': True,
-                'data': accounts,
-                'total': len(accounts)
+                'data': page['items'],
+                'total': self.db_manager.count_accounts(),
+                'next_cursor': page['next_cursor']
             }
             
             return json.dumps(result, ensure_ascii=False)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+動態微批次排程器
+多個線程各自送出的工作 (如 TrOCR 的文字區域) 先放入佇列，由單一工作線程在短時間內
+(max_wait_ms) 收集到最多 max_batch_size 筆後整批處理，結果透過 Future 分送回各呼叫端。
+同時有多個呼叫端時，處理次數隨批次大小而非請求數量增加。
+
+統計資料 (stats) 包含批次大小與延遲百分位數 (由送出到取得結果)。
+不再使用時呼叫 close 結束工作線程 (工作線程持有 process_batch，未結束前其物件不會被回收)。
+"""
+
+import math
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence
+
+# 佇列中的停止標記 (之後不會再有工作)
+_STOP = object()
+
+
+def percentile(sorted_values: Sequence[float], ratio: float) -> float:
+    """已排序數列的百分位數 (最近序位法)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(ratio * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class MicroBatchScheduler:
+    """收集並行呼叫端的工作，整批處理後分送結果"""
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]], max_batch_size: int = 16,
+                 max_wait_ms: float = 3, name: str = "micro-batch", stats_window: int = 1000):
+        """
+        Args:
+            process_batch: 批次處理函式，輸入工作列表，回傳相同順序的結果列表
+            max_batch_size: 每批最多筆數 (達到時立即處理)
+            max_wait_ms: 收到第一筆後等待其他工作的最長時間 (毫秒)
+            name: 工作線程名稱
+            stats_window: 延遲統計保留最近的筆數
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=stats_window)
+        self._batch_sizes = deque(maxlen=stats_window)
+        self.item_count = 0
+        self.batch_count = 0
+        self._closed = False
+        self._submit_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item: Any) -> Future:
+        """送出一筆工作，回傳結果的 Future"""
+        future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("批次排程器已關閉")
+            self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def close(self, timeout: float = None):
+        """停止接受新工作，已送出的工作處理完後結束工作線程"""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        if threading.current_thread() is not self._worker:
+            self._worker.join(timeout)
+
+    def map(self, items: Sequence[Any], timeout: float = None) -> List[Any]:
+        """送出多筆工作並依序等待結果 (同一呼叫端的工作會進入同一批或相鄰批次)"""
+        futures = [self.submit(item) for item in items]
+        return [future.result(timeout) for future in futures]
+
+    def stats(self) -> Dict[str, Any]:
+        """批次與延遲統計 (延遲單位為毫秒)"""
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            batch_sizes = list(self._batch_sizes)
+            item_count = self.item_count
+            batch_count = self.batch_count
+        return {
+            'items': item_count,
+            'batches': batch_count,
+            'avg_batch_size': round(sum(batch_sizes) / len(batch_sizes), 2) if batch_sizes else 0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+            'latency_p50_ms': round(percentile(latencies, 0.50), 2),
+            'latency_p90_ms': round(percentile(latencies, 0.90), 2),
+            'latency_p99_ms': round(percentile(latencies, 0.99), 2),
+            'latency_max_ms': round(latencies[-1], 2) if latencies else 0,
+            'queued': self._queue.qsize(),
+        }
+
+    def _run(self):
+        """工作線程: 取出第一筆後在 max_wait_ms 內收集其他工作，整批處理 (取得停止標記後結束)"""
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                results = self.process_batch([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f"批次結果數量不符: {len(results)} != {len(batch)}")
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logging.error(f"批次處理失敗: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self._latencies.extend((finished - submitted) * 1000 for _, _, submitted in batch)
+                self._batch_sizes.append(len(batch))
+                self.item_count += len(batch)
+                self.batch_count += 1
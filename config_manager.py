@@ -7,6 +7,7 @@ Python 版本的 ConfigManager，用於讀取 config.yaml 設定檔
 import os
 import yaml
 import logging
+import threading
 from typing import Optional
 from dataclasses import dataclass
 
@@ -34,6 +35,7 @@ class UiConfig:
     FullScreen: bool = False
     AutoLogout: int = 300
     TableRowsPerPage: int = 10
+    Heartbeat_Interval_Ms: int = 1000
 
 @dataclass
 class PathsConfig:
@@ -56,12 +58,14 @@ class ImageProcessingConfig:
     Offset_X: int = 0
     Offset_Y: int = 0
     Scale: float = 1.0
+    Display_Max_Side: int = 1600
 
 @dataclass
 class TimingConfig:
     """時間設定"""
     OCR_Retry_Time: int = 3
     Pic_Wait_Time: int = 2000
+    Startup_CCD_Timeout: int = 30
 
 @dataclass
 class SystemConfig:
@@ -92,6 +96,12 @@ class BackupConfig:
     Enable_Auto_Backup: bool = True
     Backup_Interval_Hours: int = 24
     Backup_Retention_Days: int = 30
+    Ocrlog_Live_Months: int = 0
+    Ocrlog_Archive_Path: str = ""
+    Image_Archive_Format: str = "png"
+    Image_Thumbnail_Size: int = 256
+    Image_OK_Downsample_Days: int = 0
+    Image_Downsample_Max_Side: int = 1024
 
 @dataclass
 class ExportConfig:
@@ -124,8 +134,59 @@ class PerformanceConfig:
     """效能設定"""
     Max_Concurrent_Processes: int = 4
     Memory_Limit_MB: int = 1024
+    Gpu_Memory_Limit_MB: int = 0
     Image_Cache_Size_MB: int = 100
 
+@dataclass
+class OCRServiceConfig:
+    """OCR 推論服務設定"""
+    Mode: str = "local"
+    Host: str = "127.0.0.1"
+    Port: int = 8650
+    Timeout: int = 30
+    Batch_Max_Size: int = 8
+    Batch_Wait_Ms: int = 5
+
+@dataclass
+class OCREngineProfile:
+    """OCR 引擎設定檔"""
+    Backend: str = "auto"       # auto / cuda / cpu
+    Precision: str = "fp16"     # fp16 (僅 GPU) / fp32 / int8 (僅 CPU，動態量化)
+    Batch_Size: int = 16
+    Batch_Wait_Ms: float = 3
+    Beams: int = 1
+    Max_Length: int = 32
+    Cache_Size: int = 32
+    Roi_Mode: str = "yolo"      # yolo: YOLO 檢測文字區域 / full: 整張圖片為一個文字區域
+
+def default_ocr_profiles() -> dict:
+    """內建的 OCR 引擎設定檔 (config.yaml 可覆寫或新增)"""
+    return {
+        'fast-cpu-int8': OCREngineProfile(Backend="cpu", Precision="int8", Batch_Size=8, Batch_Wait_Ms=0),
+        'gpu-fp16-batched': OCREngineProfile(Backend="cuda", Precision="fp16", Batch_Size=16, Batch_Wait_Ms=3),
+        'accurate-beam4': OCREngineProfile(Backend="auto", Precision="fp32", Batch_Size=8, Batch_Wait_Ms=3, Beams=4),
+    }
+
+@dataclass
+class OCREngineConfig:
+    """OCR 引擎設定 (模型路徑與設定檔)"""
+    Profile: str = "gpu-fp16-batched"
+    Yolo_Weights: str = "./best.pt"
+    Model_Dir: str = "./trocr-384x384-finetuned"
+    Processor_Dir: str = "./trocr-384x384-processor"
+    Profiles: dict = None
+    
+    def __post_init__(self):
+        if self.Profiles is None:
+            self.Profiles = default_ocr_profiles()
+    
+    def get_profile(self, name: Optional[str] = None) -> OCREngineProfile:
+        """取得設定檔 (預設為目前選用的設定檔)"""
+        name = name or self.Profile
+        if name not in self.Profiles:
+            raise ValueError(f"未知的 OCR 引擎設定檔: {name} (可用: {', '.join(self.Profiles)})")
+        return self.Profiles[name]
+
 @dataclass
 class DevelopmentConfig:
     """開發者設定"""
@@ -146,6 +207,8 @@ class SettingsConfig:
     Export: ExportConfig = None
     Notifications: NotificationsConfig = None
     Performance: PerformanceConfig = None
+    OCR_Service: OCRServiceConfig = None
+    OCR_Engine: OCREngineConfig = None
     Development: DevelopmentConfig = None
     
     def __post_init__(self):
@@ -169,6 +232,10 @@ class SettingsConfig:
             self.Notifications = NotificationsConfig()
         if self.Performance is None:
             self.Performance = PerformanceConfig()
+        if self.OCR_Service is None:
+            self.OCR_Service = OCRServiceConfig()
+        if self.OCR_Engine is None:
+            self.OCR_Engine = OCREngineConfig()
         if self.Development is None:
             self.Development = DevelopmentConfig()
 
@@ -192,6 +259,8 @@ class ConfigManager:
     
     _instance = None
     _config_file = "config.yaml"
+    # 設定頁儲存 (UI 線程) 與切換 OCR 引擎設定檔 (背景線程) 可能同時寫入設定檔
+    _save_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -250,7 +319,8 @@ class ConfigManager:
                     FontSize=ui_data.get('font_size', 'normal'),
                     FullScreen=ui_data.get('full_screen', False),
                     AutoLogout=ui_data.get('auto_logout', 300),
-                    TableRowsPerPage=ui_data.get('table_rows_per_page', 10)
+                    TableRowsPerPage=ui_data.get('table_rows_per_page', 10),
+                    Heartbeat_Interval_Ms=ui_data.get('heartbeat_interval_ms', 1000)
                 )
             
             # 載入路徑設定
@@ -278,7 +348,8 @@ class ConfigManager:
                 self._config.Settings.Image_Processing = ImageProcessingConfig(
                     Offset_X=img_data.get('offset_x', 0),
                     Offset_Y=img_data.get('offset_y', 0),
-                    Scale=img_data.get('scale', 1.0)
+                    Scale=img_data.get('scale', 1.0),
+                    Display_Max_Side=img_data.get('display_max_side', 1600)
                 )
             
             # 載入時間設定
@@ -286,7 +357,8 @@ class ConfigManager:
                 timing_data = config_data['timing']
                 self._config.Settings.Timing = TimingConfig(
                     OCR_Retry_Time=timing_data.get('ocr_retry_time', 3),
-                    Pic_Wait_Time=timing_data.get('pic_wait_time', 2000)
+                    Pic_Wait_Time=timing_data.get('pic_wait_time', 2000),
+                    Startup_CCD_Timeout=timing_data.get('startup_ccd_timeout', 30)
                 )
             
             # 載入系統設定
@@ -318,7 +390,13 @@ class ConfigManager:
                 self._config.Settings.Backup = BackupConfig(
                     Enable_Auto_Backup=backup_data.get('enable_auto_backup', True),
                     Backup_Interval_Hours=backup_data.get('backup_interval_hours', 24),
-                    Backup_Retention_Days=backup_data.get('backup_retention_days', 30)
+                    Backup_Retention_Days=backup_data.get('backup_retention_days', 30),
+                    Ocrlog_Live_Months=backup_data.get('ocrlog_live_months', 0),
+                    Ocrlog_Archive_Path=backup_data.get('ocrlog_archive_path', ''),
+                    Image_Archive_Format=backup_data.get('image_archive_format', 'png'),
+                    Image_Thumbnail_Size=backup_data.get('image_thumbnail_size', 256),
+                    Image_OK_Downsample_Days=backup_data.get('image_ok_downsample_days', 0),
+                    Image_Downsample_Max_Side=backup_data.get('image_downsample_max_side', 1024)
                 )
             
             # 載入匯出設定
@@ -353,9 +431,45 @@ class ConfigManager:
                 self._config.Settings.Performance = PerformanceConfig(
                     Max_Concurrent_Processes=perf_data.get('max_concurrent_processes', 4),
                     Memory_Limit_MB=perf_data.get('memory_limit_mb', 1024),
+                    Gpu_Memory_Limit_MB=perf_data.get('gpu_memory_limit_mb', 0),
                     Image_Cache_Size_MB=perf_data.get('image_cache_size_mb', 100)
                 )
             
+            # 載入 OCR 推論服務設定
+            if 'ocr_service' in config_data:
+                service_data = config_data['ocr_service']
+                self._config.Settings.OCR_Service = OCRServiceConfig(
+                    Mode=service_data.get('mode', 'local'),
+                    Host=service_data.get('host', '127.0.0.1'),
+                    Port=service_data.get('port', 8650),
+                    Timeout=service_data.get('timeout', 30),
+                    Batch_Max_Size=service_data.get('batch_max_size', 8),
+                    Batch_Wait_Ms=service_data.get('batch_wait_ms', 5)
+                )
+            
+            # 載入 OCR 引擎設定 (config.yaml 的設定檔覆寫同名的內建設定檔)
+            if 'ocr_engine' in config_data:
+                engine_data = config_data['ocr_engine']
+                profiles = default_ocr_profiles()
+                for name, profile_data in (engine_data.get('profiles') or {}).items():
+                    profiles[name] = OCREngineProfile(
+                        Backend=profile_data.get('backend', 'auto'),
+                        Precision=profile_data.get('precision', 'fp16'),
+                        Batch_Size=profile_data.get('batch_size', 16),
+                        Batch_Wait_Ms=profile_data.get('batch_wait_ms', 3),
+                        Beams=profile_data.get('beams', 1),
+                        Max_Length=profile_data.get('max_length', 32),
+                        Cache_Size=profile_data.get('cache_size', 32),
+                        Roi_Mode=profile_data.get('roi_mode', 'yolo')
+                    )
+                self._config.Settings.OCR_Engine = OCREngineConfig(
+                    Profile=engine_data.get('profile', 'gpu-fp16-batched'),
+                    Yolo_Weights=engine_data.get('yolo_weights', './best.pt'),
+                    Model_Dir=engine_data.get('model_dir', './trocr-384x384-finetuned'),
+                    Processor_Dir=engine_data.get('processor_dir', './trocr-384x384-processor'),
+                    Profiles=profiles
+                )
+            
             # 載入開發者設定
             if 'development' in config_data:
                 dev_data = config_data['development']
@@ -378,7 +492,12 @@ class ConfigManager:
         self._load_config()
     
     def save_config(self):
-        """儲存設定到檔案"""
+        """儲存設定到檔案 (可由任何線程呼叫，同一時間只有一個線程寫入)"""
+        with self._save_lock:
+            self._write_config()
+    
+    def _write_config(self):
+        """將目前設定寫入設定檔"""
         try:
             config_data = {
                 'mysql': {
@@ -398,7 +517,8 @@ class ConfigManager:
                     'font_size': self._config.Ui.FontSize,
                     'full_screen': self._config.Ui.FullScreen,
                     'auto_logout': self._config.Ui.AutoLogout,
-                    'table_rows_per_page': self._config.Ui.TableRowsPerPage
+                    'table_rows_per_page': self._config.Ui.TableRowsPerPage,
+                    'heartbeat_interval_ms': self._config.Ui.Heartbeat_Interval_Ms
                 },
                 'paths': {
                     'ocr_image_save_path': self._config.Settings.Paths.OCR_Image_Save_Path,
@@ -414,11 +534,13 @@ class ConfigManager:
                 'image_processing': {
                     'offset_x': self._config.Settings.Image_Processing.Offset_X,
                     'offset_y': self._config.Settings.Image_Processing.Offset_Y,
-                    'scale': self._config.Settings.Image_Processing.Scale
+                    'scale': self._config.Settings.Image_Processing.Scale,
+                    'display_max_side': self._config.Settings.Image_Processing.Display_Max_Side
                 },
                 'timing': {
                     'ocr_retry_time': self._config.Settings.Timing.OCR_Retry_Time,
-                    'pic_wait_time': self._config.Settings.Timing.Pic_Wait_Time
+                    'pic_wait_time': self._config.Settings.Timing.Pic_Wait_Time,
+                    'startup_ccd_timeout': self._config.Settings.Timing.Startup_CCD_Timeout
                 },
                 'system': {
                     'debug_mode': self._config.Settings.System.Debug_Mode,
@@ -433,7 +555,13 @@ class ConfigManager:
                 'backup': {
                     'enable_auto_backup': self._config.Settings.Backup.Enable_Auto_Backup,
                     'backup_interval_hours': self._config.Settings.Backup.Backup_Interval_Hours,
-                    'backup_retention_days': self._config.Settings.Backup.Backup_Retention_Days
+                    'backup_retention_days': self._config.Settings.Backup.Backup_Retention_Days,
+                    'ocrlog_live_months': self._config.Settings.Backup.Ocrlog_Live_Months,
+                    'ocrlog_archive_path': self._config.Settings.Backup.Ocrlog_Archive_Path,
+                    'image_archive_format': self._config.Settings.Backup.Image_Archive_Format,
+                    'image_thumbnail_size': self._config.Settings.Backup.Image_Thumbnail_Size,
+                    'image_ok_downsample_days': self._config.Settings.Backup.Image_OK_Downsample_Days,
+                    'image_downsample_max_side': self._config.Settings.Backup.Image_Downsample_Max_Side
                 },
                 'export': {
                     'default_format': self._config.Settings.Export.Default_Format,
@@ -449,8 +577,36 @@ class ConfigManager:
                 'performance': {
                     'max_concurrent_processes': self._config.Settings.Performance.Max_Concurrent_Processes,
                     'memory_limit_mb': self._config.Settings.Performance.Memory_Limit_MB,
+                    'gpu_memory_limit_mb': self._config.Settings.Performance.Gpu_Memory_Limit_MB,
                     'image_cache_size_mb': self._config.Settings.Performance.Image_Cache_Size_MB
                 },
+                'ocr_service': {
+                    'mode': self._config.Settings.OCR_Service.Mode,
+                    'host': self._config.Settings.OCR_Service.Host,
+                    'port': self._config.Settings.OCR_Service.Port,
+                    'timeout': self._config.Settings.OCR_Service.Timeout,
+                    'batch_max_size': self._config.Settings.OCR_Service.Batch_Max_Size,
+                    'batch_wait_ms': self._config.Settings.OCR_Service.Batch_Wait_Ms
+                },
+                'ocr_engine': {
+                    'profile': self._config.Settings.OCR_Engine.Profile,
+                    'yolo_weights': self._config.Settings.OCR_Engine.Yolo_Weights,
+                    'model_dir': self._config.Settings.OCR_Engine.Model_Dir,
+                    'processor_dir': self._config.Settings.OCR_Engine.Processor_Dir,
+                    'profiles': {
+                        name: {
+                            'backend': profile.Backend,
+                            'precision': profile.Precision,
+                            'batch_size': profile.Batch_Size,
+                            'batch_wait_ms': profile.Batch_Wait_Ms,
+                            'beams': profile.Beams,
+                            'max_length': profile.Max_Length,
+                            'cache_size': profile.Cache_Size,
+                            'roi_mode': profile.Roi_Mode
+                        }
+                        for name, profile in self._config.Settings.OCR_Engine.Profiles.items()
+                    }
+                },
                 'development': {
                     'verbose_logging': self._config.Settings.Development.Verbose_Logging,
                     'enable_performance_monitoring': self._config.Settings.Development.Enable_Performance_Monitoring,
@@ -491,6 +647,7 @@ if __name__ == "__main__":
     print(f"全螢幕: {config.Ui.FullScreen}")
     print(f"自動登出: {config.Ui.AutoLogout} 秒")
     print(f"表格每頁筆數: {config.Ui.TableRowsPerPage}")
+    print(f"狀態推送間隔: {config.Ui.Heartbeat_Interval_Ms} 毫秒")
     
     print("\n=== 路徑設定 ===")
     print(f"OCR 圖片來源路徑: {config.Settings.Paths.OCR_Image_Save_Path}")
@@ -511,6 +668,7 @@ if __name__ == "__main__":
     print("\n=== 時間設定 ===")
     print(f"OCR 重試次數: {config.Settings.Timing.OCR_Retry_Time}")
     print(f"圖片檢查等待時間: {config.Settings.Timing.Pic_Wait_Time} 毫秒")
+    print(f"啟動時等待 CCD 連線: {config.Settings.Timing.Startup_CCD_Timeout} 秒")
     
     print("\n=== 系統設定 ===")
     print(f"除錯模式: {config.Settings.System.Debug_Mode}")
@@ -526,6 +684,8 @@ if __name__ == "__main__":
     print(f"啟用自動備份: {config.Settings.Backup.Enable_Auto_Backup}")
     print(f"備份頻率: {config.Settings.Backup.Backup_Interval_Hours} 小時")
     print(f"保留備份天數: {config.Settings.Backup.Backup_Retention_Days}")
+    print(f"OCR 記錄保留月數: {config.Settings.Backup.Ocrlog_Live_Months}")
+    print(f"OCR 記錄封存路徑: {config.Settings.Backup.Ocrlog_Archive_Path}")
     
     print("\n=== 匯出設定 ===")
     print(f"預設匯出格式: {config.Settings.Export.Default_Format}")
@@ -540,8 +700,21 @@ if __name__ == "__main__":
     print("\n=== 效能設定 ===")
     print(f"最大並行處理數: {config.Settings.Performance.Max_Concurrent_Processes}")
     print(f"記憶體使用限制: {config.Settings.Performance.Memory_Limit_MB} MB")
+    print(f"GPU 記憶體上限: {config.Settings.Performance.Gpu_Memory_Limit_MB} MB")
     print(f"圖片快取大小: {config.Settings.Performance.Image_Cache_Size_MB} MB")
     
+    print("\n=== OCR 推論服務 ===")
+    print(f"模式: {config.Settings.OCR_Service.Mode}")
+    print(f"位址: {config.Settings.OCR_Service.Host}:{config.Settings.OCR_Service.Port}")
+    print(f"批次上限: {config.Settings.OCR_Service.Batch_Max_Size}，等待 {config.Settings.OCR_Service.Batch_Wait_Ms} 毫秒")
+    
+    print("\n=== OCR 引擎 ===")
+    print(f"使用中的設定檔: {config.Settings.OCR_Engine.Profile}")
+    print(f"模型: {config.Settings.OCR_Engine.Yolo_Weights}, {config.Settings.OCR_Engine.Model_Dir}")
+    for name, profile in config.Settings.OCR_Engine.Profiles.items():
+        print(f"  {name}: {profile.Backend} {profile.Precision}，批次 {profile.Batch_Size} (等待 {profile.Batch_Wait_Ms} 毫秒)，"
+              f"beams {profile.Beams}，快取 {profile.Cache_Size}，ROI {profile.Roi_Mode}")
+    
     print("\n=== 開發者設定 ===")
     print(f"詳細日誌: {config.Settings.Development.Verbose_Logging}")
     print(f"效能監控: {config.Settings.Development.Enable_Performance_Monitoring}")
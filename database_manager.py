@@ -1,26 +1,57 @@
-from typing import List, Optional, Dict, Any
-from sqlalchemy import create_engine, text
+from typing import List, Optional, Dict, Any, Iterator, Callable, Tuple
+from collections import Counter
+from sqlalchemy import create_engine, text, func, inspect, insert, select, update, delete, bindparam, or_, and_
+from sqlalchemy.dialects.mysql import insert as mysql_insert, match as mysql_match
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 import datetime
 import logging
-from models import Base, Account, Ocrlog
+import base64
+import json
+import threading
+import time
+from models import Base, Account, Ocrlog, OcrlogDaily
+
+# 已被複合索引取代的舊索引 (表格名稱 -> 索引名稱)，啟動時移除
+OBSOLETE_INDEXES = {
+    'ocrlog': ['IX_OCRLog_Account'],
+}
+
+# 標籤代碼全文搜尋 (MySQL: FULLTEXT ngram 索引，SQLite: FTS5 trigram 虛擬表)
+SEARCH_COLUMNS = ('Source', 'OCRResult', 'KeyInResult')
+SEARCH_INDEX_NAME = 'FT_OCRLog_Text'
+SEARCH_FTS_TABLE = 'ocrlog_fts'
+# 可使用索引的最短關鍵字長度 (MySQL ngram_token_size 預設 2，FTS5 trigram 為 3)，較短時改以 LIKE 查詢
+SEARCH_MIN_LENGTH = {'fulltext': 2, 'fts5': 3}
 
 class DatabaseManager:
     """
     資料庫管理類別，提供 Account 和 Ocrlog 表格的 CRUD 操作
     """
     
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, account_cache_ttl: float = 300):
         """
         初始化資料庫管理器
         
         Args:
             connection_string: 資料庫連線字串
+            account_cache_ttl: 帳戶快取有效秒數 (0 表示不使用快取)
         """
         self.connection_string = connection_string
         self.engine = None
         self.SessionLocal = None
+        
+        # 帳戶快取 (帳戶表很小且很少變動，登入與操作者列表不需每次查詢資料庫)
+        self.account_cache_ttl = account_cache_ttl
+        self._account_cache = None          # 依 Account 排序的帳戶列表
+        self._account_cache_index = None    # 正規化帳戶ID -> 帳戶資料
+        self._account_cache_time = 0.0
+        self._account_cache_lock = threading.Lock()
+        
+        # 全文搜尋方式: 'fulltext' / 'fts5' / 'like' (依全文搜尋索引是否存在決定)
+        self.search_backend = 'like'
+        
         self._setup_database()
         
     def _setup_database(self):
@@ -29,14 +60,163 @@ class DatabaseManager:
             self.engine = create_engine(self.connection_string, echo=False)
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
             
+            # 每日統計表是否為新建立，新建立時需要從 ocrlog 回填
+            inspector = inspect(self.engine)
+            need_backfill = not inspector.has_table(OcrlogDaily.__tablename__)
+            new_ocrlog = not inspector.has_table(Ocrlog.__tablename__)
+            
             # 建立所有表格
             Base.metadata.create_all(bind=self.engine)
             logging.info("資料庫連線建立成功")
             
+            # create_all 不會變更既有表格；既有資料量大時建立索引需要數分鐘，
+            # 啟動時只檢查並提示，由 db_migrate.py 在維護時段執行 (新建立的空表格直接完成)
+            if new_ocrlog:
+                self.migrate_schema()
+            else:
+                self._check_schema()
+            
+            if need_backfill:
+                self.rebuild_daily_summary()
+            
         except Exception as e:
             logging.error(f"資料庫連線失敗: {e}")
             raise
     
+    def get_pending_migrations(self) -> List[str]:
+        """
+        檢查資料庫索引是否與 models 定義一致
+        
+        Returns:
+            尚未完成的索引變更說明 (空列表表示不需要遷移)
+        """
+        pending = []
+        inspector = inspect(self.engine)
+        for table in Base.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            pending.extend(f"建立索引 {table.name}.{index.name}"
+                           for index in table.indexes if index.name not in existing)
+            pending.extend(f"移除舊索引 {table.name}.{name}"
+                           for name in OBSOLETE_INDEXES.get(table.name, []) if name in existing)
+        
+        dialect = self.engine.dialect.name
+        if dialect in ('mysql', 'sqlite') and not self._has_search_index():
+            name = SEARCH_INDEX_NAME if dialect == 'mysql' else SEARCH_FTS_TABLE
+            pending.append(f"建立全文搜尋索引 ocrlog.{name}")
+        return pending
+    
+    def migrate_schema(self):
+        """
+        執行索引遷移: 建立 models 中新增的索引、移除舊索引並建立全文搜尋索引
+        
+        既有資料量大時需要數分鐘 (MySQL 建立索引期間會鎖定 ocrlog)，請在維護時段以 db_migrate.py 執行。
+        """
+        self._migrate_indexes()
+        self._create_search_index()
+        self._detect_search_backend()
+    
+    def _check_schema(self):
+        """啟動時檢查索引，缺少時只記錄警告 (查詢仍可執行，但可能變慢)"""
+        try:
+            pending = self.get_pending_migrations()
+        except SQLAlchemyError as e:
+            logging.warning(f"無法檢查資料庫索引: {e}")
+            pending = []
+        if pending:
+            logging.warning(f"資料庫索引尚未更新 ({'; '.join(pending)})，查詢可能變慢，"
+                            f"請在維護時段執行 python db_migrate.py --apply")
+        self._detect_search_backend()
+    
+    def _migrate_indexes(self):
+        """
+        同步既有表格的索引與 models 定義
+        
+        建立 models 中宣告但資料庫尚未存在的索引，再移除已被取代的舊索引
+        (先建立新索引，外鍵 Account 在移除舊索引時仍有可用的索引)
+        """
+        inspector = inspect(self.engine)
+        for table in Base.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            
+            for index in table.indexes:
+                if index.name not in existing:
+                    logging.info(f"建立索引 {table.name}.{index.name}，資料量大時需要一些時間")
+                    index.create(bind=self.engine)
+            
+            for name in OBSOLETE_INDEXES.get(table.name, []):
+                if name in existing:
+                    logging.info(f"移除舊索引 {table.name}.{name}")
+                    with self.engine.begin() as conn:
+                        if self.engine.dialect.name == 'mysql':
+                            conn.execute(text(f"DROP INDEX `{name}` ON `{table.name}`"))
+                        else:
+                            conn.execute(text(f'DROP INDEX "{name}"'))
+    
+    def _has_search_index(self) -> bool:
+        """全文搜尋索引是否已存在 (MySQL FULLTEXT 索引 / SQLite FTS5 表)"""
+        dialect = self.engine.dialect.name
+        if dialect == 'mysql':
+            return SEARCH_INDEX_NAME in {index['name'] for index in inspect(self.engine).get_indexes('ocrlog')}
+        if dialect == 'sqlite':
+            return inspect(self.engine).has_table(SEARCH_FTS_TABLE)
+        return False
+    
+    def _detect_search_backend(self):
+        """依全文搜尋索引是否存在決定搜尋方式，不存在時退回 LIKE 查詢 (無法使用索引，只適合小量資料)"""
+        try:
+            has_index = self._has_search_index()
+        except SQLAlchemyError as e:
+            logging.warning(f"無法檢查全文搜尋索引，搜尋將使用 LIKE: {e}")
+            has_index = False
+        if not has_index:
+            self.search_backend = 'like'
+        elif self.engine.dialect.name == 'mysql':
+            self.search_backend = 'fulltext'
+        else:
+            self.search_backend = 'fts5'
+    
+    def _create_search_index(self):
+        """
+        建立 ocrlog 標籤代碼的全文搜尋索引
+        
+        MySQL 使用 InnoDB FULLTEXT (ngram parser)，由資料庫在寫入時自動維護；
+        SQLite 使用 FTS5 trigram 外部內容表，以觸發器同步 ocrlog 的新增、修改與刪除。
+        無法建立時搜尋退回 LIKE 查詢。
+        """
+        dialect = self.engine.dialect.name
+        try:
+            if dialect == 'mysql':
+                if not self._has_search_index():
+                    logging.info(f"建立全文索引 ocrlog.{SEARCH_INDEX_NAME}，資料量大時需要一些時間")
+                    columns = ", ".join(f"`{name}`" for name in SEARCH_COLUMNS)
+                    with self.engine.begin() as conn:
+                        conn.execute(text(f"ALTER TABLE `ocrlog` ADD FULLTEXT INDEX `{SEARCH_INDEX_NAME}` "
+                                          f"({columns}) WITH PARSER ngram"))
+            elif dialect == 'sqlite':
+                if not self._has_search_index():
+                    self._create_sqlite_fts()
+        except SQLAlchemyError as e:
+            logging.error(f"建立全文搜尋索引失敗，搜尋將使用 LIKE: {e}")
+    
+    def _create_sqlite_fts(self):
+        """建立 SQLite FTS5 虛擬表與同步觸發器，並由 ocrlog 回填"""
+        columns = ", ".join(SEARCH_COLUMNS)
+        new_values = ", ".join(f"new.{name}" for name in SEARCH_COLUMNS)
+        old_values = ", ".join(f"old.{name}" for name in SEARCH_COLUMNS)
+        fts = SEARCH_FTS_TABLE
+        with self.engine.begin() as conn:
+            conn.execute(text(f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, "
+                              f"content='ocrlog', content_rowid='Id', tokenize='trigram')"))
+            conn.execute(text(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON ocrlog BEGIN "
+                              f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.Id, {new_values}); END"))
+            conn.execute(text(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON ocrlog BEGIN "
+                              f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.Id, {old_values}); END"))
+            conn.execute(text(f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {columns} ON ocrlog BEGIN "
+                              f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.Id, {old_values}); "
+                              f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.Id, {new_values}); END"))
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        logging.info(f"已建立全文搜尋表 {fts}")
+    
     def get_session(self) -> Session:
         """取得資料庫會話"""
         return self.SessionLocal()
@@ -57,13 +237,66 @@ class DatabaseManager:
             帳戶列表
         """
         try:
+            cache = self._get_account_cache()
+            if cache is not None:
+                accounts, _ = cache
+                return [dict(account) for account in accounts[offset:offset + limit]]
+            
             with self.get_session() as session:
-                accounts = session.query(Account).limit(limit).offset(offset).all()
+                accounts = session.query(Account).order_by(Account.Account).limit(limit).offset(offset).all()
                 return [self._account_to_dict(account) for account in accounts]
         except SQLAlchemyError as e:
             logging.error(f"查詢帳戶列表失敗: {e}")
             return []
     
+    def get_accounts_page(self, limit: int = 100, cursor: Optional[str] = None, offset: int = 0) -> Dict[str, Any]:
+        """
+        以 keyset 分頁查詢帳戶列表 (依 Account 排序)
+        
+        Args:
+            limit: 每頁筆數
+            cursor: 上一頁回傳的 next_cursor，None 表示第一頁
+            offset: 沒有游標時的偏移量 (直接跳頁用)
+            
+        Returns:
+            {'items': 帳戶列表, 'next_cursor': 下一頁游標或 None}
+        """
+        try:
+            with self.get_session() as session:
+                query = session.query(Account).order_by(Account.Account)
+                if cursor:
+                    last_account, = self._decode_cursor(cursor)
+                    query = query.filter(Account.Account > last_account)
+                elif offset:
+                    query = query.offset(offset)
+                accounts = query.limit(limit + 1).all()
+                
+                next_cursor = None
+                if len(accounts) > limit:
+                    accounts = accounts[:limit]
+                    next_cursor = self._encode_cursor([accounts[-1].Account])
+                return {
+                    'items': [self._account_to_dict(account) for account in accounts],
+                    'next_cursor': next_cursor
+                }
+        except SQLAlchemyError as e:
+            logging.error(f"分頁查詢帳戶列表失敗: {e}")
+            return {'items': [], 'next_cursor': None}
+    
+    def count_accounts(self) -> int:
+        """
+        取得帳戶總數
+        
+        Returns:
+            帳戶總數
+        """
+        try:
+            with self.get_session() as session:
+                return session.query(func.count(Account.Account)).scalar() or 0
+        except SQLAlchemyError as e:
+            logging.error(f"查詢帳戶總數失敗: {e}")
+            return 0
+    
     def get_account_by_id(self, account_id: str) -> Optional[Dict[str, Any]]:
         """
         根據帳戶ID查詢帳戶
@@ -75,6 +308,14 @@ class DatabaseManager:
             帳戶資料或 None
         """
         try:
+            cache = self._get_account_cache()
+            if cache is not None:
+                _, index = cache
+                account = index.get(self._account_cache_key(account_id))
+                if account is not None:
+                    return dict(account)
+            
+            # 快取未命中時仍查詢資料庫 (定序比較規則可能與快取鍵不同)
             with self.get_session() as session:
                 account = session.query(Account).filter(Account.Account == account_id).first()
                 return self._account_to_dict(account) if account else None
@@ -103,6 +344,7 @@ class DatabaseManager:
                 )
                 session.add(account)
                 session.commit()
+                self.invalidate_account_cache()
                 logging.info(f"新增帳戶成功: {account_data['Account']}")
                 return True
         except SQLAlchemyError as e:
@@ -138,6 +380,7 @@ class DatabaseManager:
                     account.IsAdmin = account_data['IsAdmin']
                 
                 session.commit()
+                self.invalidate_account_cache()
                 logging.info(f"修改帳戶成功: {account_id}")
                 return True
         except SQLAlchemyError as e:
@@ -162,7 +405,10 @@ class DatabaseManager:
                     return False
                 
                 session.delete(account)
+                # ocrlog 會隨帳戶串聯刪除，每日統計也一併移除
+                session.query(OcrlogDaily).filter(OcrlogDaily.Account_ == account_id).delete()
                 session.commit()
+                self.invalidate_account_cache()
                 logging.info(f"刪除帳戶成功: {account_id}")
                 return True
         except SQLAlchemyError as e:
@@ -195,6 +441,36 @@ class DatabaseManager:
     # Ocrlog 表格操作
     # =====================================================
     
+    def select_ocr_logs(self, columns: Optional[List[str]] = None,
+                        start_date: Optional[datetime.datetime] = None, end_date: Optional[datetime.datetime] = None,
+                        account_id: Optional[str] = None, limit: Optional[int] = None, offset: int = 0,
+                        descending: bool = True) -> List[Any]:
+        """
+        以 Core select 查詢 OCR 記錄 (不建立 ORM 物件)
+        
+        回傳 SQLAlchemy Row (具名 tuple，可用 row.Time 或 row[0] 取值)，只包含指定欄位，
+        Time 保留 datetime。大量讀取 (列表、匯出、統計) 時應使用此方法而非 ORM 查詢。
+        
+        Args:
+            columns: 欄位名稱列表 (資料表欄位名稱，如 'Account')，None 表示全部欄位
+            start_date: 開始時間 (可選)
+            end_date: 結束時間 (可選)
+            account_id: 帳戶ID (可選)
+            limit: 限制回傳筆數 (可選)
+            offset: 偏移量
+            descending: 是否依 Time, Id 遞減排序
+            
+        Returns:
+            資料列列表
+        """
+        stmt = self._ocrlog_select(columns, start_date, end_date, account_id, descending)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        if offset:
+            stmt = stmt.offset(offset)
+        with self.engine.connect() as conn:
+            return conn.execute(stmt).all()
+    
     def get_ocr_logs(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """
         查詢 OCR 記錄列表
@@ -207,13 +483,137 @@ class DatabaseManager:
             OCR 記錄列表
         """
         try:
-            with self.get_session() as session:
-                logs = session.query(Ocrlog).order_by(Ocrlog.Time.desc()).limit(limit).offset(offset).all()
-                return [self._ocrlog_to_dict(log) for log in logs]
+            rows = self.select_ocr_logs(limit=limit, offset=offset)
+            return [self._row_to_dict(row) for row in rows]
         except SQLAlchemyError as e:
             logging.error(f"查詢 OCR 記錄列表失敗: {e}")
             return []
     
+    def get_ocr_logs_page(self, limit: int = 100, cursor: Optional[str] = None,
+                          start_date: Optional[datetime.datetime] = None, end_date: Optional[datetime.datetime] = None,
+                          account_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        以 keyset 分頁查詢 OCR 記錄 (依 Time, Id 遞減排序)
+        
+        以上一頁最後一筆的 (Time, Id) 作為查詢起點，不使用 OFFSET，
+        翻到多深的頁數都只需讀取 limit + 1 筆 (IX_OCRLog_Time 索引已隱含主鍵 Id)。
+        
+        Args:
+            limit: 每頁筆數
+            cursor: 上一頁回傳的 next_cursor，None 表示第一頁
+            start_date: 開始時間 (可選)
+            end_date: 結束時間 (可選)
+            account_id: 帳戶ID (可選)
+            
+        Returns:
+            {'items': OCR 記錄列表, 'next_cursor': 下一頁游標或 None}
+        """
+        try:
+            stmt = self._ocrlog_select(None, start_date, end_date, account_id)
+            if cursor:
+                last_time, last_id = self._decode_cursor(cursor)
+                last_time = datetime.datetime.fromisoformat(last_time)
+                stmt = stmt.where(or_(
+                    Ocrlog.Time < last_time,
+                    and_(Ocrlog.Time == last_time, Ocrlog.Id < last_id)
+                ))
+            
+            with self.engine.connect() as conn:
+                rows = conn.execute(stmt.limit(limit + 1)).all()
+            
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = self._encode_cursor([rows[-1].Time.isoformat(), rows[-1].Id])
+            return {
+                'items': [self._row_to_dict(row) for row in rows],
+                'next_cursor': next_cursor
+            }
+        except SQLAlchemyError as e:
+            logging.error(f"分頁查詢 OCR 記錄失敗: {e}")
+            return {'items': [], 'next_cursor': None}
+    
+    def count_ocr_logs(self, start_day: Optional[datetime.date] = None, end_day: Optional[datetime.date] = None,
+                       account_id: Optional[str] = None, live_only: bool = False) -> int:
+        """
+        取得 OCR 記錄總數 (由每日統計表加總，不掃描 ocrlog)
+        
+        每日統計表保留已封存 (已自 ocrlog 刪除) 月份的統計，live_only 時只計算
+        資料表內最舊一筆記錄當日之後的部分，與 get_ocr_logs_page 可翻到的筆數一致。
+        
+        Args:
+            start_day: 開始日期 (含，可選)
+            end_day: 結束日期 (含，可選)
+            account_id: 帳戶ID (可選)
+            live_only: 只計算仍在 ocrlog 資料表內的記錄
+            
+        Returns:
+            記錄總數
+        """
+        try:
+            with self.get_session() as session:
+                if live_only:
+                    oldest = session.query(func.min(Ocrlog.Time)).scalar()
+                    if oldest is None:
+                        return 0
+                    start_day = max(start_day, oldest.date()) if start_day else oldest.date()
+                query = session.query(func.coalesce(func.sum(OcrlogDaily.Count), 0))
+                if start_day:
+                    query = query.filter(OcrlogDaily.Day >= start_day)
+                if end_day:
+                    query = query.filter(OcrlogDaily.Day <= end_day)
+                if account_id:
+                    query = query.filter(OcrlogDaily.Account_ == account_id)
+                return int(query.scalar() or 0)
+        except SQLAlchemyError as e:
+            logging.error(f"查詢 OCR 記錄總數失敗: {e}")
+            return 0
+    
+    def search_ocr_logs(self, query: str, start_date: Optional[datetime.datetime] = None,
+                        end_date: Optional[datetime.datetime] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        以部分標籤代碼搜尋 OCR 記錄 (比對 Source、OCRResult、KeyInResult，不分大小寫)
+        
+        關鍵字夠長時先由全文索引取得候選記錄，再以 LIKE 確認為連續子字串，
+        結果與 '%關鍵字%' 相同但不需掃描整個 ocrlog。
+        
+        Args:
+            query: 搜尋關鍵字 (如 '0718-E2')
+            start_date: 開始時間 (可選)
+            end_date: 結束時間 (可選)
+            limit: 限制回傳筆數
+            
+        Returns:
+            OCR 記錄列表 (依時間遞減)
+        """
+        keyword = (query or '').strip()
+        if not keyword:
+            return []
+        
+        try:
+            stmt = self._ocrlog_select(None, start_date, end_date).limit(limit)
+            stmt = stmt.where(or_(*[Ocrlog.__table__.c[name].contains(keyword, autoescape=True)
+                                    for name in SEARCH_COLUMNS]))
+            
+            if len(keyword) >= SEARCH_MIN_LENGTH.get(self.search_backend, len(keyword) + 1):
+                # 以片語搜尋，關鍵字中的標點 (如 '-') 視為一般字元
+                if self.search_backend == 'fulltext':
+                    # 布林模式的片語內無法跳脫雙引號，移除後仍由 LIKE 確認
+                    phrase = '"' + keyword.replace('"', ' ') + '"'
+                    stmt = stmt.where(mysql_match(*[Ocrlog.__table__.c[name] for name in SEARCH_COLUMNS],
+                                                  against=phrase).in_boolean_mode())
+                else:
+                    phrase = '"' + keyword.replace('"', '""') + '"'
+                    matched = select(text("rowid")).select_from(text(SEARCH_FTS_TABLE)).where(
+                        text(f"{SEARCH_FTS_TABLE} MATCH :phrase").bindparams(phrase=phrase))
+                    stmt = stmt.where(Ocrlog.Id.in_(matched))
+            
+            with self.engine.connect() as conn:
+                return [self._row_to_dict(row) for row in conn.execute(stmt)]
+        except SQLAlchemyError as e:
+            logging.error(f"搜尋 OCR 記錄失敗: {e}")
+            return []
+    
     def get_ocr_log_by_id(self, log_id: int) -> Optional[Dict[str, Any]]:
         """
         根據記錄ID查詢 OCR 記錄
@@ -260,6 +660,7 @@ class DatabaseManager:
                     ExteriorErrReason=log_data.get('ExteriorErrReason')
                 )
                 session.add(log)
+                self._apply_daily_summary(session, log.Time, log.Account_, log.Judgment, log.OK, 1)
                 session.commit()
                 session.refresh(log)
                 logging.info(f"新增 OCR 記錄成功: {log.Id}")
@@ -286,6 +687,8 @@ class DatabaseManager:
                     logging.warning(f"OCR 記錄不存在: {log_id}")
                     return False
                 
+                old_key = (log.Time, log.Account_, log.Judgment, log.OK)
+                
                 # 更新欄位
                 if 'Account' in log_data:
                     log.Account_ = log_data['Account']
@@ -314,6 +717,12 @@ class DatabaseManager:
                 if 'ExteriorErrReason' in log_data:
                     log.ExteriorErrReason = log_data['ExteriorErrReason']
                 
+                # 統計維度有變動時，同步調整每日統計
+                new_key = (log.Time, log.Account_, log.Judgment, log.OK)
+                if self._daily_key(*old_key) != self._daily_key(*new_key):
+                    self._apply_daily_summary(session, *old_key, -1)
+                    self._apply_daily_summary(session, *new_key, 1)
+                
                 session.commit()
                 logging.info(f"修改 OCR 記錄成功: {log_id}")
                 return True
@@ -338,6 +747,7 @@ class DatabaseManager:
                     logging.warning(f"OCR 記錄不存在: {log_id}")
                     return False
                 
+                self._apply_daily_summary(session, log.Time, log.Account_, log.Judgment, log.OK, -1)
                 session.delete(log)
                 session.commit()
                 logging.info(f"刪除 OCR 記錄成功: {log_id}")
@@ -345,6 +755,284 @@ class DatabaseManager:
         except SQLAlchemyError as e:
             logging.error(f"刪除 OCR 記錄失敗: {e}")
             return False
+
+    def clear_ocr_log_image(self, image_path: str, since: Optional[datetime.datetime] = None) -> int:
+        """
+        清除指向指定影像的 Image 欄位 (影像寫入失敗時使用，避免記錄指向不存在的檔案)
+
+        Args:
+            image_path: 影像路徑
+            since: 只處理此時間 (含) 之後的記錄，可利用 Time 索引縮小範圍
+
+        Returns:
+            清除筆數 (失敗時為 0)
+        """
+        table = Ocrlog.__table__
+        conditions = [table.c.Image == image_path]
+        if since:
+            conditions.append(table.c.Time >= since)
+        try:
+            with self.engine.begin() as conn:
+                result = conn.execute(update(table).where(*conditions).values(Image=''))
+            if result.rowcount:
+                logging.warning(f"影像寫入失敗，已清除 {result.rowcount} 筆記錄的 Image: {image_path}")
+            return result.rowcount
+        except SQLAlchemyError as e:
+            logging.error(f"清除 OCR 記錄影像失敗: {e}")
+            return 0
+
+    # =====================================================
+    # 批次操作
+    # =====================================================
+    
+    def bulk_create_ocr_logs(self, logs: List[Dict[str, Any]], chunk_size: int = 1000) -> Dict[str, Any]:
+        """
+        批次新增 OCR 記錄 (每批一次 executemany、一個交易，並同步每日統計)
+        
+        Args:
+            logs: OCR 記錄資料列表 (欄位同 create_ocr_log)
+            chunk_size: 每批筆數
+            
+        Returns:
+            {'success_count': 成功筆數, 'failed': [{'index': 輸入索引, 'error': 錯誤訊息}]}
+        """
+        table = Ocrlog.__table__
+        
+        def apply_chunk(session, chunk):
+            rows = []
+            failures = []
+            deltas = Counter()
+            for i, log_data in enumerate(chunk):
+                try:
+                    row = self._ocrlog_insert_row(log_data)
+                except KeyError as e:
+                    failures.append((i, f"缺少欄位: {e}"))
+                    continue
+                rows.append(row)
+                deltas[self._daily_key(row['Time'], row['Account'], row['Judgment'], row['OK'])] += 1
+            if rows:
+                session.execute(insert(table), rows)
+                self._apply_daily_summary_deltas(session, deltas)
+            return len(rows), failures
+        
+        return self._run_bulk("批次新增 OCR 記錄", logs, chunk_size, apply_chunk)
+    
+    def bulk_update_ocr_logs(self, updates: List[Dict[str, Any]], chunk_size: int = 1000) -> Dict[str, Any]:
+        """
+        依 Id 批次修改 OCR 記錄 (每批一次查詢原值、依修改欄位分組 executemany，並同步每日統計)
+        
+        Args:
+            updates: 修改資料列表，每筆需包含 'Id' 與要修改的欄位 (欄位同 update_ocr_log)
+            chunk_size: 每批筆數
+            
+        Returns:
+            {'success_count': 成功筆數, 'failed': [{'index': 輸入索引, 'error': 錯誤訊息}]}
+        """
+        table = Ocrlog.__table__
+        updatable = {column.name for column in table.c} - {'Id'}
+        
+        def apply_chunk(session, chunk):
+            failures = []
+            ids = [item.get('Id') for item in chunk if item.get('Id') is not None]
+            current = {
+                row.Id: {'Time': row.Time, 'Account': row.Account, 'Judgment': row.Judgment, 'OK': row.OK}
+                for row in session.execute(
+                    select(table.c.Id, table.c.Time, table.c.Account, table.c.Judgment, table.c.OK)
+                    .where(table.c.Id.in_(ids))
+                )
+            } if ids else {}
+            
+            groups = {}
+            deltas = Counter()
+            for i, item in enumerate(chunk):
+                log_id = item.get('Id')
+                fields = {key: value for key, value in item.items() if key != 'Id'}
+                unknown = set(fields) - updatable
+                if log_id is None:
+                    failures.append((i, "缺少 Id"))
+                    continue
+                if unknown:
+                    failures.append((i, f"未知的欄位: {', '.join(sorted(unknown))}"))
+                    continue
+                if log_id not in current:
+                    failures.append((i, f"OCR 記錄不存在: {log_id}"))
+                    continue
+                if not fields:
+                    continue
+                
+                # 統計維度有變動時，同步調整每日統計 (同批次重複 Id 以前一次修改後的值為準)
+                old = current[log_id]
+                new = {**old, **{key: fields[key] for key in old if key in fields}}
+                old_key = self._daily_key(old['Time'], old['Account'], old['Judgment'], old['OK'])
+                new_key = self._daily_key(new['Time'], new['Account'], new['Judgment'], new['OK'])
+                if old_key != new_key:
+                    deltas[old_key] -= 1
+                    deltas[new_key] += 1
+                current[log_id] = new
+                
+                groups.setdefault(tuple(sorted(fields)), []).append({'b_Id': log_id, **fields})
+            
+            for columns, params in groups.items():
+                stmt = update(table).where(table.c.Id == bindparam('b_Id')).values(
+                    {column: bindparam(column) for column in columns}
+                )
+                session.connection().execute(stmt, params)
+            self._apply_daily_summary_deltas(session, deltas)
+            return len(chunk) - len(failures), failures
+        
+        return self._run_bulk("批次修改 OCR 記錄", updates, chunk_size, apply_chunk)
+    
+    def bulk_delete_ocr_logs(self, log_ids: List[int], chunk_size: int = 1000) -> Dict[str, Any]:
+        """
+        依 Id 批次刪除 OCR 記錄 (每批一次 DELETE ... WHERE Id IN，並同步每日統計)
+        
+        Args:
+            log_ids: 記錄ID列表
+            chunk_size: 每批筆數
+            
+        Returns:
+            {'success_count': 成功筆數, 'failed': [{'index': 輸入索引, 'error': 錯誤訊息}]}
+        """
+        table = Ocrlog.__table__
+        
+        def apply_chunk(session, chunk):
+            rows = {
+                row.Id: row for row in session.execute(
+                    select(table.c.Id, table.c.Time, table.c.Account, table.c.Judgment, table.c.OK)
+                    .where(table.c.Id.in_(chunk))
+                )
+            }
+            failures = []
+            deltas = Counter()
+            deleted = set()
+            for i, log_id in enumerate(chunk):
+                row = rows.get(log_id)
+                if row is None or log_id in deleted:
+                    failures.append((i, f"OCR 記錄不存在: {log_id}"))
+                    continue
+                deleted.add(log_id)
+                deltas[self._daily_key(row.Time, row.Account, row.Judgment, row.OK)] -= 1
+            if deleted:
+                session.execute(delete(table).where(table.c.Id.in_(deleted)))
+                self._apply_daily_summary_deltas(session, deltas)
+            return len(deleted), failures
+        
+        return self._run_bulk("批次刪除 OCR 記錄", log_ids, chunk_size, apply_chunk)
+    
+    def bulk_create_accounts(self, accounts: List[Dict[str, Any]], chunk_size: int = 500) -> Dict[str, Any]:
+        """
+        批次新增帳戶
+        
+        Args:
+            accounts: 帳戶資料列表 (欄位同 create_account)
+            chunk_size: 每批筆數
+            
+        Returns:
+            {'success_count': 成功筆數, 'failed': [{'index': 輸入索引, 'error': 錯誤訊息}]}
+        """
+        def apply_chunk(session, chunk):
+            rows = []
+            failures = []
+            for i, account_data in enumerate(chunk):
+                try:
+                    rows.append({
+                        'Account': account_data['Account'],
+                        'Name': account_data['Name'],
+                        'Password': account_data['Password'],
+                        'NeedPassword': account_data.get('NeedPassword', 1),
+                        'IsAdmin': account_data.get('IsAdmin', 0)
+                    })
+                except KeyError as e:
+                    failures.append((i, f"缺少欄位: {e}"))
+            if rows:
+                session.execute(insert(Account.__table__), rows)
+            return len(rows), failures
+        
+        try:
+            return self._run_bulk("批次新增帳戶", accounts, chunk_size, apply_chunk)
+        finally:
+            self.invalidate_account_cache()
+    
+    def bulk_delete_accounts(self, account_ids: List[str], chunk_size: int = 500) -> Dict[str, Any]:
+        """
+        批次刪除帳戶 (連同其 OCR 記錄與每日統計)
+        
+        Args:
+            account_ids: 帳戶ID列表
+            chunk_size: 每批筆數
+            
+        Returns:
+            {'success_count': 成功筆數, 'failed': [{'index': 輸入索引, 'error': 錯誤訊息}]}
+        """
+        table = Account.__table__
+        
+        def apply_chunk(session, chunk):
+            existing = set(session.execute(select(table.c.Account).where(table.c.Account.in_(chunk))).scalars())
+            failures = [(i, f"帳戶不存在: {account_id}") for i, account_id in enumerate(chunk) if account_id not in existing]
+            if existing:
+                # ocrlog 在 MySQL 會由外鍵串聯刪除，這裡明確刪除以免依賴資料庫設定
+                session.execute(delete(Ocrlog.__table__).where(Ocrlog.__table__.c.Account.in_(existing)))
+                session.execute(delete(OcrlogDaily.__table__).where(OcrlogDaily.__table__.c.Account.in_(existing)))
+                session.execute(delete(table).where(table.c.Account.in_(existing)))
+            return len(chunk) - len(failures), failures
+        
+        try:
+            return self._run_bulk("批次刪除帳戶", account_ids, chunk_size, apply_chunk)
+        finally:
+            self.invalidate_account_cache()
+    
+    def _run_bulk(self, name: str, items: List[Any], chunk_size: int,
+                  apply_chunk: Callable[[Session, List[Any]], Tuple[int, List[tuple]]]) -> Dict[str, Any]:
+        """
+        分批執行批次操作，每批一個交易
+        
+        apply_chunk(session, chunk) 回傳 (成功筆數, [(批次內索引, 錯誤訊息)])。
+        整批因資料庫錯誤失敗時，改為逐筆重試以找出失敗的資料列。
+        """
+        success_count = 0
+        failed = []
+        chunk_size = max(1, chunk_size)
+        
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            try:
+                with self.get_session() as session:
+                    count, failures = apply_chunk(session, chunk)
+                    session.commit()
+                success_count += count
+                failed.extend({'index': start + i, 'error': error} for i, error in failures)
+            except SQLAlchemyError as e:
+                logging.warning(f"{name}: 第 {start} 筆起的批次失敗，改為逐筆重試: {e}")
+                for offset, item in enumerate(chunk):
+                    try:
+                        with self.get_session() as session:
+                            count, failures = apply_chunk(session, [item])
+                            session.commit()
+                        success_count += count
+                        failed.extend({'index': start + offset, 'error': error} for _, error in failures)
+                    except SQLAlchemyError as row_error:
+                        failed.append({'index': start + offset, 'error': str(getattr(row_error, 'orig', None) or row_error)})
+        
+        logging.info(f"{name}: 成功 {success_count} 筆，失敗 {len(failed)} 筆")
+        return {'success_count': success_count, 'failed': failed}
+    
+    def _ocrlog_insert_row(self, log_data: Dict[str, Any]) -> Dict[str, Any]:
+        """將 OCR 記錄資料轉換為 ocrlog 插入列 (必要欄位缺少時拋出 KeyError)"""
+        return {
+            'Account': log_data['Account'],
+            'Time': log_data.get('Time', datetime.datetime.now()),
+            'Source': log_data['Source'],
+            'OCRResult': log_data['OCRResult'],
+            'OK': log_data['OK'],
+            'Image': log_data['Image'],
+            'Manual': log_data['Manual'],
+            'Judgment': log_data['Judgment'],
+            'KeyInResult': log_data.get('KeyInResult'),
+            'Processor': log_data.get('Processor'),
+            'IsExteriorOK': log_data.get('IsExteriorOK'),
+            'ExteriorClass': log_data.get('ExteriorClass'),
+            'ExteriorErrReason': log_data.get('ExteriorErrReason')
+        }
     
     def get_ocr_logs_by_account(self, account_id: str, limit: int = 100) -> List[Dict[str, Any]]:
         """
@@ -358,11 +1046,8 @@ class DatabaseManager:
             OCR 記錄列表
         """
         try:
-            with self.get_session() as session:
-                logs = session.query(Ocrlog).filter(
-                    Ocrlog.Account_ == account_id
-                ).order_by(Ocrlog.Time.desc()).limit(limit).all()
-                return [self._ocrlog_to_dict(log) for log in logs]
+            rows = self.select_ocr_logs(account_id=account_id, limit=limit)
+            return [self._row_to_dict(row) for row in rows]
         except SQLAlchemyError as e:
             logging.error(f"根據帳戶查詢 OCR 記錄失敗: {e}")
             return []
@@ -379,21 +1064,132 @@ class DatabaseManager:
         Returns:
             OCR 記錄列表
         """
+        try:
+            rows = self.select_ocr_logs(start_date=start_date, end_date=end_date, limit=limit)
+            return [self._row_to_dict(row) for row in rows]
+        except SQLAlchemyError as e:
+            logging.error(f"根據日期範圍查詢 OCR 記錄失敗: {e}")
+            return []
+    
+    def count_ocr_logs_by_date_range(self, start_date: datetime.datetime, end_date: datetime.datetime) -> int:
+        """
+        計算日期範圍內的 OCR 記錄筆數
+        
+        資料庫錯誤時拋出例外 (匯出需回報失敗，不可視為沒有資料)。
+        
+        Args:
+            start_date: 開始日期
+            end_date: 結束日期
+            
+        Returns:
+            記錄筆數
+        """
         try:
             with self.get_session() as session:
-                logs = session.query(Ocrlog).filter(
+                return session.query(func.count(Ocrlog.Id)).filter(
                     Ocrlog.Time >= start_date,
                     Ocrlog.Time <= end_date
-                ).order_by(Ocrlog.Time.desc()).limit(limit).all()
-                return [self._ocrlog_to_dict(log) for log in logs]
+                ).scalar() or 0
         except SQLAlchemyError as e:
-            logging.error(f"根據日期範圍查詢 OCR 記錄失敗: {e}")
-            return []
+            logging.error(f"計算 OCR 記錄筆數失敗: {e}")
+            raise
+    
+    def iter_ocr_log_chunks(self, start_date: datetime.datetime, end_date: datetime.datetime, chunk_size: int = 1000, descending: bool = True,
+                            account_id: Optional[str] = None) -> Iterator[List[Any]]:
+        """
+        分批串流讀取日期範圍內的 OCR 記錄原始列 (供匯出使用)
+
+        直接以 Core select 讀取，不建立 ORM 物件也不轉為字典，Time 保留 datetime。
+        每列欄位順序與 Ocrlog.__table__.c 相同 (Account 欄位名稱為 'Account')。
+
+        Args:
+            start_date: 開始日期
+            end_date: 結束日期
+            chunk_size: 每批筆數
+            descending: 是否依 Time 遞減排序 (False 時遞增)
+            account_id: 帳戶ID (可選)
+
+        Yields:
+            一批資料列 (tuple-like Row 的列表)
+        """
+        try:
+            stmt = self._ocrlog_select(None, start_date, end_date, account_id, descending)
+
+            with self.engine.connect() as conn:
+                result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+                for rows in result.partitions(chunk_size):
+                    yield rows
+        except SQLAlchemyError as e:
+            logging.error(f"分批讀取 OCR 記錄失敗: {e}")
+            raise
+
+    def iter_ocr_log_batches(self, start_date: datetime.datetime, end_date: datetime.datetime, batch_size: int = 50000) -> Iterator[Dict[str, List[Any]]]:
+        """
+        以欄為單位分批串流讀取日期範圍內的 OCR 記錄 (供 Parquet 等欄式格式匯出)
+
+        依 Time 遞增排序，讓依月份分割的輸出可以逐月循序寫入。
+
+        Args:
+            start_date: 開始日期
+            end_date: 結束日期
+            batch_size: 每批筆數
+
+        Yields:
+            {欄位名稱: 值列表} 的欄式批次
+        """
+        keys = [column.name for column in Ocrlog.__table__.c]
+        chunks = self.iter_ocr_log_chunks(start_date, end_date, batch_size, descending=False)
+        try:
+            for rows in chunks:
+                yield {key: list(values) for key, values in zip(keys, zip(*rows))}
+        finally:
+            chunks.close()
+    
+    def get_oldest_ocr_log_time(self) -> Optional[datetime.datetime]:
+        """
+        取得最舊一筆 OCR 記錄的時間
+        
+        Returns:
+            最舊的記錄時間，沒有資料時為 None
+        """
+        try:
+            with self.get_session() as session:
+                return session.query(func.min(Ocrlog.Time)).scalar()
+        except SQLAlchemyError as e:
+            logging.error(f"查詢最舊 OCR 記錄時間失敗: {e}")
+            return None
+    
+    def purge_archived_ocr_logs(self, start_date: datetime.datetime, end_date: datetime.datetime, max_id: int) -> int:
+        """
+        移除已封存的 OCR 記錄 (Time 介於 [start_date, end_date) 且 Id <= max_id)
+        
+        以單一 DELETE 在同一交易中完成，失敗時不會留下部分刪除的月份。
+        每日統計表保持不變，封存月份的統計仍可查詢。
+        
+        Args:
+            start_date: 開始時間 (含)
+            end_date: 結束時間 (不含)
+            max_id: 已寫入封存檔的最大記錄ID (封存後才新增的記錄不會被刪除)
+            
+        Returns:
+            刪除筆數
+        """
+        table = Ocrlog.__table__
+        with self.engine.begin() as conn:
+            result = conn.execute(delete(table).where(
+                table.c.Time >= start_date,
+                table.c.Time < end_date,
+                table.c.Id <= max_id
+            ))
+            logging.info(f"移除已封存 OCR 記錄: {start_date} ~ {end_date}，{result.rowcount} 筆")
+            return result.rowcount
     
     def get_ocr_statistics(self, start_date: Optional[datetime.datetime] = None, end_date: Optional[datetime.datetime] = None) -> Dict[str, Any]:
         """
         取得 OCR 統計資料
         
+        整日的部分由每日統計表 (ocrlog_daily) 加總，只有區間頭尾不足一日的部分才查詢 ocrlog 原始資料
+        
         Args:
             start_date: 開始日期 (可選)
             end_date: 結束日期 (可選)
@@ -403,17 +1199,45 @@ class DatabaseManager:
         """
         try:
             with self.get_session() as session:
-                query = session.query(Ocrlog)
+                ok_counts = {0: 0, 1: 0}
+                total_count = 0
+                
+                def accumulate(rows):
+                    nonlocal total_count
+                    for ok, count in rows:
+                        count = int(count or 0)
+                        total_count += count
+                        if ok in ok_counts:
+                            ok_counts[ok] += count
+                
+                summary_query = session.query(OcrlogDaily.OK, func.sum(OcrlogDaily.Count))
                 
                 if start_date and end_date:
-                    query = query.filter(
-                        Ocrlog.Time >= start_date,
-                        Ocrlog.Time <= end_date
-                    )
+                    # 完整包含於區間內的日期: [first_day, last_day]
+                    first_day = start_date.date()
+                    if start_date != datetime.datetime.combine(first_day, datetime.time.min):
+                        first_day += datetime.timedelta(days=1)
+                    last_day = end_date.date() - datetime.timedelta(days=1)
+                    
+                    if first_day <= last_day:
+                        summary_query = summary_query.filter(
+                            OcrlogDaily.Day >= first_day,
+                            OcrlogDaily.Day <= last_day
+                        )
+                        accumulate(summary_query.group_by(OcrlogDaily.OK).all())
+                        
+                        # 區間頭尾不足一日的部分
+                        head_end = datetime.datetime.combine(first_day, datetime.time.min)
+                        tail_start = datetime.datetime.combine(last_day + datetime.timedelta(days=1), datetime.time.min)
+                        accumulate(self._raw_ok_counts(session, start_date, head_end, end_inclusive=False))
+                        accumulate(self._raw_ok_counts(session, tail_start, end_date, end_inclusive=True))
+                    else:
+                        accumulate(self._raw_ok_counts(session, start_date, end_date, end_inclusive=True))
+                else:
+                    accumulate(summary_query.group_by(OcrlogDaily.OK).all())
                 
-                total_count = query.count()
-                ok_count = query.filter(Ocrlog.OK == 1).count()
-                ng_count = query.filter(Ocrlog.OK == 0).count()
+                ok_count = ok_counts[1]
+                ng_count = ok_counts[0]
                 
                 pass_rate = (ok_count / total_count * 100) if total_count > 0 else 0
                 
@@ -427,10 +1251,206 @@ class DatabaseManager:
             logging.error(f"取得 OCR 統計資料失敗: {e}")
             return {'total_count': 0, 'ok_count': 0, 'ng_count': 0, 'pass_rate': 0}
     
+    def get_daily_statistics(self, start_day: datetime.date, end_day: datetime.date, account_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        取得每日 OCR 統計資料 (直接讀取每日統計表，成本與天數成正比)
+        
+        Args:
+            start_day: 開始日期
+            end_day: 結束日期 (包含)
+            account_id: 帳戶ID (可選)
+            
+        Returns:
+            每日統計資料列表，依日期排序
+        """
+        try:
+            with self.get_session() as session:
+                query = session.query(
+                    OcrlogDaily.Day,
+                    OcrlogDaily.Judgment,
+                    OcrlogDaily.OK,
+                    func.sum(OcrlogDaily.Count)
+                ).filter(
+                    OcrlogDaily.Day >= start_day,
+                    OcrlogDaily.Day <= end_day
+                )
+                if account_id:
+                    query = query.filter(OcrlogDaily.Account_ == account_id)
+                
+                rows = query.group_by(OcrlogDaily.Day, OcrlogDaily.Judgment, OcrlogDaily.OK).all()
+                
+                days: Dict[datetime.date, Dict[str, Any]] = {}
+                for day, judgment, ok, count in rows:
+                    count = int(count or 0)
+                    if isinstance(day, str):
+                        day = datetime.date.fromisoformat(day)
+                    item = days.setdefault(day, {
+                        'day': day.isoformat(),
+                        'total_count': 0,
+                        'ok_count': 0,
+                        'ng_count': 0,
+                        'judgments': {}
+                    })
+                    item['total_count'] += count
+                    if ok == 1:
+                        item['ok_count'] += count
+                    elif ok == 0:
+                        item['ng_count'] += count
+                    item['judgments'][judgment] = item['judgments'].get(judgment, 0) + count
+                
+                result = []
+                for day in sorted(days):
+                    item = days[day]
+                    total = item['total_count']
+                    item['pass_rate'] = round(item['ok_count'] / total * 100, 2) if total > 0 else 0
+                    result.append(item)
+                return result
+        except SQLAlchemyError as e:
+            logging.error(f"取得每日 OCR 統計資料失敗: {e}")
+            return []
+    
+    def rebuild_daily_summary(self, start_day: Optional[datetime.date] = None, end_day: Optional[datetime.date] = None) -> bool:
+        """
+        由 ocrlog 原始資料重建每日統計表 (壓縮/校正用，可定期執行)
+        
+        已封存的月份不在 ocrlog 內，只重建資料表內最舊一筆記錄當日之後的部分，
+        之前日期的統計保持不變。
+        
+        Args:
+            start_day: 開始日期 (可選，未指定則由最舊的記錄開始)
+            end_day: 結束日期 (可選，包含)
+            
+        Returns:
+            是否成功
+        """
+        try:
+            with self.get_session() as session:
+                oldest = session.query(func.min(Ocrlog.Time)).scalar()
+                if oldest is None:
+                    logging.info("ocrlog 沒有資料，不重建每日統計表")
+                    return True
+                start_day = max(start_day, oldest.date()) if start_day else oldest.date()
+                if end_day and end_day < start_day:
+                    return True
+                
+                delete_query = session.query(OcrlogDaily)
+                source = select(
+                    func.date(Ocrlog.Time),
+                    Ocrlog.Account_,
+                    Ocrlog.Judgment,
+                    Ocrlog.OK,
+                    func.count(Ocrlog.Id)
+                )
+                if start_day:
+                    delete_query = delete_query.filter(OcrlogDaily.Day >= start_day)
+                    source = source.where(Ocrlog.Time >= datetime.datetime.combine(start_day, datetime.time.min))
+                if end_day:
+                    delete_query = delete_query.filter(OcrlogDaily.Day <= end_day)
+                    source = source.where(Ocrlog.Time < datetime.datetime.combine(end_day + datetime.timedelta(days=1), datetime.time.min))
+                source = source.group_by(func.date(Ocrlog.Time), Ocrlog.Account_, Ocrlog.Judgment, Ocrlog.OK)
+                
+                delete_query.delete(synchronize_session=False)
+                table = OcrlogDaily.__table__
+                session.execute(insert(table).from_select(
+                    [table.c.Day, table.c.Account, table.c.Judgment, table.c.OK, table.c.Count],
+                    source
+                ))
+                session.commit()
+                logging.info(f"重建每日統計表成功: {start_day or '-'} ~ {end_day or '-'}")
+                return True
+        except SQLAlchemyError as e:
+            logging.error(f"重建每日統計表失敗: {e}")
+            return False
+    
     # =====================================================
     # 輔助方法
     # =====================================================
     
+    def _daily_key(self, time: datetime.datetime, account: str, judgment: int, ok: Any) -> tuple:
+        """取得每日統計表的主鍵 (日期, 帳戶, 判定, OK)"""
+        day = (time or datetime.datetime.now()).date()
+        return (day, account, judgment, 1 if ok else 0)
+    
+    def _apply_daily_summary(self, session: Session, time: datetime.datetime, account: str, judgment: int, ok: Any, delta: int):
+        """在同一交易中累加每日統計表的筆數"""
+        self._apply_daily_summary_key(session, self._daily_key(time, account, judgment, ok), delta)
+    
+    def _apply_daily_summary_deltas(self, session: Session, deltas: Counter):
+        """在同一交易中套用多個每日統計鍵的增減 (批次操作用)"""
+        for key, delta in deltas.items():
+            if delta:
+                self._apply_daily_summary_key(session, key, delta)
+    
+    def _apply_daily_summary_key(self, session: Session, key: tuple, delta: int):
+        """依每日統計鍵 (_daily_key) 累加筆數"""
+        day, account, judgment, ok = key
+        table = OcrlogDaily.__table__
+        values = {'Day': day, 'Account': account, 'Judgment': judgment, 'OK': ok, 'Count': delta}
+        dialect = self.engine.dialect.name
+        
+        if dialect == 'mysql':
+            stmt = mysql_insert(table).values(**values)
+            stmt = stmt.on_duplicate_key_update(Count=stmt.table.c.Count + delta)
+            session.execute(stmt)
+        elif dialect == 'sqlite':
+            stmt = sqlite_insert(table).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.Day, table.c.Account, table.c.Judgment, table.c.OK],
+                set_={'Count': table.c.Count + delta}
+            )
+            session.execute(stmt)
+        else:
+            summary = session.get(OcrlogDaily, (day, account, judgment, ok))
+            if summary:
+                summary.Count += delta
+            else:
+                session.add(OcrlogDaily(Day=day, Account_=account, Judgment=judgment, OK=ok, Count=delta))
+    
+    def _raw_ok_counts(self, session: Session, start: datetime.datetime, end: datetime.datetime, end_inclusive: bool) -> List[tuple]:
+        """由 ocrlog 原始資料計算區間內各 OK 值的筆數"""
+        if end < start or (end == start and not end_inclusive):
+            return []
+        query = session.query(Ocrlog.OK, func.count(Ocrlog.Id)).filter(Ocrlog.Time >= start)
+        if end_inclusive:
+            query = query.filter(Ocrlog.Time <= end)
+        else:
+            query = query.filter(Ocrlog.Time < end)
+        return query.group_by(Ocrlog.OK).all()
+    
+    def invalidate_account_cache(self):
+        """清除帳戶快取，下次查詢時重新載入 (帳戶由其他程式修改時可手動呼叫)"""
+        with self._account_cache_lock:
+            self._account_cache = None
+            self._account_cache_index = None
+    
+    def _get_account_cache(self) -> Optional[tuple]:
+        """
+        取得帳戶快取，過期或尚未載入時一次載入全部帳戶
+        
+        Returns:
+            (依 Account 排序的帳戶列表, 正規化帳戶ID -> 帳戶資料)，停用快取時為 None
+        """
+        if self.account_cache_ttl <= 0:
+            return None
+        
+        with self._account_cache_lock:
+            now = time.monotonic()
+            if self._account_cache is None or now - self._account_cache_time > self.account_cache_ttl:
+                with self.get_session() as session:
+                    accounts = session.query(Account).order_by(Account.Account).all()
+                    self._account_cache = [self._account_to_dict(account) for account in accounts]
+                self._account_cache_index = {
+                    self._account_cache_key(account['Account']): account for account in self._account_cache
+                }
+                self._account_cache_time = now
+                logging.info(f"帳戶快取已載入: {len(self._account_cache)} 筆")
+            return self._account_cache, self._account_cache_index
+    
+    @staticmethod
+    def _account_cache_key(account_id: str) -> str:
+        """快取鍵 (對應 MySQL utf8mb4_unicode_ci: 不分大小寫、忽略 CHAR 尾端空白)"""
+        return (account_id or '').rstrip(' ').casefold()
+    
     def _account_to_dict(self, account: Account) -> Dict[str, Any]:
         """將 Account 物件轉換為字典"""
         return {
@@ -441,6 +1461,44 @@ class DatabaseManager:
             'IsAdmin': account.IsAdmin
         }
     
+    @staticmethod
+    def _encode_cursor(values: List[Any]) -> str:
+        """將分頁鍵值編碼為不透明的游標字串"""
+        return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> List[Any]:
+        """解碼游標字串，格式錯誤時拋出 ValueError"""
+        try:
+            return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except Exception:
+            raise ValueError(f"無效的分頁游標: {cursor}")
+    
+    def _ocrlog_select(self, columns: Optional[List[str]], start_date: Optional[datetime.datetime] = None,
+                       end_date: Optional[datetime.datetime] = None, account_id: Optional[str] = None,
+                       descending: bool = True):
+        """建立 ocrlog 的 Core select (依 Time, Id 排序)"""
+        table = Ocrlog.__table__
+        selected = [table.c[name] for name in columns] if columns else list(table.c)
+        stmt = select(*selected)
+        if start_date:
+            stmt = stmt.where(Ocrlog.Time >= start_date)
+        if end_date:
+            stmt = stmt.where(Ocrlog.Time <= end_date)
+        if account_id:
+            stmt = stmt.where(Ocrlog.Account_ == account_id)
+        if descending:
+            return stmt.order_by(Ocrlog.Time.desc(), Ocrlog.Id.desc())
+        return stmt.order_by(Ocrlog.Time, Ocrlog.Id)
+    
+    def _row_to_dict(self, row: Any) -> Dict[str, Any]:
+        """將 Core 查詢的資料列轉換為字典 (格式同 _ocrlog_to_dict)"""
+        data = dict(row._mapping)
+        time = data.get('Time')
+        if time:
+            data['Time'] = time.isoformat()
+        return data
+    
     def _ocrlog_to_dict(self, log: Ocrlog) -> Dict[str, Any]:
         """將 Ocrlog 物件轉換為字典"""
         return {
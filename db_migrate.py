@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+資料庫索引遷移工具
+建立 models 中新增的索引、移除已被取代的舊索引，並建立標籤代碼的全文搜尋索引。
+
+站台啟動時只檢查索引並記錄警告，不會建立索引 (既有資料量大時需要數分鐘，
+MySQL 建立期間 ocrlog 無法寫入)，請在停機或維護時段執行本工具。
+
+用法:
+    python db_migrate.py            # 只列出尚未完成的索引變更
+    python db_migrate.py --apply    # 執行索引變更
+"""
+
+import sys
+import os
+import time
+import logging
+import argparse
+
+# 添加當前目錄到 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config_manager import ConfigManager
+from database_manager import DatabaseManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="資料庫索引遷移工具")
+    parser.add_argument("--apply", action="store_true", help="執行尚未完成的索引變更")
+    parser.add_argument("--url", help="資料庫連線字串 (預設讀取 config.yaml)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    url = args.url
+    if not url:
+        mysql_config = ConfigManager().Config.MySql
+        url = f"mysql+pymysql://{mysql_config.User}:{mysql_config.Password}@{mysql_config.Host}:{mysql_config.Port}/{mysql_config.Database}?charset={mysql_config.Charset}"
+
+    db_manager = DatabaseManager(url)
+    try:
+        pending = db_manager.get_pending_migrations()
+        if not pending:
+            print("索引已是最新，不需要遷移")
+            return 0
+
+        print("尚未完成的索引變更:")
+        for item in pending:
+            print(f"    {item}")
+        if not args.apply:
+            print("\n加上 --apply 執行 (資料量大時需要數分鐘)")
+            return 1
+
+        start = time.perf_counter()
+        db_manager.migrate_schema()
+        remaining = db_manager.get_pending_migrations()
+        if remaining:
+            print(f"\n仍有 {len(remaining)} 項未完成: {'; '.join(remaining)}")
+            return 1
+        print(f"\n索引遷移完成 ({time.perf_counter() - start:.1f} 秒)，全文搜尋方式: {db_manager.search_backend}")
+        return 0
+    finally:
+        db_manager.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
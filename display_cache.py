@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+顯示用影像快取
+CCD 原始影像 (數 MB 的 BMP) 直接交給網頁顯示時，瀏覽器每次重繪都要縮放整張原圖。
+此模組在擷取時產生顯示用的縮小 JPEG，以及旋轉放大檢視用的放大版 (顯示尺寸的 2 倍，不超過原圖)，
+網頁只載入這兩個檔案，並以原圖尺寸計算座標，縮放參數 (scale / offset) 不需改變。
+解碼、縮放與編碼在背景線程執行 (prepare_async)，不佔用檢測流程的 GUI 線程。
+"""
+
+import os
+import glob
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage
+
+
+DISPLAY_SUFFIX = ".display.jpg"
+ZOOM_SUFFIX = ".zoom.jpg"
+
+
+class DisplayCache:
+    """顯示用影像快取 (只保留最近的影像)"""
+
+    def __init__(self, cache_dir: Optional[str] = None, display_max_side: int = 1600,
+                 quality: int = 90, keep: int = 20, max_size_mb: float = 0):
+        """
+        Args:
+            cache_dir: 快取目錄 (預設為系統暫存目錄下的 ocr_display)
+            display_max_side: 顯示用影像的最長邊像素
+            quality: JPEG 品質
+            keep: 保留的影像數量
+            max_size_mb: 快取檔案的總大小上限 (MB，0 表示只限制數量)
+        """
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "ocr_display")
+        self.display_max_side = display_max_side
+        self.quality = quality
+        self.keep = keep
+        self.max_size_mb = max_size_mb
+        # 顯示用影像、放大版與清理都在同一個背景線程依序執行 (顯示用影像依要求順序完成)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="display-cache")
+
+    def cached(self, image_path: str) -> Optional[Dict[str, Any]]:
+        """
+        取得已快取的顯示用影像 (只檢查檔案，不解碼)
+
+        Returns:
+            格式同 prepare，尚未產生時為 None
+        """
+        try:
+            display_path, zoom_path, size_path = self._paths(image_path)
+            if not (os.path.exists(display_path) and os.path.exists(size_path)):
+                return None
+            with open(size_path, "r", encoding="utf-8") as f:
+                width, height = (int(v) for v in f.read().split())
+            return {'display': display_path, 'zoom': zoom_path, 'width': width, 'height': height}
+        except (OSError, ValueError):
+            return None
+
+    def prepare_async(self, image_path: str, callback: Callable[[Optional[Dict[str, Any]]], None]):
+        """
+        在背景線程產生顯示用影像，完成後以 prepare 的結果呼叫 callback (於背景線程呼叫)
+
+        Args:
+            image_path: 原始影像路徑
+            callback: 完成時呼叫，參數同 prepare 的回傳值
+        """
+        def run():
+            display = self.prepare(image_path)
+            try:
+                callback(display)
+            except Exception as e:
+                logging.error(f"顯示用影像回呼失敗 {image_path}: {e}")
+        return self._executor.submit(run)
+
+    def prepare(self, image_path: str) -> Optional[Dict[str, Any]]:
+        """
+        產生 (或取得已快取的) 顯示用影像 (解碼整張原圖，GUI 線程請使用 prepare_async)
+
+        Args:
+            image_path: 原始影像路徑
+
+        Returns:
+            {'display': 顯示用影像路徑, 'zoom': 放大版路徑, 'width': 原圖寬, 'height': 原圖高}，
+            無法讀取影像時為 None
+        """
+        try:
+            display = self.cached(image_path)
+            if display:
+                return display
+            display_path, zoom_path, size_path = self._paths(image_path)
+
+            image = QImage(image_path)
+            if image.isNull():
+                logging.error(f"無法讀取影像: {image_path}")
+                return None
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._save(image, self.display_max_side, display_path)
+            with open(size_path, "w", encoding="utf-8") as f:
+                f.write(f"{image.width()} {image.height()}")
+            self._executor.submit(self._save, image, self.display_max_side * 2, zoom_path)
+            # 放大版寫入後再清理，總大小包含放大版
+            self._executor.submit(self._prune)
+            return {'display': display_path, 'zoom': zoom_path, 'width': image.width(), 'height': image.height()}
+        except Exception as e:
+            logging.error(f"產生顯示用影像失敗 {image_path}: {e}")
+            return None
+
+    def _paths(self, image_path: str) -> Tuple[str, str, str]:
+        """原始影像對應的 (顯示用影像, 放大版, 尺寸檔) 路徑 (以路徑、修改時間與大小識別)"""
+        stat = os.stat(image_path)
+        key = hashlib.sha1(f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}".encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + DISPLAY_SUFFIX, base + ZOOM_SUFFIX, base + ".size"
+
+    def _save(self, image: QImage, max_side: int, path: str):
+        """縮小到最長邊不超過 max_side 後以 JPEG 儲存 (先寫暫存檔再改名)"""
+        try:
+            if max(image.width(), image.height()) > max_side:
+                image = image.scaled(max_side, max_side, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            temp_path = path + ".tmp"
+            if not image.save(temp_path, "JPG", self.quality):
+                raise IOError("寫入失敗")
+            os.replace(temp_path, path)
+        except Exception as e:
+            logging.error(f"儲存顯示用影像失敗 {path}: {e}")
+
+    def _prune(self):
+        """只保留最近 keep 張影像的快取檔，且總大小不超過 max_size_mb (最新的一張一律保留)"""
+        entries = sorted(glob.glob(os.path.join(self.cache_dir, "*.size")), key=os.path.getmtime, reverse=True)
+        limit = self.max_size_mb * 1024 * 1024
+        total = 0
+        for index, size_path in enumerate(entries):
+            base = size_path[:-len(".size")]
+            paths = (size_path, base + DISPLAY_SUFFIX, base + ZOOM_SUFFIX)
+            total += sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+            if index < self.keep and (not limit or index == 0 or total <= limit):
+                continue
+            for path in paths:
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError:
+                    pass
@@ -13,11 +13,485 @@ from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QGridLayout, QPushButton, QLabel, 
                              QDateTimeEdit, QGroupBox, QRadioButton, QButtonGroup,
-                             QFileDialog, QMessageBox, QFrame)
-from PyQt5.QtCore import Qt, QDate, QTime, QDateTime
+                             QFileDialog, QMessageBox, QFrame, QProgressBar, QCheckBox)
+from PyQt5.QtCore import Qt, QDate, QTime, QDateTime, QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 from database_manager import DatabaseManager
 from models import Ocrlog
+from ocrlog_archive import OcrlogArchiver, create_archiver
+
+
+# 匯出欄位標題
+EXPORT_HEADERS = [
+    "日期", "時間", "第一次照合", "第二次照合", "電腦識別", 
+    "電腦判定結果", "人工判別", "Err 原因", "操作者1", "操作者2", 
+    "外觀判定", "NG原因", "磯原品", "重工件"
+]
+
+
+# Parquet 每個 row group 的筆數 (同時也是從資料庫分批讀取的筆數)
+PARQUET_ROW_GROUP_SIZE = 50000
+
+# 依月份分割時的子目錄名稱 (Hive 風格，pandas / pyarrow.dataset 讀取時會還原為 Month 欄位)
+PARQUET_PARTITION_FORMAT = "Month=%Y-%m"
+
+
+def build_parquet_schema():
+    """建立 ocrlog 的 Parquet 欄位型別 (pyarrow 為選用套件，呼叫時才匯入)"""
+    import pyarrow as pa
+    
+    # 重複度高的字串欄位以字典編碼儲存
+    dict_string = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("Id", pa.int64()),
+        ("Account", dict_string),
+        ("Time", pa.timestamp("us")),
+        ("Source", dict_string),
+        ("OCRResult", pa.string()),
+        ("OK", pa.bool_()),
+        ("Image", pa.string()),
+        ("Manual", pa.bool_()),
+        ("Judgment", pa.int32()),
+        ("KeyInResult", pa.string()),
+        ("Processor", dict_string),
+        ("IsExteriorOK", pa.bool_()),
+        ("ExteriorClass", pa.int32()),
+        ("ExteriorErrReason", pa.int32()),
+    ])
+
+
+class ExportCancelled(Exception):
+    """匯出已被使用者取消"""
+    pass
+
+
+class ExportWorker(QThread):
+    """匯出工作線程，在背景查詢資料庫並寫入檔案，避免凍結 UI"""
+    
+    # 信號定義
+    progress = pyqtSignal(int, int)  # 已寫入筆數, 預估總筆數 (COUNT)
+    completed = pyqtSignal(int)      # 匯出完成，寫入筆數 (0 表示區間內沒有資料)
+    cancelled = pyqtSignal()         # 匯出已取消
+    error = pyqtSignal(str)          # 匯出失敗
+    
+    # CSV / Excel 每批讀取與轉換的筆數 (每批回報一次進度)
+    CHUNK_SIZE = 1000
+    
+    def __init__(self, db_manager: DatabaseManager, file_path: str, start_time: datetime, end_time: datetime,
+                 file_format: str = "xlsx", separator: str = ",", partition_by_month: bool = False,
+                 archiver: OcrlogArchiver = None):
+        super().__init__()
+        self.db_manager = db_manager
+        # 已啟用 ocrlog 封存時，範圍內已封存的月份由封存檔讀取
+        self.archiver = archiver
+        self.file_path = file_path
+        self.start_time = start_time
+        self.end_time = end_time
+        self.file_format = file_format
+        self.separator = separator
+        self.partition_by_month = partition_by_month
+        self.rows_written = 0
+        # 本次寫入的 (暫存檔, 目標檔)，完成後才以暫存檔取代目標檔，取消或失敗時目標檔保持原狀
+        self.created_files = []
+        self._cancel_requested = False
+    
+    def cancel(self):
+        """要求取消匯出 (於下一筆資料時生效)"""
+        self._cancel_requested = True
+    
+    def run(self):
+        """執行匯出"""
+        try:
+            total = self.db_manager.count_ocr_logs_by_date_range(self.start_time, self.end_time)
+            total += self._estimate_archived_count()
+            if total == 0:
+                self.completed.emit(0)
+                return
+            
+            self.progress.emit(0, total)
+            
+            if self.file_format == "parquet":
+                batches = self._with_archived(
+                    self.db_manager.iter_ocr_log_batches(self.start_time, self.end_time, PARQUET_ROW_GROUP_SIZE),
+                    PARQUET_ROW_GROUP_SIZE, descending=False,
+                    convert=lambda rows: {key: list(values) for key, values in zip(OCRLOG_COLUMNS, zip(*rows))})
+                self.export_parquet(self.file_path, self._track_batch_progress(batches, total, lambda batch: len(batch["Id"])))
+            else:
+                chunks = self._with_archived(
+                    self.db_manager.iter_ocr_log_chunks(self.start_time, self.end_time, self.CHUNK_SIZE),
+                    self.CHUNK_SIZE, descending=True)
+                tracked_chunks = self._track_batch_progress(chunks, total, len)
+                
+                if self.file_format == "xlsx":
+                    self.export_excel(self.file_path, tracked_chunks)
+                else:
+                    self.export_csv(self.file_path, tracked_chunks)
+            
+            self._commit_files()
+            self.progress.emit(self.rows_written, max(total, self.rows_written))
+            self.completed.emit(self.rows_written)
+            
+        except ExportCancelled:
+            self._remove_partial_file()
+            self.cancelled.emit()
+        except Exception as e:
+            self._remove_partial_file()
+            self.error.emit(str(e))
+    
+    def _estimate_archived_count(self) -> int:
+        """
+        估計範圍內已封存的筆數 (供進度顯示)
+        
+        每日統計表保留已封存月份的統計，與只計算資料表部分的差即為封存筆數 (以整日計算)
+        """
+        if self.archiver is None:
+            return 0
+        start_day, end_day = self.start_time.date(), self.end_time.date()
+        return max(0, self.db_manager.count_ocr_logs(start_day, end_day)
+                   - self.db_manager.count_ocr_logs(start_day, end_day, live_only=True))
+    
+    def _with_archived(self, live, chunk_size: int, descending: bool, convert=None):
+        """
+        合併資料表與封存檔的批次 (封存的月份都早於資料表中的記錄)
+        
+        Args:
+            live: 資料表的批次串流
+            chunk_size: 封存檔每批筆數
+            descending: 是否依 Time 遞減排序
+            convert: 封存檔原始列批次的轉換 (與 live 的批次格式一致)
+        """
+        if self.archiver is None:
+            return live
+        archived = self.archiver.iter_archived_chunks(self.start_time, self.end_time, chunk_size, descending)
+        if convert:
+            archived = (convert(rows) for rows in archived)
+        
+        def chained():
+            try:
+                for part in ((live, archived) if descending else (archived, live)):
+                    yield from part
+            finally:
+                # 提早結束時釋放伺服器端游標
+                live.close()
+                archived.close()
+        return chained()
+    
+    def _track_batch_progress(self, batches, total: int, batch_len):
+        """逐批傳遞資料，同時回報進度並檢查是否取消"""
+        try:
+            for batch in batches:
+                if self._cancel_requested:
+                    raise ExportCancelled()
+                yield batch
+                self.rows_written += batch_len(batch)
+                self.progress.emit(self.rows_written, max(total, self.rows_written))
+        finally:
+            # 提早結束時釋放伺服器端游標
+            batches.close()
+    
+    def _temp_path(self, path: str) -> str:
+        """取得寫入 path 用的暫存檔 (與目標同目錄，os.replace 不需跨磁碟複製)"""
+        temp_path = path + ".tmp"
+        if (temp_path, path) not in self.created_files:
+            self.created_files.append((temp_path, path))
+        return temp_path
+    
+    def _commit_files(self):
+        """匯出完成後以暫存檔取代目標檔"""
+        while self.created_files:
+            temp_path, path = self.created_files[0]
+            os.replace(temp_path, path)
+            self.created_files.pop(0)
+    
+    def _remove_partial_file(self):
+        """刪除取消或失敗時留下的暫存檔 (只刪除本次建立的檔案)"""
+        try:
+            for path, _ in self.created_files:
+                if os.path.isfile(path):
+                    os.remove(path)
+                    # 依月份分割時一併移除空的月份目錄
+                    parent = os.path.dirname(path)
+                    if self.partition_by_month and os.path.isdir(parent) and not os.listdir(parent):
+                        os.rmdir(parent)
+        except OSError as e:
+            print(f"刪除未完成的匯出檔案失敗: {e}")
+    
+    def export_csv(self, file_path, chunks):
+        """匯出 CSV 檔案 (chunks 為原始資料列的批次串流，逐批轉換寫入)"""
+        try:
+            separator = self.separator
+            
+            with open(self._temp_path(file_path), 'w', newline='', encoding='utf-8') as csvfile:
+                # 寫入標題行
+                csvfile.write(separator.join(EXPORT_HEADERS) + "\n")
+                
+                # 寫入資料行
+                for chunk in chunks:
+                    csvfile.writelines(separator.join(row_data) + "\n" for row_data in transform_log_rows(chunk))
+                    
+        except ExportCancelled:
+            raise
+        except Exception as e:
+            raise Exception(f"CSV 匯出失敗: {str(e)}")
+            
+    def export_excel(self, file_path, chunks):
+        """匯出 Excel 檔案 (write_only 模式逐列寫入，記憶體用量與筆數無關)"""
+        try:
+            # openpyxl 是否安裝已由 ExportWindow 在啟動匯出前檢查
+            from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Font, PatternFill, Alignment
+            from openpyxl.utils import get_column_letter
+                
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("export")
+            
+            headers = EXPORT_HEADERS
+            
+            # 預先建立樣式，所有儲存格共用
+            header_font = Font(color="FFFFFF", bold=True)
+            header_fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
+            header_alignment = Alignment(horizontal="center")
+            red_font = Font(color="FF0000")
+            
+            # write_only 模式下欄寬需在寫入資料前設定
+            for col in range(1, len(headers) + 1):
+                ws.column_dimensions[get_column_letter(col)].width = 20
+            
+            # 寫入標題並設定樣式
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=header)
+                cell.font = header_font
+                cell.fill = header_fill
+                cell.alignment = header_alignment
+                header_cells.append(cell)
+            ws.append(header_cells)
+            
+            def red_cell(value):
+                cell = WriteOnlyCell(ws, value=value)
+                cell.font = red_font
+                return cell
+            
+            # 寫入資料
+            for chunk in chunks:
+                for row, row_data in zip(chunk, transform_log_rows(chunk)):
+                    # 設定錯誤資料的顏色
+                    if row[COL_SOURCE] != row[COL_OCR_RESULT]:
+                        for col_idx in (3, 4):  # 第二次照合、電腦識別
+                            row_data[col_idx] = red_cell(row_data[col_idx])
+                    
+                    if (row[COL_JUDGMENT] or 0) != 0:
+                        for col_idx in (5, 6, 7):  # 電腦判定結果、人工判別、Err 原因
+                            row_data[col_idx] = red_cell(row_data[col_idx])
+                    
+                    ws.append(row_data)
+            
+            wb.save(self._temp_path(file_path))
+            
+        except ExportCancelled:
+            raise
+        except Exception as e:
+            raise Exception(f"Excel 匯出失敗: {str(e)}")
+
+    def export_parquet(self, file_path, batches):
+        """
+        匯出 Parquet 檔案 (每批資料寫成一個 row group)
+        
+        依月份分割時 file_path 視為輸出目錄，每個月份寫入
+        <file_path>/Month=YYYY-MM/part-0.parquet，可直接以 pandas.read_parquet(目錄) 讀回
+        """
+        writer = None
+        try:
+            # pyarrow 是否安裝已由 ExportWindow 在啟動匯出前檢查
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            
+            schema = build_parquet_schema()
+            current_path = None
+            
+            for batch in batches:
+                times = batch["Time"]
+                # 依月份切開批次 (資料依 Time 遞增排序，同一月份的資料必定相鄰)
+                start = 0
+                while start < len(times):
+                    if self.partition_by_month:
+                        month = times[start].strftime(PARQUET_PARTITION_FORMAT)
+                        end = start + 1
+                        while end < len(times) and times[end].strftime(PARQUET_PARTITION_FORMAT) == month:
+                            end += 1
+                        target_path = os.path.join(file_path, month, "part-0.parquet")
+                    else:
+                        end = len(times)
+                        target_path = file_path
+                    
+                    if target_path != current_path:
+                        if writer is not None:
+                            writer.close()
+                        os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+                        writer = pq.ParquetWriter(self._temp_path(target_path), schema, compression="snappy")
+                        current_path = target_path
+                    
+                    arrays = []
+                    for field in schema:
+                        values = batch[field.name][start:end]
+                        if pa.types.is_dictionary(field.type):
+                            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+                        elif pa.types.is_boolean(field.type):
+                            # TINYINT(1) 欄位轉為布林值
+                            arrays.append(pa.array([None if v is None else bool(v) for v in values], type=field.type))
+                        else:
+                            arrays.append(pa.array(values, type=field.type))
+                    writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                    start = end
+            
+            if writer is not None:
+                writer.close()
+                writer = None
+            
+        except ExportCancelled:
+            raise
+        except Exception as e:
+            raise Exception(f"Parquet 匯出失敗: {str(e)}")
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+# ocrlog 原始資料列 (DatabaseManager.iter_ocr_log_chunks) 的欄位位置
+OCRLOG_COLUMNS = [column.name for column in Ocrlog.__table__.c]
+COL_ACCOUNT = OCRLOG_COLUMNS.index("Account")
+COL_TIME = OCRLOG_COLUMNS.index("Time")
+COL_SOURCE = OCRLOG_COLUMNS.index("Source")
+COL_OCR_RESULT = OCRLOG_COLUMNS.index("OCRResult")
+COL_JUDGMENT = OCRLOG_COLUMNS.index("Judgment")
+COL_PROCESSOR = OCRLOG_COLUMNS.index("Processor")
+COL_IS_EXTERIOR_OK = OCRLOG_COLUMNS.index("IsExteriorOK")
+COL_EXTERIOR_CLASS = OCRLOG_COLUMNS.index("ExteriorClass")
+COL_EXTERIOR_ERR_REASON = OCRLOG_COLUMNS.index("ExteriorErrReason")
+
+# Judgment -> (電腦判定結果, 人工判別, Err 原因)，未列出的代碼視為 OK
+JUDGMENT_TEXTS = {
+    1: ("NG", "退回", ""),
+    2: ("ERR", "允收", "無法辨識"),
+    3: ("ERR", "允收", "辨識錯誤"),
+    4: ("ERR", "允收", "摺痕"),
+}
+JUDGMENT_OK_TEXTS = ("OK", "", "")
+
+# ExteriorErrReason -> NG 原因
+EXTERIOR_ERR_REASONS = ("", "氧化", "漏氣", "異物", "孔洞異常")
+
+# ExteriorClass 低兩位元 -> (磯原品, 重工件)
+EXTERIOR_CLASS_FLAGS = (("", ""), ("V", ""), ("", "V"), ("V", "V"))
+
+
+def transform_log_rows(rows):
+    """
+    批次將 ocrlog 原始資料列轉換為匯出格式
+    
+    rows 為 DatabaseManager.iter_ocr_log_chunks 取回的資料列 (欄位順序同 OCRLOG_COLUMNS)，
+    判定與原因代碼以查表取得，操作者拆解結果在同一批次內快取。
+    
+    Returns:
+        每列對應 EXPORT_HEADERS 的字串列表
+    """
+    judgment_texts = JUDGMENT_TEXTS
+    err_reasons = EXTERIOR_ERR_REASONS
+    class_flags = EXTERIOR_CLASS_FLAGS
+    operators_cache = {}
+    result = []
+    append = result.append
+    
+    for row in rows:
+        str_result, str_err, str_err_select = judgment_texts.get(row[COL_JUDGMENT], JUDGMENT_OK_TEXTS)
+        
+        # 外觀判定與 NG 原因
+        is_exterior_ok = row[COL_IS_EXTERIOR_OK]
+        if is_exterior_ok is None:
+            exterior_result = ""
+        else:
+            exterior_result = "OK" if is_exterior_ok else "NG"
+        ng_reason = "" if is_exterior_ok else err_reasons[row[COL_EXTERIOR_ERR_REASON] or 0]
+        
+        # 類別判定
+        is_iso, is_heavy = class_flags[(row[COL_EXTERIOR_CLASS] or 0) & 0x03]
+        
+        # 操作者處理 (同一批次中組合重複率高，快取拆解結果)
+        processor_str = row[COL_PROCESSOR] or ""
+        account = row[COL_ACCOUNT] or ""
+        key = (processor_str, account)
+        operators = operators_cache.get(key)
+        if operators is None:
+            operators = _split_operators(processor_str, account)
+            operators_cache[key] = operators
+        
+        # 處理時間格式
+        time_obj = row[COL_TIME]
+        if time_obj:
+            date_str = f"{time_obj.year:04d}/{time_obj.month:02d}/{time_obj.day:02d}"
+            time_only = f"{time_obj.hour:02d}:{time_obj.minute:02d}:{time_obj.second:02d}"
+        else:
+            date_str = ""
+            time_only = ""
+        
+        source = row[COL_SOURCE]
+        append([
+            date_str,                   # 日期
+            time_only,                  # 時間
+            source,                     # 第一次照合
+            source,                     # 第二次照合
+            row[COL_OCR_RESULT],        # 電腦識別
+            str_result,                 # 電腦判定結果
+            str_err,                    # 人工判別
+            str_err_select,             # Err 原因
+            operators[0],               # 操作者1
+            operators[1],               # 操作者2
+            exterior_result,            # 外觀判定
+            ng_reason,                  # NG原因
+            is_iso,                     # 磯原品
+            is_heavy                    # 重工件
+        ])
+    
+    return result
+
+
+def _split_operators(processor_str, account):
+    """由 Processor 字串拆出 (操作者1, 操作者2)，操作者1 為當前帳號"""
+    operator1 = ""
+    operator2 = ""
+    
+    if processor_str:
+        processors = [p.strip() for p in processor_str.split(',') if p.strip()]
+        
+        # 找到當前帳號
+        if account and account in processors:
+            operator1 = account
+            processors.remove(account)
+        
+        # 設定第二個操作者
+        if processors:
+            operator2 = processors[0]
+    
+    return operator1, operator2
+
+
+def process_log_data(log):
+    """處理單筆日誌資料 (字典格式)，轉換為匯出格式"""
+    time_value = log.get('Time', '')
+    if isinstance(time_value, str) and time_value:
+        try:
+            time_value = datetime.fromisoformat(time_value.replace('Z', '+00:00'))
+        except ValueError:
+            time_value = None
+    
+    row = [None] * len(OCRLOG_COLUMNS)
+    for index, name in enumerate(OCRLOG_COLUMNS):
+        row[index] = log.get(name)
+    row[COL_TIME] = time_value
+    row[COL_SOURCE] = log.get('Source', '')
+    row[COL_OCR_RESULT] = log.get('OCRResult', '')
+    return transform_log_rows([row])[0]
 
 
 class ExportWindow(QMainWindow):
@@ -35,12 +509,16 @@ class ExportWindow(QMainWindow):
             print(f"資料庫初始化失敗: {e}")
             self.db_manager = None
         
+        # 背景匯出工作線程
+        self.export_worker = None
+        self.empty_message = ""
+        
         self.init_ui()
         
     def init_ui(self):
         """初始化使用者介面"""
         self.setWindowTitle("匯出")
-        self.setFixedSize(565, 396)
+        self.setFixedSize(565, 500)
         
         # 中央 widget
         central_widget = QWidget()
@@ -60,6 +538,9 @@ class ExportWindow(QMainWindow):
         # 日期選擇區域
         self.create_date_selection_area(main_layout)
         
+        # 匯出進度區域
+        self.create_progress_area(main_layout)
+        
     def create_export_options_group(self, parent_layout):
         """創建匯出選項群組"""
         group_box = QGroupBox("匯出選項")
@@ -76,12 +557,21 @@ class ExportWindow(QMainWindow):
         self.rd_xlsx = QRadioButton("XLSX")
         self.rd_xlsx.setChecked(True)
         self.rd_csv = QRadioButton("CSV")
+        self.rd_parquet = QRadioButton("Parquet")
         
         self.format_button_group.addButton(self.rd_xlsx, 0)
         self.format_button_group.addButton(self.rd_csv, 1)
+        self.format_button_group.addButton(self.rd_parquet, 2)
         
         format_layout.addWidget(self.rd_xlsx)
         format_layout.addWidget(self.rd_csv)
+        format_layout.addWidget(self.rd_parquet)
+        
+        # Parquet 依月份分割輸出 (輸出為目錄)
+        self.chk_partition_month = QCheckBox("依月份分割")
+        self.chk_partition_month.setEnabled(False)
+        self.rd_parquet.toggled.connect(self.chk_partition_month.setEnabled)
+        format_layout.addWidget(self.chk_partition_month)
         
         # 分隔字元群組
         separator_group = QGroupBox("分隔字元")
@@ -158,12 +648,36 @@ class ExportWindow(QMainWindow):
         
         parent_layout.addLayout(date_layout)
         
+    def create_progress_area(self, parent_layout):
+        """創建匯出進度區域"""
+        progress_layout = QHBoxLayout()
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        
+        self.lbl_progress = QLabel("")
+        self.lbl_progress.setFont(QFont("新細明體", 10))
+        self.lbl_progress.setFixedWidth(150)
+        
+        # 取消匯出按鈕
+        self.btn_cancel = QPushButton("取消")
+        self.btn_cancel.setFont(QFont("新細明體", 12))
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_export)
+        
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.lbl_progress)
+        progress_layout.addWidget(self.btn_cancel)
+        
+        parent_layout.addLayout(progress_layout)
+        
     def export_today(self):
         """匯出今天報表"""
         try:
             # 設定檔案名稱
             today = datetime.now().strftime("%Y-%m-%d")
-            file_extension = ".xlsx" if self.rd_xlsx.isChecked() else ".csv"
+            file_extension = "." + self.get_file_format()
             default_filename = f"{today}{file_extension}"
             
             # 選擇檔案
@@ -185,19 +699,7 @@ class ExportWindow(QMainWindow):
                 QMessageBox.warning(self, "警告", "資料庫未初始化，無法匯出資料")
                 return
                 
-            logs = self.db_manager.get_ocr_logs_by_date_range(today_start, today_end)
-            
-            if not logs:
-                QMessageBox.information(self, "提示", "今天尚未有資料可供輸出")
-                return
-                
-            # 匯出檔案
-            if self.rd_xlsx.isChecked():
-                self.export_excel(file_path, logs)
-            else:
-                self.export_csv(file_path, logs)
-                
-            QMessageBox.information(self, "完成", "輸出完成!!")
+            self.start_export(file_path, today_start, today_end, "今天尚未有資料可供輸出")
             
         except Exception as e:
             QMessageBox.critical(self, "錯誤", f"發生錯誤: {str(e)}")
@@ -208,7 +710,7 @@ class ExportWindow(QMainWindow):
             # 設定檔案名稱
             from_date = self.date_from.date().toPyDate()
             to_date = self.date_to.date().toPyDate()
-            file_extension = ".xlsx" if self.rd_xlsx.isChecked() else ".csv"
+            file_extension = "." + self.get_file_format()
             default_filename = f"{from_date.strftime('%Y%m%d')}-{to_date.strftime('%y%m%d')}{file_extension}"
             
             # 選擇檔案
@@ -230,57 +732,47 @@ class ExportWindow(QMainWindow):
                 QMessageBox.warning(self, "警告", "資料庫未初始化，無法匯出資料")
                 return
                 
-            logs = self.db_manager.get_ocr_logs_by_date_range(start_time, end_time)
-            
-            if not logs:
-                QMessageBox.information(self, "提示", "您所選擇的區間尚未有資料可供輸出")
-                return
-                
-            # 匯出檔案
-            if self.rd_xlsx.isChecked():
-                self.export_excel(file_path, logs)
-            else:
-                self.export_csv(file_path, logs)
-                
-            QMessageBox.information(self, "完成", "輸出完成!!")
+            self.start_export(file_path, start_time, end_time, "您所選擇的區間尚未有資料可供輸出")
             
         except Exception as e:
             QMessageBox.critical(self, "錯誤", f"發生錯誤: {str(e)}")
             
-    def export_csv(self, file_path, logs):
-        """匯出 CSV 檔案"""
-        try:
-            # 設定分隔字元
-            separator = "," if self.rd_comma.isChecked() else "\t"
-            
-            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                # 寫入標題行
-                headers = [
-                    "日期", "時間", "第一次照合", "第二次照合", "電腦識別", 
-                    "電腦判定結果", "人工判別", "Err 原因", "操作者1", "操作者2", 
-                    "外觀判定", "NG原因", "磯原品", "重工件"
-                ]
-                
-                if self.rd_tab.isChecked():
-                    csvfile.write("\t".join(headers) + "\n")
-                else:
-                    csvfile.write(",".join(headers) + "\n")
-                
-                # 寫入資料行
-                for log in logs:
-                    row_data = self.process_log_data(log)
-                    csvfile.write(separator.join(row_data) + "\n")
-                    
-        except Exception as e:
-            raise Exception(f"CSV 匯出失敗: {str(e)}")
+    def get_file_format(self):
+        """取得目前選擇的匯出格式 (同時作為副檔名)"""
+        if self.rd_xlsx.isChecked():
+            return "xlsx"
+        if self.rd_parquet.isChecked():
+            return "parquet"
+        return "csv"
+        
+    def start_export(self, file_path, start_time, end_time, empty_message):
+        """在背景線程開始匯出"""
+        if self.export_worker is not None and self.export_worker.isRunning():
+            QMessageBox.information(self, "提示", "匯出進行中，請稍候")
+            return
+        
+        file_format = self.get_file_format()
+        partition_by_month = False
+        if file_format == "parquet":
+            # 嘗試匯入 pyarrow
+            try:
+                import pyarrow
+            except ImportError:
+                QMessageBox.warning(
+                    self, 
+                    "警告", 
+                    "未安裝 pyarrow 套件，無法匯出 Parquet 檔案。\n請執行: pip install pyarrow"
+                )
+                return
             
-    def export_excel(self, file_path, logs):
-        """匯出 Excel 檔案"""
-        try:
+            # 依月份分割時以檔名 (去除副檔名) 作為輸出目錄
+            partition_by_month = self.chk_partition_month.isChecked()
+            if partition_by_month:
+                file_path = os.path.splitext(file_path)[0]
+        elif file_format == "xlsx":
             # 嘗試匯入 openpyxl
             try:
-                from openpyxl import Workbook
-                from openpyxl.styles import Font, PatternFill, Alignment
+                import openpyxl
             except ImportError:
                 QMessageBox.warning(
                     self, 
@@ -288,151 +780,78 @@ class ExportWindow(QMainWindow):
                     "未安裝 openpyxl 套件，無法匯出 Excel 檔案。\n請執行: pip install openpyxl"
                 )
                 return
-                
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "export"
-            
-            # 設定標題行
-            headers = [
-                "日期", "時間", "第一次照合", "第二次照合", "電腦識別", 
-                "電腦判定結果", "人工判別", "Err 原因", "操作者1", "操作者2", 
-                "外觀判定", "NG原因", "磯原品", "重工件"
-            ]
-            
-            # 寫入標題並設定樣式
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = Font(color="FFFFFF", bold=True)
-                cell.fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
-                cell.alignment = Alignment(horizontal="center")
-                ws.column_dimensions[ws.cell(row=1, column=col).column_letter].width = 20
-            
-            # 寫入資料
-            for row_idx, log in enumerate(logs, 2):
-                row_data = self.process_log_data(log)
-                
-                for col_idx, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                    
-                    # 設定日期和時間格式
-                    if col_idx == 1:  # 日期
-                        cell.number_format = "yyyy/mm/dd"
-                    elif col_idx == 2:  # 時間
-                        cell.number_format = "hh:mm:ss"
-                    
-                    # 設定錯誤資料的顏色
-                    if log.get('source') != log.get('ocr_result'):
-                        if col_idx in [4, 5]:  # 第二次照合、電腦識別
-                            cell.font = Font(color="FF0000")
-                    
-                    if log.get('judgment', 0) != 0:
-                        if col_idx in [6, 7, 8]:  # 電腦判定結果、人工判別、Err 原因
-                            cell.font = Font(color="FF0000")
-            
-            wb.save(file_path)
-            
-        except Exception as e:
-            raise Exception(f"Excel 匯出失敗: {str(e)}")
-            
-    def process_log_data(self, log):
-        """處理日誌資料，轉換為匯出格式"""
-        # 判斷錯誤類型和結果
-        str_err = ""
-        str_err_select = ""
-        str_result = "OK"
-        
-        judgment = log.get('Judgment', 0)
-        if judgment == 1:
-            str_err = "退回"
-            str_result = "NG"
-        elif judgment == 2:
-            str_err = "允收"
-            str_err_select = "無法辨識"
-            str_result = "ERR"
-        elif judgment == 3:
-            str_err = "允收"
-            str_err_select = "辨識錯誤"
-            str_result = "ERR"
-        elif judgment == 4:
-            str_err = "允收"
-            str_err_select = "摺痕"
-            str_result = "ERR"
-        
-        # 外觀判定
-        is_exterior_ok = log.get('IsExteriorOK')
-        exterior_result = ""
-        if is_exterior_ok is not None:
-            exterior_result = "OK" if is_exterior_ok else "NG"
-        
-        # NG 原因
-        str_reasons = ["", "氧化", "漏氣", "異物", "孔洞異常"]
-        err_reason = log.get('ExteriorErrReason', 0) or 0
-        ng_reason = "" if is_exterior_ok else str_reasons[err_reason]
         
-        # 類別判定
-        exterior_class = log.get('ExteriorClass', 0) or 0
-        is_iso = "V" if (exterior_class & 0x01) == 0x01 else ""
-        is_heavy = "V" if (exterior_class & 0x02) == 0x02 else ""
-        
-        # 操作者處理
-        processor_str = log.get('Processor', '') or ""
-        account = log.get('Account', '') or ""
-        
-        operator1 = ""
-        operator2 = ""
-        
-        if processor_str:
-            processors = [p.strip() for p in processor_str.split(',') if p.strip()]
-            
-            # 找到當前帳號
-            if account and account in processors:
-                operator1 = account
-                processors.remove(account)
-            
-            # 設定第二個操作者
-            if processors:
-                operator2 = processors[0]
-        
-        # 處理時間格式
-        time_str = log.get('Time', '')
-        if time_str:
-            try:
-                # 如果是字串格式，先解析
-                if isinstance(time_str, str):
-                    from datetime import datetime
-                    time_obj = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-                else:
-                    time_obj = time_str
-                
-                date_str = time_obj.strftime('%Y/%m/%d')
-                time_only = time_obj.strftime('%H:%M:%S')
-            except:
-                date_str = ""
-                time_only = ""
+        separator = "," if self.rd_comma.isChecked() else "\t"
+        self.empty_message = empty_message
+        
+        self.export_worker = ExportWorker(self.db_manager, file_path, start_time, end_time, file_format, separator,
+                                          partition_by_month, create_archiver(self.db_manager))
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.completed.connect(self.on_export_completed)
+        self.export_worker.cancelled.connect(self.on_export_cancelled)
+        self.export_worker.error.connect(self.on_export_error)
+        
+        self.set_exporting(True)
+        self.export_worker.start()
+        
+    def cancel_export(self, wait=False):
+        """取消進行中的匯出"""
+        if self.export_worker is not None and self.export_worker.isRunning():
+            self.lbl_progress.setText("取消中...")
+            self.export_worker.cancel()
+            if wait:
+                self.export_worker.wait()
+        
+    def set_exporting(self, exporting):
+        """切換匯出中/閒置的按鈕狀態"""
+        self.btn_export_today.setEnabled(not exporting)
+        self.btn_export_range.setEnabled(not exporting)
+        self.btn_cancel.setEnabled(exporting)
+        if exporting:
+            self.progress_bar.setRange(0, 0)  # 取得筆數前顯示忙碌狀態
+            self.lbl_progress.setText("查詢中...")
+        
+    def on_export_progress(self, written, total):
+        """更新匯出進度"""
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(written)
+        self.lbl_progress.setText(f"{written} / {total} 筆")
+        
+    def on_export_completed(self, count):
+        """匯出完成"""
+        self.set_exporting(False)
+        self.progress_bar.setRange(0, 100)
+        if count == 0:
+            self.progress_bar.setValue(0)
+            self.lbl_progress.setText("")
+            QMessageBox.information(self, "提示", self.empty_message)
         else:
-            date_str = ""
-            time_only = ""
+            self.progress_bar.setValue(100)
+            QMessageBox.information(self, "完成", "輸出完成!!")
         
-        # 組裝資料陣列
-        row_data = [
-            date_str,                   # 日期
-            time_only,                  # 時間
-            log.get('Source', ''),      # 第一次照合
-            log.get('Source', ''),      # 第二次照合
-            log.get('OCRResult', ''),   # 電腦識別
-            str_result,                 # 電腦判定結果
-            str_err,                    # 人工判別
-            str_err_select,             # Err 原因
-            operator1,                  # 操作者1
-            operator2,                  # 操作者2
-            exterior_result,            # 外觀判定
-            ng_reason,                  # NG原因
-            is_iso,                     # 磯原品
-            is_heavy                    # 重工件
-        ]
+    def on_export_cancelled(self):
+        """匯出已取消"""
+        self.set_exporting(False)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.lbl_progress.setText("已取消")
+        
+    def on_export_error(self, message):
+        """匯出失敗"""
+        self.set_exporting(False)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.lbl_progress.setText("")
+        QMessageBox.critical(self, "錯誤", f"發生錯誤: {message}")
+        
+    def closeEvent(self, event):
+        """關閉視窗事件，等待背景匯出結束"""
+        self.cancel_export(wait=True)
+        event.accept()
         
-        return row_data
+    def process_log_data(self, log):
+        """處理日誌資料，轉換為匯出格式"""
+        return process_log_data(log)
 
 
 def main():
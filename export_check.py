@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+匯出資料轉換檢查工具
+以 golden 檔比對 export.transform_log_rows 的輸出，逐列完全相同才以 0 結束。
+
+golden 檔 (export_golden.jsonl.gz) 每行為 {"log": ocrlog 記錄, "expected": 匯出列}，
+expected 由改寫為批次轉換前的 process_log_data 產生，涵蓋 Judgment、IsExteriorOK、
+ExteriorErrReason、ExteriorClass、Processor 與 Account 的所有組合 (含 NULL 與未定義代碼)。
+
+用法:
+    python export_check.py
+    python export_check.py --chunk-size 1000     # 每批轉換筆數 (操作者快取以批次為單位)
+"""
+
+import sys
+import os
+import gzip
+import json
+import argparse
+import datetime
+
+# 添加當前目錄到 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from export import OCRLOG_COLUMNS, EXPORT_HEADERS, transform_log_rows
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "export_golden.jsonl.gz")
+
+
+def load_golden(path: str = GOLDEN_FILE):
+    """讀取 golden 檔，回傳 (原始資料列列表, 預期輸出列表)，資料列格式同 DatabaseManager.iter_ocr_log_chunks"""
+    rows, expected = [], []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            log = entry['log']
+            if log.get('Time'):
+                log['Time'] = datetime.datetime.fromisoformat(log['Time'])
+            rows.append(tuple(log.get(column) for column in OCRLOG_COLUMNS))
+            expected.append(entry['expected'])
+    return rows, expected
+
+
+def check(chunk_size: int = 1000, path: str = GOLDEN_FILE, max_report: int = 10) -> int:
+    """
+    比對 transform_log_rows 與 golden 檔
+
+    Returns:
+        不相同的列數
+    """
+    rows, expected = load_golden(path)
+    actual = []
+    for start in range(0, len(rows), chunk_size):
+        actual.extend(transform_log_rows(rows[start:start + chunk_size]))
+
+    mismatches = 0
+    if len(actual) != len(expected):
+        print(f"FAIL 列數不同: {len(actual)} != {len(expected)}")
+        mismatches += abs(len(actual) - len(expected))
+    for index, (row, want, got) in enumerate(zip(rows, expected, actual)):
+        if list(got) == want:
+            continue
+        mismatches += 1
+        if mismatches <= max_report:
+            print(f"FAIL 第 {index + 1} 列 (Id={row[OCRLOG_COLUMNS.index('Id')]})")
+            for header, w, g in zip(EXPORT_HEADERS, want, got):
+                if w != g:
+                    print(f"    {header}: 預期 {w!r}，實際 {g!r}")
+
+    print(f"{'OK' if mismatches == 0 else 'FAIL'} {len(expected) - mismatches}/{len(expected)} 列相同")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="匯出資料轉換檢查工具")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="每批轉換筆數 (預設 1000，同匯出)")
+    parser.add_argument("--golden", default=GOLDEN_FILE, help="golden 檔路徑")
+    args = parser.parse_args()
+
+    return 1 if check(max(1, args.chunk_size), args.golden) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,6 +16,21 @@ let offsetY = 0;
 let angle = 0;
 let rate = 1.0;
 
+// 顯示用影像：currentImage 為顯示用的縮小影像 (ImageBitmap)，
+// imageWidth / imageHeight 為原圖尺寸，所有座標與縮放參數都以原圖尺寸計算
+let imageWidth = 0;
+let imageHeight = 0;
+let zoomImage = null;     // 旋轉放大檢視用的高解析度影像 (需要時才載入)
+let zoomImageUrl = null;
+let imageLoadId = 0;      // 避免較早的載入結果覆蓋較新的影像
+
+// Normal / Drawing 狀態的底圖快取 (畫線時只需重畫線條)
+let baseLayer = null;
+let baseLayerKey = "";
+
+// 以 requestAnimationFrame 合併重繪 (每個畫面最多重繪一次)
+let drawPending = false;
+
 /**
  * 初始化 Canvas
  */
@@ -76,16 +91,47 @@ function resizeCanvasToFill() {
 
   // 重新繪製
   if (currentImage) {
-    drawImage();
+    requestDraw();
+  }
+}
+
+/**
+ * 將載入的圖片解碼為 ImageBitmap (只解碼一次，之後重繪不需再解碼)
+ * @param {HTMLImageElement} img - 已載入的圖片
+ * @returns {Promise<ImageBitmap|HTMLImageElement>}
+ */
+function decodeImage(img) {
+  if (typeof createImageBitmap === "function") {
+    return createImageBitmap(img).catch(function () {
+      return img;
+    });
   }
+  return Promise.resolve(img);
+}
+
+/**
+ * 載入圖片並解碼
+ * @param {string} url - 圖片路徑
+ * @returns {Promise<ImageBitmap|HTMLImageElement>}
+ */
+function loadImage(url) {
+  return new Promise(function (resolve, reject) {
+    const img = new Image();
+    img.onload = function () {
+      decodeImage(img).then(resolve);
+    };
+    img.onerror = reject;
+    img.src = url;
+  });
 }
 
 /**
  * 顯示圖片
- * @param {string} imagePath - 圖片路徑
+ * @param {string} imagePath - 圖片路徑 (顯示用的縮小影像或原圖)
  * @param {Object} scaleParams - 縮放參數 {scale, offsetX, offsetY}
+ * @param {Object} imageInfo - 原圖資訊 {width, height, zoomUrl}，imagePath 為縮小影像時需提供
  */
-function showImage(imagePath, scaleParams = null) {
+function showImage(imagePath, scaleParams = null, imageInfo = null) {
   if (!imagePath) {
     alert("圖片路徑不存在");
     showNoImage();
@@ -105,38 +151,114 @@ function showImage(imagePath, scaleParams = null) {
     console.log("應用縮放參數:", {scale, offsetX, offsetY});
   }
   
-  const img = new Image();
-  img.onload = function () {
-    currentImage = img;
-    // OCR 完成後，圖片載入時直接進入 StartScale 狀態
-    workStatus = "startScale";
-    canvas.style.display = "block";
-    document.getElementById("imagePlaceholder").style.display = "none";
-
-    // 重新調整 Canvas 尺寸
-    resizeCanvasToFill();
-    drawImage();
-    
-    console.log("圖片載入完成，進入 StartScale 狀態，縮放參數:", {scale, offsetX, offsetY});
-  };
-  img.onerror = function () {
-    console.error("圖片載入失敗:", fixedPath);
-    console.error("原始路徑:", imagePath);
-    showNoImage();
-  };
-  img.src = fixedPath;
+  const loadId = ++imageLoadId;
+  loadImage(fixedPath).then(
+    function (bitmap) {
+      if (loadId !== imageLoadId) return;
+
+      currentImage = bitmap;
+      imageWidth = (imageInfo && imageInfo.width) || bitmap.width;
+      imageHeight = (imageInfo && imageInfo.height) || bitmap.height;
+      zoomImage = null;
+      zoomImageUrl = imageInfo && imageInfo.zoomUrl ? imageInfo.zoomUrl.replace(/\\/g, "/") : null;
+      baseLayerKey = "";
+
+      // OCR 完成後，圖片載入時直接進入 StartScale 狀態
+      workStatus = "startScale";
+      canvas.style.display = "block";
+      document.getElementById("imagePlaceholder").style.display = "none";
+
+      // 重新調整 Canvas 尺寸
+      resizeCanvasToFill();
+      drawImage();
+
+      console.log("圖片載入完成，進入 StartScale 狀態，縮放參數:", {scale, offsetX, offsetY});
+    },
+    function () {
+      if (loadId !== imageLoadId) return;
+      console.error("圖片載入失敗:", fixedPath);
+      console.error("原始路徑:", imagePath);
+      showNoImage();
+    }
+  );
+}
+
+/**
+ * 載入旋轉放大檢視用的高解析度影像 (載入前先使用顯示用影像)
+ */
+function loadZoomImage() {
+  if (zoomImage || !zoomImageUrl) return;
+
+  const loadId = imageLoadId;
+  const url = zoomImageUrl;
+  zoomImageUrl = null;
+  loadImage(url).then(
+    function (bitmap) {
+      if (loadId !== imageLoadId) return;
+      zoomImage = bitmap;
+      if (workStatus === "zoomAndRotate") {
+        requestDraw();
+      }
+    },
+    function () {
+      console.warn("放大影像載入失敗，使用顯示用影像:", url);
+    }
+  );
 }
 
 /**
  * 顯示無圖片狀態
  */
 function showNoImage() {
+  imageLoadId++;
   workStatus = "none";
   currentImage = null;
+  zoomImage = null;
+  zoomImageUrl = null;
+  baseLayerKey = "";
   canvas.style.display = "none";
   document.getElementById("imagePlaceholder").style.display = "block";
 }
 
+/**
+ * 排程重繪 (同一畫面內的多次要求只重繪一次)
+ */
+function requestDraw() {
+  if (drawPending) return;
+  drawPending = true;
+  requestAnimationFrame(function () {
+    drawPending = false;
+    drawImage();
+  });
+}
+
+/**
+ * 計算圖片填滿 Canvas (保持比例、居中) 時的位置與尺寸
+ * @returns {{drawWidth: number, drawHeight: number, imageOffsetX: number, imageOffsetY: number}}
+ */
+function getFitRect() {
+  const canvasAspectRatio = canvas.width / canvas.height;
+  const imageAspectRatio = imageWidth / imageHeight;
+
+  let drawWidth, drawHeight, imageOffsetX, imageOffsetY;
+
+  if (canvasAspectRatio > imageAspectRatio) {
+    // Canvas 較寬，以高度填滿
+    drawHeight = canvas.height;
+    drawWidth = canvas.height * imageAspectRatio;
+    imageOffsetX = (canvas.width - drawWidth) / 2;
+    imageOffsetY = 0;
+  } else {
+    // Canvas 較高，以寬度填滿
+    drawWidth = canvas.width;
+    drawHeight = canvas.width / imageAspectRatio;
+    imageOffsetX = 0;
+    imageOffsetY = (canvas.height - drawHeight) / 2;
+  }
+
+  return { drawWidth, drawHeight, imageOffsetX, imageOffsetY };
+}
+
 /**
  * 繪製圖片
  */
@@ -198,32 +320,27 @@ function drawNormalImage() {
   ctx.clearRect(0, 0, canvas.width, canvas.height);
 
   // 計算圖片的最佳顯示尺寸（填滿 Canvas）
-  const canvasAspectRatio = canvas.width / canvas.height;
-  const imageAspectRatio = currentImage.width / currentImage.height;
-
-  let drawWidth, drawHeight, imageOffsetX, imageOffsetY;
+  const { drawWidth, drawHeight, imageOffsetX, imageOffsetY } = getFitRect();
 
-  if (canvasAspectRatio > imageAspectRatio) {
-    // Canvas 較寬，以高度填滿
-    drawHeight = canvas.height;
-    drawWidth = canvas.height * imageAspectRatio;
-    imageOffsetX = (canvas.width - drawWidth) / 2;
-    imageOffsetY = 0;
-  } else {
-    // Canvas 較高，以寬度填滿
-    drawWidth = canvas.width;
-    drawHeight = canvas.width / imageAspectRatio;
-    imageOffsetX = 0;
-    imageOffsetY = (canvas.height - drawHeight) / 2;
+  // 底圖只在 Canvas 尺寸或圖片改變時重新縮放，畫線時直接複製
+  const key = `${canvas.width}x${canvas.height}`;
+  if (baseLayerKey !== key) {
+    if (!baseLayer) {
+      baseLayer = document.createElement("canvas");
+    }
+    baseLayer.width = canvas.width;
+    baseLayer.height = canvas.height;
+    const baseCtx = baseLayer.getContext("2d");
+    baseCtx.clearRect(0, 0, baseLayer.width, baseLayer.height);
+    baseCtx.drawImage(currentImage, imageOffsetX, imageOffsetY, drawWidth, drawHeight);
+    baseLayerKey = key;
   }
 
   // 繪製圖片（居中顯示）
-  ctx.drawImage(currentImage, imageOffsetX, imageOffsetY, drawWidth, drawHeight);
+  ctx.drawImage(baseLayer, 0, 0);
 
-  // 更新縮放比例
-  rate = drawWidth / currentImage.width;
-  
-  console.log("Normal 狀態：圖片居中顯示");
+  // 更新縮放比例 (Canvas 像素 / 原圖像素)
+  rate = drawWidth / imageWidth;
 }
 
 /**
@@ -235,22 +352,7 @@ function drawDrawingLine() {
   ctx.beginPath();
 
   // 計算圖片在 Canvas 中的實際位置
-  const canvasAspectRatio = canvas.width / canvas.height;
-  const imageAspectRatio = currentImage.width / currentImage.height;
-
-  let drawWidth, drawHeight, imageOffsetX, imageOffsetY;
-
-  if (canvasAspectRatio > imageAspectRatio) {
-    drawHeight = canvas.height;
-    drawWidth = canvas.height * imageAspectRatio;
-    imageOffsetX = (canvas.width - drawWidth) / 2;
-    imageOffsetY = 0;
-  } else {
-    drawWidth = canvas.width;
-    drawHeight = canvas.width / imageAspectRatio;
-    imageOffsetX = 0;
-    imageOffsetY = (canvas.height - drawHeight) / 2;
-  }
+  const { imageOffsetX, imageOffsetY } = getFitRect();
 
   // 將滑鼠座標轉換為圖片座標系統
   const imageStartX = (startPoint.x - imageOffsetX) / rate;
@@ -262,8 +364,6 @@ function drawDrawingLine() {
   ctx.moveTo(imageOffsetX + imageStartX * rate, imageOffsetY + imageStartY * rate);
   ctx.lineTo(imageOffsetX + imageEndX * rate, imageOffsetY + imageEndY * rate);
   ctx.stroke();
-  
-  console.log(`Drawing 狀態：繪製紅色線條從 (${startPoint.x}, ${startPoint.y}) 到 (${endPoint.x}, ${endPoint.y})`);
 }
 
 /**
@@ -274,9 +374,9 @@ function drawScaledImage() {
 
   ctx.clearRect(0, 0, canvas.width, canvas.height);
 
-  // 計算縮放後的圖片尺寸
-  const scaledWidth = currentImage.width * scale;
-  const scaledHeight = currentImage.height * scale;
+  // 計算縮放後的圖片尺寸 (以原圖尺寸計算)
+  const scaledWidth = imageWidth * scale;
+  const scaledHeight = imageHeight * scale;
 
   // 計算圖片在 Canvas 中的位置（考慮 offset）
   const imageX = -offsetX;
@@ -297,22 +397,11 @@ function drawRotatedImage() {
   ctx.clearRect(0, 0, canvas.width, canvas.height);
 
   // 計算圖片在 Canvas 中的實際位置和尺寸
-  const canvasAspectRatio = canvas.width / canvas.height;
-  const imageAspectRatio = currentImage.width / currentImage.height;
-
-  let drawWidth, drawHeight, imageOffsetX, imageOffsetY;
+  const { imageOffsetX, imageOffsetY } = getFitRect();
 
-  if (canvasAspectRatio > imageAspectRatio) {
-    drawHeight = canvas.height;
-    drawWidth = canvas.height * imageAspectRatio;
-    imageOffsetX = (canvas.width - drawWidth) / 2;
-    imageOffsetY = 0;
-  } else {
-    drawWidth = canvas.width;
-    drawHeight = canvas.width / imageAspectRatio;
-    imageOffsetX = 0;
-    imageOffsetY = (canvas.height - drawHeight) / 2;
-  }
+  // 原尺寸顯示需要高解析度影像，載入完成前先使用顯示用影像
+  loadZoomImage();
+  const source = zoomImage || currentImage;
 
   // 將滑鼠座標轉換為原圖座標系統
   const imageStartX = (startPoint.x - imageOffsetX) / rate;
@@ -327,8 +416,8 @@ function drawRotatedImage() {
   };
 
   // 計算旋轉後原圖的顯示區域
-  const rotatedImageWidth = currentImage.width;
-  const rotatedImageHeight = currentImage.height;
+  const rotatedImageWidth = imageWidth;
+  const rotatedImageHeight = imageHeight;
 
   // 計算旋轉後原圖在 Canvas 中的顯示位置
   const targetCenterX = canvas.width / 2;
@@ -351,7 +440,7 @@ function drawRotatedImage() {
 
   // 繪製旋轉後的原圖（保持原尺寸，不縮放）
   ctx.drawImage(
-    currentImage,
+    source,
     rotatedOffsetX,
     rotatedOffsetY,
     rotatedImageWidth,
@@ -452,7 +541,7 @@ function handleMouseMove(e) {
     y: e.clientY - rect.top,
   };
 
-  drawImage();
+  requestDraw();
 }
 
 /**
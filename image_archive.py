@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+影像封存模組
+以內容雜湊 (SHA-256) 命名儲存 CCD 原始影像，並在同一目錄產生縮圖。
+
+目錄結構: {DB_Image_Save_Path}/{OK|NG|Err}/{yyMM}/{雜湊前 2 碼}/{雜湊}.png
+          同目錄下的 {雜湊}.thumb.jpg 為縮圖
+
+- 原始 BMP 轉存為無損 PNG (或設定的格式)，已壓縮的 JPEG/PNG/WebP 直接保存原檔
+- 相同內容只保存一份，檔名由內容決定，不需要逐一檢查檔名是否重複
+- 分層保留: OK 影像超過指定天數後原地縮小 (檔名不變，ocrlog.Image 仍有效)
+- 編碼在背景線程進行 (5M 像素的 PNG 約需 0.1~0.3 秒)，store 讀取來源後立即回傳路徑；
+  需要確定檔案已存在時 (NG/Err) 以 wait=True 等待寫入完成
+"""
+
+import os
+import re
+import glob
+import hashlib
+import logging
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QImageReader, QImageWriter
+
+
+ARCHIVE_CLASSES = ("OK", "NG", "Err")
+THUMBNAIL_SUFFIX = ".thumb.jpg"
+# 整個月份都已縮小時寫入的標記檔，之後不再逐一檢查該月份的影像
+DOWNSAMPLED_MARKER = ".downsampled"
+# 已經是壓縮格式的來源影像直接保存原檔，不重新編碼
+COMPRESSED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+MONTH_DIR_PATTERN = re.compile(r"^\d{4}$")
+
+
+class ImageArchive:
+    """內容定址的影像封存"""
+
+    def __init__(self, root: str, image_format: str = "png", thumbnail_size: int = 256,
+                 ok_downsample_days: int = 0, downsample_max_side: int = 1024,
+                 on_error: Optional[Callable[[str, Exception], None]] = None):
+        """
+        Args:
+            root: 影像根目錄 (DB_Image_Save_Path)
+            image_format: BMP 原始影像的儲存格式 (png / webp / jpg)
+            thumbnail_size: 縮圖最長邊像素
+            ok_downsample_days: OK 影像保留原尺寸的天數 (0 表示不縮小)
+            downsample_max_side: 縮小後的最長邊像素
+            on_error: 背景寫入失敗時呼叫 (參數為影像路徑與例外，在寫入線程呼叫)
+        """
+        self.root = root
+        self.image_format = image_format.lower().lstrip(".")
+        if self.image_format.encode() not in [bytes(f) for f in QImageWriter.supportedImageFormats()]:
+            logging.warning(f"不支援的影像格式 {image_format}，改用 png")
+            self.image_format = "png"
+        self.thumbnail_size = thumbnail_size
+        self.ok_downsample_days = ok_downsample_days
+        self.downsample_max_side = downsample_max_side
+        self.on_error = on_error
+        # 單一背景線程依序寫入 (非 daemon，程式結束前會寫完排隊中的影像)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-archive")
+
+    def store(self, source_path: str, result_type: str, when: Optional[datetime.datetime] = None,
+              wait: bool = False) -> str:
+        """
+        儲存影像並產生縮圖
+
+        來源檔案在回傳前已讀入記憶體，呼叫端之後可以立即清除來源目錄。
+
+        Args:
+            source_path: 來源影像路徑
+            result_type: 結果類型 (OK / NG / Err)
+            when: 儲存時間 (決定月份目錄，預設為現在)
+            wait: 是否等待寫入完成 (預設在背景寫入)；等待時寫入失敗會拋出例外
+
+        Returns:
+            儲存後的影像路徑 (相同內容已存在時回傳既有路徑)；背景寫入時檔案可能尚未存在，
+            寫入失敗以 on_error 通知，呼叫端需自行處理已記錄的路徑
+        """
+        if result_type not in ARCHIVE_CLASSES:
+            result_type = "Err"
+
+        with open(source_path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+
+        source_ext = os.path.splitext(source_path)[1].lower()
+        keep_original = source_ext in COMPRESSED_EXTENSIONS
+        ext = source_ext if keep_original else "." + self.image_format
+
+        month = (when or datetime.datetime.now()).strftime("%y%m")
+        directory = os.path.join(self.root, result_type, month, digest[:2])
+        path = os.path.join(directory, digest + ext)
+        thumbnail = os.path.join(directory, digest + THUMBNAIL_SUFFIX)
+
+        if os.path.exists(path) and os.path.exists(thumbnail):
+            return path
+
+        future = self._executor.submit(self._write_entry, data, path, thumbnail, keep_original)
+        if wait:
+            future.result()
+        return path
+
+    def flush(self):
+        """等待排隊中的影像寫入完成"""
+        self._executor.submit(lambda: None).result()
+
+    def _write_entry(self, data: bytes, path: str, thumbnail: str, keep_original: bool):
+        """寫入原始影像與縮圖 (背景線程)"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image = QImage.fromData(data)
+            if image.isNull():
+                raise ValueError("無法解碼影像")
+
+            if not os.path.exists(path):
+                if keep_original:
+                    self._write_bytes(path, data)
+                else:
+                    self._write_image(path, image, self.image_format)
+
+            if not os.path.exists(thumbnail):
+                self._write_image(thumbnail, self._scaled(image, self.thumbnail_size), "jpg", 80)
+        except Exception as e:
+            logging.error(f"儲存影像失敗 {path}: {e}")
+            if self.on_error:
+                try:
+                    self.on_error(path, e)
+                except Exception as callback_error:
+                    logging.error(f"影像寫入失敗通知錯誤: {callback_error}")
+            raise
+
+    def apply_retention(self, now: Optional[datetime.datetime] = None) -> Dict[str, int]:
+        """
+        將超過保留天數的 OK 影像原地縮小 (ok_downsample_days 為 0 時不執行)
+
+        Returns:
+            {月份: 縮小張數}
+        """
+        results = {}
+        if not self.ok_downsample_days or self.ok_downsample_days <= 0:
+            return results
+
+        cutoff = (now or datetime.datetime.now()) - datetime.timedelta(days=self.ok_downsample_days)
+        cutoff_month = cutoff.strftime("%y%m")
+
+        ok_root = os.path.join(self.root, "OK")
+        if not os.path.isdir(ok_root):
+            return results
+
+        for month in sorted(os.listdir(ok_root)):
+            month_dir = os.path.join(ok_root, month)
+            if not MONTH_DIR_PATTERN.match(month) or month > cutoff_month:
+                continue
+            if os.path.exists(os.path.join(month_dir, DOWNSAMPLED_MARKER)):
+                continue
+
+            count = 0
+            for path in glob.glob(os.path.join(month_dir, "*", "*")):
+                if path.endswith(THUMBNAIL_SUFFIX) or path.endswith(".tmp"):
+                    continue
+                try:
+                    if os.path.getmtime(path) < cutoff.timestamp() and self._downsample(path):
+                        count += 1
+                except Exception as e:
+                    logging.error(f"縮小影像失敗 {path}: {e}")
+
+            # 截止日所在的月份之後仍可能有新影像，只有更早的月份可以標記完成
+            if month < cutoff_month:
+                with open(os.path.join(month_dir, DOWNSAMPLED_MARKER), "w", encoding="utf-8") as f:
+                    f.write(datetime.datetime.now().isoformat())
+            if count:
+                results[month] = count
+
+        if results:
+            logging.info(f"OK 影像縮小完成: {results}")
+        return results
+
+    @staticmethod
+    def thumbnail_path(image_path: str) -> Optional[str]:
+        """取得影像的縮圖路徑，沒有縮圖 (如舊格式的影像) 時為 None"""
+        if not image_path:
+            return None
+        thumbnail = os.path.splitext(image_path)[0] + THUMBNAIL_SUFFIX
+        return thumbnail if os.path.exists(thumbnail) else None
+
+    def _downsample(self, path: str) -> bool:
+        """原地縮小影像 (保留格式、檔名與修改時間)，已小於目標尺寸時不處理"""
+        size = QImageReader(path).size()
+        if max(size.width(), size.height()) <= self.downsample_max_side:
+            return False
+
+        image = QImage(path)
+        if image.isNull():
+            return False
+
+        mtime = os.path.getmtime(path)
+        fmt = os.path.splitext(path)[1].lstrip(".").lower()
+        quality = 85 if fmt in ("jpg", "jpeg", "webp") else -1
+        self._write_image(path, self._scaled(image, self.downsample_max_side), fmt, quality)
+        os.utime(path, (mtime, mtime))
+        return True
+
+    @staticmethod
+    def _scaled(image: QImage, max_side: int) -> QImage:
+        """等比例縮小到最長邊不超過 max_side"""
+        if max(image.width(), image.height()) <= max_side:
+            return image
+        return image.scaled(max_side, max_side, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    @staticmethod
+    def _write_image(path: str, image: QImage, fmt: str, quality: int = -1):
+        """先寫入暫存檔再改名，避免產生不完整的影像檔"""
+        temp_path = path + ".tmp"
+        if not image.save(temp_path, fmt.upper(), quality):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise IOError(f"寫入影像失敗: {path}")
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _write_bytes(path: str, data: bytes):
+        """先寫入暫存檔再改名"""
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+
+def create_image_archive(root: str, config=None) -> Optional[ImageArchive]:
+    """
+    依 config.yaml 的備份設定建立影像封存
+
+    Returns:
+        ImageArchive，image_archive_format 為空白 (沿用舊的複製方式) 時為 None
+    """
+    if config is None:
+        from config_manager import ConfigManager
+        config = ConfigManager().Config
+
+    backup_config = config.Settings.Backup
+    if not backup_config.Image_Archive_Format:
+        return None
+
+    return ImageArchive(
+        root,
+        image_format=backup_config.Image_Archive_Format,
+        thumbnail_size=backup_config.Image_Thumbnail_Size,
+        ok_downsample_days=backup_config.Image_OK_Downsample_Days,
+        downsample_max_side=backup_config.Image_Downsample_Max_Side
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    from config_manager import ConfigManager
+
+    parser = argparse.ArgumentParser(description="影像封存保留工具")
+    parser.add_argument("--apply", action="store_true", help="縮小超過保留天數的 OK 影像")
+    parser.add_argument("--days", type=int, help="OK 影像保留原尺寸的天數 (預設讀取 config.yaml)")
+    parser.add_argument("--root", help="影像根目錄 (預設讀取 config.yaml 的 db_image_save_path)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    config = ConfigManager().Config
+    archive = create_image_archive(args.root or config.Settings.Paths.DB_Image_Save_Path, config) or \
+        ImageArchive(args.root or config.Settings.Paths.DB_Image_Save_Path)
+    if args.days is not None:
+        archive.ok_downsample_days = args.days
+
+    print(f"影像目錄: {archive.root}")
+    print(f"OK 影像保留原尺寸天數: {archive.ok_downsample_days or '不縮小'}")
+    if args.apply:
+        print(f"縮小結果: {archive.apply_retention()}")
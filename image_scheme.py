@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+影像 URL scheme (ocrimg://<id>)
+網頁需要的影像 (顯示用影像、縮圖、封存影像) 由 Python 端登記後取得 ocrimg:// 網址，
+QtWebEngine 載入時由 ImageSchemeHandler 以 QFile 直接串流檔案內容，
+影像不需轉成 base64 字串經過 QWebChannel / JavaScript，也不需對網頁開放 file:// 路徑。
+
+id 由檔案路徑、修改時間與大小計算，同一檔案內容不變時網址固定，瀏覽器快取可以直接重用；
+檔案改變 (例如 OK 影像被縮小) 後會取得新的網址。
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from PyQt5.QtCore import QFile, QIODevice
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestJob, QWebEngineUrlScheme, QWebEngineUrlSchemeHandler
+
+
+SCHEME_NAME = b"ocrimg"
+
+MIME_TYPES = {
+    '.jpg': b"image/jpeg",
+    '.jpeg': b"image/jpeg",
+    '.png': b"image/png",
+    '.webp': b"image/webp",
+    '.bmp': b"image/bmp",
+    '.gif': b"image/gif",
+}
+
+
+def register_image_scheme():
+    """
+    向 QtWebEngine 註冊 ocrimg scheme
+
+    必須在建立 QApplication 之前呼叫。LocalScheme 只允許本機頁面 (file://) 載入，
+    網路內容無法透過此 scheme 讀取影像。
+    """
+    scheme = QWebEngineUrlScheme(SCHEME_NAME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme | QWebEngineUrlScheme.LocalScheme)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+class ImageSchemeHandler(QWebEngineUrlSchemeHandler):
+    """ocrimg:// 請求處理器，只提供已登記的影像檔案"""
+
+    def __init__(self, parent=None, max_entries: int = 2000):
+        """
+        Args:
+            parent: Qt 父物件
+            max_entries: 保留的登記數量 (超過時移除最久未使用的)
+        """
+        super().__init__(parent)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # id -> 檔案路徑
+        self._lock = threading.Lock()
+
+    def install(self, profile):
+        """安裝到 QWebEngineProfile"""
+        profile.installUrlSchemeHandler(SCHEME_NAME, self)
+
+    def url_for_file(self, file_path: str, must_exist: bool = True) -> Optional[str]:
+        """
+        登記影像檔案並取得 ocrimg 網址
+
+        Args:
+            file_path: 影像檔案路徑
+            must_exist: 檔案是否必須已存在；為 False 時可登記稍後才寫入的檔案
+                        (檔名需已唯一對應內容，如顯示用影像快取)，請求時尚未寫入則回應找不到
+
+        Returns:
+            ocrimg://<id>，檔案不存在 (且 must_exist 為 True) 時為 None
+        """
+        if not file_path:
+            return None
+        path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(path)
+            version = f"{stat.st_mtime_ns}|{stat.st_size}"
+        except OSError:
+            if must_exist:
+                return None
+            version = "pending"
+
+        image_id = hashlib.sha1(f"{path}|{version}".encode("utf-8")).hexdigest()[:24]
+        with self._lock:
+            self._entries[image_id] = path
+            self._entries.move_to_end(image_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return f"{SCHEME_NAME.decode()}://{image_id}"
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob):
+        """處理影像請求，以 QFile 串流檔案內容"""
+        image_id = job.requestUrl().host()
+        with self._lock:
+            path = self._entries.get(image_id)
+            if path:
+                self._entries.move_to_end(image_id)
+
+        if not path or not os.path.exists(path):
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+
+        # QFile 以 job 為父物件，請求結束時一併釋放
+        device = QFile(path, job)
+        if not device.open(QIODevice.ReadOnly):
+            logging.error(f"無法開啟影像檔案: {path}")
+            job.fail(QWebEngineUrlRequestJob.RequestFailed)
+            return
+
+        mime_type = MIME_TYPES.get(os.path.splitext(path)[1].lower(), b"application/octet-stream")
+        job.reply(mime_type, device)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+匯入時間分析工具
+以 python -X importtime 在子程序中匯入指定模組 (預設 main)，列出花費最多的匯入，
+並檢查大型相依套件 (torch、transformers 等) 是否在啟動時就被匯入。
+
+用法: python import_profile.py [模組] [--top 20] [--sort self|cumulative]
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+# 應在使用時才匯入的大型套件，出現在啟動匯入中時提出警告
+HEAVY_MODULES = ("torch", "transformers", "ultralytics", "cv2", "numpy", "PIL")
+
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(module: str = "main", cwd: str = None) -> Tuple[List[Dict], int, str]:
+    """
+    在子程序中匯入模組並解析 -X importtime 的輸出
+
+    子程序只匯入模組 (不執行 __main__)，模組匯入失敗時仍會回傳失敗前已匯入的部分。
+
+    Returns:
+        (匯入記錄列表 [{name, self_us, cumulative_us, depth}], 子程序結束碼, 錯誤訊息最後一行)
+    """
+    cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True, encoding="utf-8", errors="replace"
+    )
+
+    records = []
+    errors = []
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match:
+            records.append({
+                'name': match.group(4),
+                'self_us': int(match.group(1)),
+                'cumulative_us': int(match.group(2)),
+                'depth': len(match.group(3)) // 2,
+            })
+        elif not line.startswith("import time:") and line.strip():
+            errors.append(line.strip())
+    return records, process.returncode, errors[-1] if errors else ""
+
+
+def heavy_imports(records: List[Dict]) -> Dict[str, int]:
+    """找出啟動時已匯入的大型套件 {套件: 累計微秒}"""
+    found = {}
+    for record in records:
+        top = record['name'].split(".")[0]
+        if top in HEAVY_MODULES and "." not in record['name']:
+            found[top] = max(found.get(top, 0), record['cumulative_us'])
+    return found
+
+
+def format_report(module: str, records: List[Dict], top: int = 20, sort: str = "cumulative") -> str:
+    """產生匯入時間報表"""
+    key = 'self_us' if sort == "self" else 'cumulative_us'
+    total_us = sum(record['self_us'] for record in records)
+    lines = [
+        f"匯入 {module}: {len(records)} 個模組，共 {total_us / 1000:.0f} ms",
+        "",
+        f"{'self (ms)':>10} {'累計 (ms)':>10}  模組",
+    ]
+    for record in sorted(records, key=lambda r: r[key], reverse=True)[:top]:
+        lines.append(f"{record['self_us'] / 1000:>10.1f} {record['cumulative_us'] / 1000:>10.1f}  "
+                     f"{'  ' * record['depth']}{record['name']}")
+
+    heavy = heavy_imports(records)
+    lines.append("")
+    if heavy:
+        lines.append("警告: 啟動時已匯入大型套件 (應在使用時才匯入):")
+        for name, cumulative_us in sorted(heavy.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"  {name}: {cumulative_us / 1000:.0f} ms")
+    else:
+        lines.append(f"未匯入大型套件 ({', '.join(HEAVY_MODULES)})")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="匯入時間分析工具")
+    parser.add_argument("module", nargs="?", default="main", help="要分析的模組 (預設 main)")
+    parser.add_argument("--top", type=int, default=20, help="列出的模組數量")
+    parser.add_argument("--sort", choices=("cumulative", "self"), default="cumulative",
+                        help="排序依據 (累計時間或模組本身時間)")
+    args = parser.parse_args()
+
+    records, returncode, error = profile_imports(args.module)
+    print(format_report(args.module, records, args.top, args.sort))
+    if returncode != 0:
+        print(f"\n匯入 {args.module} 失敗 (結束碼 {returncode}): {error}")
+    sys.exit(1 if returncode != 0 or heavy_imports(records) else 0)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ocrlog 索引檢查工具
+在測試用資料庫中產生大量模擬 ocrlog 資料，逐一呼叫 DatabaseManager 的查詢方法，
+對實際送出的 SQL 執行 EXPLAIN，若出現全表掃描 (或 ocrlog 的排序無法使用索引) 則以非 0 結束代碼結束。
+
+用法:
+    python index_check.py                                   # 使用暫存 SQLite 資料庫
+    python index_check.py --url mysql+pymysql://user:pw@host:3306/ocr_index_check --rows 500000
+
+注意: 會寫入模擬資料，請勿指向正式資料庫。
+"""
+
+import sys
+import os
+import re
+import random
+import logging
+import argparse
+import tempfile
+import datetime
+from sqlalchemy import event, insert, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.dialects.mysql import TINYINT
+
+# 添加當前目錄到 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database_manager import DatabaseManager
+from models import Account, Ocrlog
+
+# 檢查的表格 (account 表資料量小，不列入)
+CHECKED_TABLES = ('ocrlog', 'ocrlog_daily')
+
+SEED_ACCOUNTS = 20
+SEED_DAYS = 365
+
+
+@compiles(TINYINT, "sqlite")
+def _compile_tinyint_sqlite(element, compiler, **kw):
+    """SQLite 沒有 TINYINT，以 INTEGER 代替"""
+    return "INTEGER"
+
+
+def _register_sqlite_collation(dbapi_connection, connection_record):
+    """SQLite 沒有 utf8mb4_unicode_ci 定序，註冊同名的一般字串比較"""
+    if hasattr(dbapi_connection, 'create_collation'):
+        dbapi_connection.create_collation("utf8mb4_unicode_ci", lambda a, b: (a > b) - (a < b))
+
+
+def seed_ocrlog(db_manager: DatabaseManager, rows: int, batch_size: int = 10000):
+    """產生模擬資料，直到 ocrlog 至少有 rows 筆"""
+    with db_manager.engine.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(Ocrlog.__table__)).scalar() or 0
+        if existing >= rows:
+            print(f"ocrlog 已有 {existing} 筆，略過產生資料")
+            return
+
+        accounts = [f"seed{i:03d}" for i in range(SEED_ACCOUNTS)]
+        known = set(conn.execute(select(Account.Account)).scalars())
+        new_accounts = [{'Account': a, 'Name': a, 'Password': a, 'NeedPassword': 0, 'IsAdmin': 0}
+                        for a in accounts if a not in known]
+        if new_accounts:
+            conn.execute(insert(Account), new_accounts)
+
+        print(f"產生 {rows - existing} 筆模擬 ocrlog 資料...")
+        start = datetime.datetime.now() - datetime.timedelta(days=SEED_DAYS)
+        span = SEED_DAYS * 86400
+        remaining = rows - existing
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            batch = []
+            for _ in range(count):
+                account = random.choice(accounts)
+                judgment = random.choice((0, 0, 0, 0, 1, 2, 3, 4))
+                batch.append({
+                    'Account': account,
+                    'Time': start + datetime.timedelta(seconds=random.randrange(span)),
+                    'Source': f"{random.randrange(100000):06d}",
+                    'OCRResult': f"{random.randrange(100000):06d}",
+                    'OK': 1 if judgment == 0 else 0,
+                    'Image': '',
+                    'Manual': 0,
+                    'Judgment': judgment,
+                    'Processor': account,
+                    'IsExteriorOK': 1,
+                    'ExteriorClass': 0,
+                    'ExteriorErrReason': 0
+                })
+            conn.execute(insert(Ocrlog.__table__), batch)
+            remaining -= count
+
+    # 模擬資料直接寫入 ocrlog，需重建每日統計
+    db_manager.rebuild_daily_summary()
+
+
+def build_checks(db_manager: DatabaseManager):
+    """要檢查的查詢方法 (名稱, 呼叫函式)"""
+    now = datetime.datetime.now()
+    week_ago = now - datetime.timedelta(days=7)
+    today = now.date()
+    account = "seed000"
+
+    def second_page(**kwargs):
+        page = db_manager.get_ocr_logs_page(limit=50, **kwargs)
+        if page['next_cursor']:
+            db_manager.get_ocr_logs_page(limit=50, cursor=page['next_cursor'], **kwargs)
+
+    def first_chunk():
+        chunks = db_manager.iter_ocr_log_chunks(week_ago, now, 100)
+        next(chunks, None)
+        chunks.close()
+
+    return [
+        ("get_ocr_logs", lambda: db_manager.get_ocr_logs(limit=50)),
+        ("get_ocr_logs_page", lambda: second_page()),
+        ("get_ocr_logs_page(account)", lambda: second_page(account_id=account)),
+        ("get_ocr_logs_page(date range)", lambda: second_page(start_date=week_ago, end_date=now)),
+        ("search_ocr_logs", lambda: db_manager.search_ocr_logs("0123", limit=50)),
+        ("search_ocr_logs(date range)", lambda: db_manager.search_ocr_logs("0123", week_ago, now, limit=50)),
+        ("get_ocr_logs_by_account", lambda: db_manager.get_ocr_logs_by_account(account, limit=50)),
+        ("get_ocr_logs_by_date_range", lambda: db_manager.get_ocr_logs_by_date_range(week_ago, now, limit=50)),
+        ("count_ocr_logs_by_date_range", lambda: db_manager.count_ocr_logs_by_date_range(week_ago, now)),
+        ("iter_ocr_log_chunks", first_chunk),
+        ("count_ocr_logs", lambda: db_manager.count_ocr_logs(today - datetime.timedelta(days=30), today, account)),
+        ("get_ocr_statistics", lambda: db_manager.get_ocr_statistics(week_ago, now)),
+        ("get_daily_statistics", lambda: db_manager.get_daily_statistics(today - datetime.timedelta(days=30), today)),
+        ("get_daily_statistics(account)", lambda: db_manager.get_daily_statistics(today - datetime.timedelta(days=30), today, account)),
+    ]
+
+
+def capture_statements(db_manager: DatabaseManager, func):
+    """執行 func 並收集其間送出的 SELECT 語句與參數"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(db_manager.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(db_manager.engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def explain(db_manager: DatabaseManager, statement: str, parameters):
+    """
+    執行 EXPLAIN 並找出全表掃描
+
+    Returns:
+        (查詢計畫文字列表, 全表掃描的表格列表，排序無法使用索引時為 "ORDER BY")
+    """
+    dialect = db_manager.engine.dialect.name
+    full_scans = []
+    plan = []
+    # 由全文索引取得候選記錄時，只需排序符合的記錄，不視為排序失敗
+    uses_fulltext = False
+
+    with db_manager.engine.connect() as conn:
+        if dialect == 'sqlite':
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            for row in rows:
+                detail = row[-1]
+                plan.append(detail)
+                uses_fulltext = uses_fulltext or "VIRTUAL TABLE" in detail
+                # "SCAN ocrlog" 為全表掃描，"SCAN ocrlog USING [COVERING] INDEX ..." 為依索引順序讀取
+                match = re.match(r"SCAN (\w+)", detail)
+                if match and match.group(1) in CHECKED_TABLES and "USING" not in detail:
+                    full_scans.append(match.group(1))
+                # 排序無法由索引提供時需讀完整個範圍再排序，分頁查詢會退化
+                elif "TEMP B-TREE FOR" in detail and "ORDER BY" in detail:
+                    full_scans.append("ORDER BY")
+        elif dialect == 'mysql':
+            result = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            keys = list(result.keys())
+            for row in result.fetchall():
+                info = dict(zip(keys, row))
+                plan.append(f"table={info.get('table')} type={info.get('type')} key={info.get('key')} "
+                            f"rows={info.get('rows')} extra={info.get('Extra')}")
+                uses_fulltext = uses_fulltext or info.get('type') == 'fulltext'
+                if info.get('table') in CHECKED_TABLES and info.get('type') == 'ALL':
+                    full_scans.append(info.get('table'))
+                elif info.get('table') == 'ocrlog' and 'filesort' in (info.get('Extra') or '') \
+                        and 'ORDER BY' in statement.upper() and 'GROUP BY' not in statement.upper():
+                    full_scans.append("ORDER BY")
+        else:
+            raise ValueError(f"不支援的資料庫: {dialect}")
+
+    if uses_fulltext:
+        full_scans = [name for name in full_scans if name != "ORDER BY"]
+    return plan, full_scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ocrlog 索引檢查工具 (EXPLAIN 各查詢方法，出現全表掃描即失敗)")
+    parser.add_argument("--url", help="測試用資料庫連線字串 (預設為暫存 SQLite 資料庫)")
+    parser.add_argument("--rows", type=int, default=200000, help="模擬資料筆數 (預設 200000)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="顯示每個語句的查詢計畫")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    url = args.url
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.gettempdir(), "ocr_index_check.db")
+    if url.startswith("sqlite"):
+        event.listen(Engine, "connect", _register_sqlite_collation)
+
+    db_manager = DatabaseManager(url)
+    try:
+        # 測試用資料庫可能是舊版建立的，先補齊索引 (正式資料庫由 db_migrate.py 處理)
+        db_manager.migrate_schema()
+        seed_ocrlog(db_manager, args.rows)
+
+        failures = []
+        for name, func in build_checks(db_manager):
+            statements = capture_statements(db_manager, func)
+            scanned = []
+            plans = []
+            for statement, parameters in statements:
+                plan, full_scans = explain(db_manager, statement, parameters)
+                plans.append((statement, plan))
+                scanned.extend(full_scans)
+
+            status = "FAIL" if scanned else "OK"
+            print(f"[{status}] {name}" + (f" - 全表掃描/排序: {', '.join(sorted(set(scanned)))}" if scanned else ""))
+            if scanned or args.verbose:
+                for statement, plan in plans:
+                    print("    " + " ".join(statement.split()))
+                    for line in plan:
+                        print("      -> " + line)
+            if scanned:
+                failures.append(name)
+
+        if failures:
+            print(f"\n{len(failures)} 個查詢未正確使用索引: {', '.join(failures)}")
+            return 1
+        print("\n所有查詢皆使用索引")
+        return 0
+    finally:
+        db_manager.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
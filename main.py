@@ -14,14 +14,14 @@ from PyQt5.QtCore import QObject, pyqtSlot, QUrl, QThread, pyqtSignal, Qt, QTime
 from PyQt5.QtGui import QIcon
 from database_manager import DatabaseManager
 from config_manager import ConfigManager
-from account import AccountManagerWindow
-from export import ExportWindow
-import cv2
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont
-import base64
-import io
-from yolo_ocr import YOLOOCR
+from ocrlog_archive import create_archiver
+from image_archive import ImageArchive, create_image_archive
+from display_cache import DisplayCache
+from image_scheme import ImageSchemeHandler, register_image_scheme
+from startup import StartupOrchestrator, wait_for_tcp
+from ocr_service import create_ocr_engine
+# cv2 / numpy / PIL、yolo_ocr (torch / ultralytics / transformers) 與帳號、匯出視窗在使用時才匯入，
+# 讓初始化對話框不必等這些模組載入 (啟動時的匯入花費可用 python import_profile.py 檢視)
 
 ### 解決 英業達 電腦 開不了網頁問題
 os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = "--disable-gpu"
@@ -210,6 +210,26 @@ class MockDatabaseManager:
         print(f"模擬儲存記錄: {log_data}")
         return True
     
+    def get_daily_statistics(self, start_day, end_day, account_id=None):
+        """模擬取得每日統計"""
+        return []
+    
+    def get_ocr_logs_page(self, limit=100, cursor=None, start_date=None, end_date=None, account_id=None):
+        """模擬分頁查詢 OCR 記錄"""
+        return {'items': [], 'next_cursor': None}
+    
+    def count_ocr_logs(self, start_day=None, end_day=None, account_id=None, live_only=False):
+        """模擬取得 OCR 記錄總數"""
+        return 0
+    
+    def clear_ocr_log_image(self, image_path, since=None):
+        """模擬清除記錄影像"""
+        return 0
+
+    def search_ocr_logs(self, query, start_date=None, end_date=None, limit=100):
+        """模擬搜尋 OCR 記錄"""
+        return []
+    
     def close(self):
         """關閉連接"""
         pass
@@ -271,22 +291,6 @@ class TcpClient:
         if self.socket:
             self.socket.close()
         self.is_connected = False
-class PingHost:
-    """Ping 主機"""
-    def __init__(self, host):
-        self.host = host
-    def ping(self)->bool:
-        """Ping 主機"""
-        try:
-            # Windows 使用 -n 參數, 其他系統使用 -c 參數
-            param = '-n' if sys.platform.lower()=='win32' else '-c'
-            # 執行 ping 指令並檢查回傳值
-            response = os.system(f"ping {param} 1 {self.host}")
-            return response == 0
-        except Exception as e:
-            print(f"Ping 失敗: {e}")
-            return False
-
 class InitDialog(QDialog):
     """初始化對話框"""
     def __init__(self, parent=None):
@@ -343,21 +347,19 @@ class InitDialog(QDialog):
         self.detail_label.setStyleSheet("font-size: 12px; color: #666;")
         layout.addWidget(self.detail_label)
         
-        self.setLayout(layout)
+        # 各項啟動工作的狀態
+        self.task_label = QLabel("")
+        self.task_label.setStyleSheet("font-size: 12px; color: #444; padding: 0 10px;")
+        layout.addWidget(self.task_label)
+        self.task_lines = {}
         
-        # 計時器
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_progress)
-        self.progress_value = 0
-        self.timer.start(100)  # 每100ms更新一次
-        
-    def update_progress(self):
-        """更新進度條"""
-        if self.progress_value < 90:
-            self.progress_value += 2
-            self.progress_bar.setValue(self.progress_value)
-        else:
-            self.progress_bar.setValue(90)
+        self.setLayout(layout)
+    
+    def set_task_status(self, name: str, text: str):
+        """設置單一啟動工作的狀態 (依加入順序顯示)"""
+        self.task_lines[name] = text
+        self.task_label.setText("\n".join(self.task_lines.values()))
+        self.setFixedSize(400, 200 + 20 * len(self.task_lines))
             
     def set_status(self, status: str, detail: str = ""):
         """設置狀態"""
@@ -377,7 +379,7 @@ class InitDialog(QDialog):
         self.detail_label.setText("系統已準備就緒")
         QApplication.processEvents()
         # 使用 QTimer 而不是 time.sleep 來避免阻塞
-        QTimer.singleShot(1000, self.accept)  # 1秒後關閉對話框
+        QTimer.singleShot(300, self.accept)  # 稍後關閉對話框
 
 class MainBridge(QObject):
     """主程式的橋接類別，處理 Python 和 JavaScript 之間的通信"""
@@ -386,11 +388,34 @@ class MainBridge(QObject):
     update_ui = pyqtSignal(str, str)  # 更新 UI 信號
     show_alert = pyqtSignal(str)      # 顯示警告信號
     show_result = pyqtSignal(str, bool)  # 顯示結果信號
+    ui_events = pyqtSignal(str)       # 推送到網頁的事件批次 (JSON 陣列 [{type, payload}])
+    _events_pending = pyqtSignal()    # 內部使用: 通知 GUI 線程排程送出事件
+    
+    # 狀態類事件同一批次只保留最後一筆 (其餘事件依序全部送出)
+    STATE_EVENTS = ('ocr_result', 'work_status', 'scale_params', 'show_image')
+    # 差異類事件同一批次合併欄位 (後面的值覆蓋前面的)
+    MERGED_EVENTS = ('state',)
+    # 事件合併的間隔 (毫秒，約一個畫面)
+    EVENT_FLUSH_INTERVAL = 16
     
     def __init__(self, config_manager: ConfigManager, view=None, main_window=None):
         super().__init__()
         self.config_manager = config_manager
         self.view = view
+        
+        # 網頁事件佇列，由 GUI 線程的計時器合併後以 ui_events 送出
+        self._pending_events = []
+        self._events_lock = threading.Lock()
+        self._event_timer = QTimer(self)
+        self._event_timer.setSingleShot(True)
+        self._event_timer.setInterval(self.EVENT_FLUSH_INTERVAL)
+        self._event_timer.timeout.connect(self.flush_events)
+        self._events_pending.connect(self._schedule_flush, Qt.QueuedConnection)
+        # 已推送到網頁的畫面狀態，heartbeat 只推送與此不同的欄位
+        self._ui_state = {}
+        self._ui_state_lock = threading.Lock()
+        self._heartbeat_timer = QTimer(self)
+        self._heartbeat_timer.timeout.connect(self.publish_state)
         self.main_window = main_window
         print(f"[{datetime.now().strftime('%H:%M:%S')}] MainBridge 初始化，main_window: {self.main_window}")
         self.tcp_client = None
@@ -404,6 +429,12 @@ class MainBridge(QObject):
         self.user_name = ""
         self.source_image_path = ""
         self.target_image_path = ""
+        self.image_archive = None   # 影像封存 (None 表示沿用舊的複製方式)
+        self._failed_archive_paths = set()  # 背景寫入失敗的封存影像 (記錄尚未寫入時由儲存流程清除 Image)
+        self._failed_archive_lock = threading.Lock()
+        self.display_cache = DisplayCache()  # 畫面顯示用的縮小影像
+        self._display_request = None    # 最近一次要求顯示的影像 (背景產生完成時判斷是否仍需更新)
+        self.image_scheme = None    # ocrimg:// 影像網址 (由 MainWindow 安裝)
         self.server_ip = "127.0.0.1"
         self.server_port = 8601
         self.server_port_cmd = 8604
@@ -415,113 +446,253 @@ class MainBridge(QObject):
         self.export_window = None   # 匯出視窗
         self.is_full_screen = True
         
-        # 載入設定
-        self.load_settings()
+        self.db_manager = None      # 由啟動工作連線
+        self.yolo_ocr = None        # 由 get_yolo_ocr 建立 (本機模型或 OCR 推論服務的用戶端)
+        self._yolo_lock = threading.Lock()
+        self._ocr_switching = False  # 正在背景載入其他 OCR 引擎設定檔
+        self.init_dialog = None
+        self.startup = None
+        self._shutdown_event = threading.Event()  # 程式結束時停止等待中的啟動工作
         
-        # 初始化資料庫
-        self.init_database()
+        # 載入設定 (目錄由啟動工作建立)
+        self.load_settings(ensure_dirs=False)
         
-        # 顯示初始化視窗
+        # 顯示初始化視窗並同時執行資料庫連線、CCD 連線檢查與模型載入
         self.show_init_dialog()
         
     def show_init_dialog(self):
-        """顯示初始化對話框"""
-        import datetime
+        """
+        顯示初始化對話框並同時執行啟動工作
         
-        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 開始創建初始化對話框")
-        # 創建初始化對話框
+        設定與目錄、資料庫連線為關鍵工作，完成後立即顯示主視窗；
+        CCD 連線檢查與模型預熱在背景繼續執行，結果顯示於主控台。
+        """
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] 開始創建初始化對話框")
         init_dialog = InitDialog()
-        
-        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 顯示初始化對話框")
-        # 顯示對話框
         init_dialog.show()
         init_dialog.raise_()  # 將對話框提到最前面
         init_dialog.activateWindow()  # 激活對話框
-        QApplication.processEvents()
+        init_dialog.set_status("系統初始化中...", "同時載入資料庫、CCD 連線與 AI 模型")
+        QApplication.processEvents()  # 先畫出對話框，不等主視窗與網頁建立完成
+        self.init_dialog = init_dialog
         
-        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 設置對話框狀態")
-        init_dialog.set_status("等待初始化 TROCR...", "正在載入 AI 模型...")
-        QApplication.processEvents()
+        startup = StartupOrchestrator(self)
+        self.startup = startup
+        startup.add_task('directories', "設定與目錄", self._startup_directories)
+        startup.add_task('database', "資料庫", self._startup_database)
+        startup.add_task('ccd', "CCD 連線", self._startup_ccd, critical=False)
+        startup.add_task('models', "AI 模型", self._startup_models, critical=False)
+        for task in startup.tasks.values():
+            init_dialog.set_task_status(task.name, f"{task.label}: 執行中...")
         
-        # 使用定時器延遲一瞬間確保對話框完全顯示
-        def delayed_init():
-            try:
-                # 初始化 TROCR
-                print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 開始初始化 TROCR...")
-                self.yolo_ocr = YOLOOCR()
-                print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] TROCR 初始化完成")
-                
-                # 更新狀態為網路檢查
-                print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 開始網路檢查")
-                init_dialog.set_status("等待網路就緒...", f"正在檢查 {self.server_ip} 連線...")
-                init_dialog.set_progress(50)
-                QApplication.processEvents()
-                
-                # 檢查網路連線
-                ping_host = PingHost(self.server_ip)
-                retry_count = 0
-                max_retries = 30  # 最多重試30次（30秒）
-                
-                while retry_count < max_retries:
-                    if ping_host.ping():
-                        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 網路連線成功: {self.server_ip}")
-                        break
-                    else:
-                        retry_count += 1
-                        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 網路連線失敗，第 {retry_count} 次重試...")
-                        init_dialog.set_status("等待網路就緒...", f"連線失敗，第 {retry_count} 次重試... ({self.server_ip})")
-                        QApplication.processEvents()
-                        time.sleep(1)
-                
-                if retry_count >= max_retries:
-                    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 網路連線超時: {self.server_ip}")
-                    init_dialog.set_status("網路連線超時", f"無法連接到 {self.server_ip}，請檢查網路設定")
-                    QApplication.processEvents()
-                    time.sleep(3)  # 顯示錯誤訊息3秒
-                
-                # 完成初始化
-                print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 初始化完成，準備關閉對話框")
-                init_dialog.complete()
-                
-                # 連接對話框關閉信號到顯示主視窗
-                def show_main_window():
-                    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 準備顯示主視窗...")
-                    if self.main_window:
-                        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 以全螢幕模式顯示主視窗")
-                        self.main_window.showFullScreen()  # 全螢幕顯示
-                        self.main_window.raise_()  # 將視窗提到最前面
-                        self.main_window.activateWindow()  # 激活視窗
-                    else:
-                        print("main_window 為 None")
-                
-                # 使用 QTimer 確保對話框完全關閉後再顯示主視窗
-                QTimer.singleShot(1500, show_main_window)
-                
-            except Exception as e:
-                import traceback
-                print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 初始化失敗: {e}")
-                print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 錯誤詳情: {traceback.format_exc()}")
-                init_dialog.set_status("初始化失敗", str(e))
-                QApplication.processEvents()
-                
-                # 即使初始化失敗也顯示主視窗
-                def show_main_window_on_error():
-                    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 初始化失敗，但仍顯示主視窗...")
-                    if self.main_window:
-                        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] 顯示主視窗")
-                        self.main_window.show()
-                        self.main_window.raise_()
-                        self.main_window.activateWindow()
-                    else:
-                        print("main_window 為 None")
-                
-                QTimer.singleShot(3500, show_main_window_on_error)
+        def on_progress(name, detail):
+            init_dialog.set_task_status(name, f"{startup.tasks[name].label}: {detail}")
+        
+        def on_finished(name, ok, detail):
+            task = startup.tasks[name]
+            state = "完成" if ok else "失敗"
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] 啟動工作 {task.label} {state} ({task.elapsed:.2f}s) {detail}")
+            init_dialog.set_task_status(name, f"{task.label}: {state} {detail}".rstrip())
+            init_dialog.set_progress(startup.progress())
+        
+        def on_critical_ready():
+            # 資料庫就緒後才啟動需要資料庫的背景工作與狀態推送
+            self.start_ocrlog_archiving()
+            self.start_image_retention()
+            self._heartbeat_timer.start(max(100, self.config_manager.Config.Ui.Heartbeat_Interval_Ms))
+            
+            init_dialog.complete()
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] 關鍵工作完成，顯示主視窗")
+            if self.main_window:
+                self.main_window.showFullScreen()  # 全螢幕顯示
+                self.main_window.raise_()  # 將視窗提到最前面
+                self.main_window.activateWindow()  # 激活視窗
+            else:
+                print("main_window 為 None")
+        
+        def on_all_done():
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] 啟動工作全部完成:")
+            for line in startup.summary():
+                print(f"  {line}")
+        
+        startup.task_progress.connect(on_progress)
+        startup.task_finished.connect(on_finished)
+        startup.critical_ready.connect(on_critical_ready)
+        startup.all_done.connect(on_all_done)
+        startup.start()
+    
+    def _startup_directories(self, task) -> str:
+        """啟動工作: 建立必要目錄 (網路磁碟可能較慢)"""
+        self.ensure_directories()
+        return ""
+    
+    def _startup_database(self, task) -> str:
+        """啟動工作: 連線資料庫、檢查資料表並還原今日計數器"""
+        task.report("連線中...")
+        self.init_database()
+        if not isinstance(self.db_manager, DatabaseManager):
+            return "無法連線，使用模擬資料庫"
+        task.report("還原今日計數...")
+        self.restore_counters()
+        return ""
+    
+    def _startup_ccd(self, task) -> str:
+        """啟動工作: 以 TCP 連線確認 CCD 可連線"""
+        timeout = self.config_manager.Config.Settings.Timing.Startup_CCD_Timeout
+        task.report(f"連線 {self.server_ip}:{self.server_port}...")
+        ok = wait_for_tcp(
+            self.server_ip, self.server_port, total_timeout=timeout,
+            on_retry=lambda attempt: task.report(f"連線失敗，第 {attempt} 次重試... ({self.server_ip})"),
+            stop_event=self._shutdown_event
+        )
+        if not ok:
+            raise ConnectionError(f"無法連接到 {self.server_ip}:{self.server_port}，請檢查網路設定")
+        return f"{self.server_ip}:{self.server_port}"
+    
+    def _startup_models(self, task) -> str:
+        """啟動工作: 匯入 yolo_ocr、載入 YOLO / TrOCR 模型並預熱"""
+        task.report("匯入模組...")
+        yolo_ocr = self.get_yolo_ocr()
+        task.report("載入中...")
+        elapsed = yolo_ocr.warm_up()
+        return f"{yolo_ocr.get_model_info()['device']} {elapsed / 1000:.1f}s"
+    
+    def get_yolo_ocr(self):
+        """
+        取得 YOLO OCR 處理器 (背景預熱中時等待建立完成)
+        
+        ocr_service.mode 為 server 時為 OCR 推論服務的用戶端，否則第一次呼叫時匯入 yolo_ocr 並載入模型。
+        """
+        if self.yolo_ocr is None:
+            with self._yolo_lock:
+                if self.yolo_ocr is None:
+                    self.yolo_ocr = create_ocr_engine(self.config_manager.Config)
+        return self.yolo_ocr
+    
+    def switch_ocr_profile(self, name: str) -> Optional[str]:
+        """
+        切換 OCR 引擎設定檔 (不需重新啟動)
+        
+        新設定檔的模型在背景線程載入並預熱後才替換，切換期間檢測繼續使用原本的設定檔；
+        完成或失敗時以 alert 事件通知網頁。載入期間兩份模型同時佔用記憶體，
+        替換後原本的處理器在進行中的辨識完成後關閉並釋放模型。
         
-        # 延遲一點點時間確保對話框完全顯示
-        QTimer.singleShot(100, delayed_init)
+        Args:
+            name: 設定檔名稱
+        
+        Returns:
+            無法切換時的錯誤訊息，開始切換時為 None
+        """
+        config = self.config_manager.Config
+        try:
+            config.Settings.OCR_Engine.get_profile(name)
+        except ValueError as e:
+            return str(e)
+        if config.Settings.OCR_Service.Mode == "server":
+            return "使用 OCR 推論服務時，設定檔由服務端指定 (python ocr_service.py --profile)"
+        if self._ocr_switching:
+            return "OCR 引擎切換中，請稍後再試"
+        
+        self._ocr_switching = True
+        threading.Thread(target=self._load_ocr_profile, args=(name,), name="ocr-profile", daemon=True).start()
+        return None
     
-    def load_settings(self):
-        """載入設定"""
+    def _load_ocr_profile(self, name: str):
+        """載入並預熱設定檔的模型後替換目前的 OCR 處理器 (背景線程)"""
+        try:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] 載入 OCR 引擎設定檔: {name}")
+            yolo_ocr = create_ocr_engine(self.config_manager.Config, profile=name)
+            elapsed = yolo_ocr.warm_up()
+            with self._yolo_lock:
+                previous, self.yolo_ocr = self.yolo_ocr, yolo_ocr
+            if previous is not None and not previous.close(timeout=60):
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] 原本的 OCR 引擎 60 秒內未完成辨識，將在辨識結束後釋放")
+            self.config_manager.Config.Settings.OCR_Engine.Profile = name
+            self.config_manager.save_config()
+            device = yolo_ocr.get_model_info()['device']
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] OCR 引擎已切換為 {name} ({device}，{elapsed / 1000:.1f}s)")
+            self.push_event('alert', {'message': f'OCR 引擎已切換為 {name} ({device})'})
+        except Exception as e:
+            print(f"切換 OCR 引擎設定檔失敗: {e}")
+            self.push_event('alert', {'message': f'切換 OCR 引擎設定檔失敗: {e}'})
+        finally:
+            self._ocr_switching = False
+    
+    def push_event(self, event_type: str, payload: Optional[Dict[str, Any]] = None):
+        """
+        推送事件到網頁 (可由任何線程呼叫)
+        
+        事件先放入佇列，約一個畫面的時間內的事件合併為一次 ui_events 信號送出。
+        
+        Args:
+            event_type: 事件類型 (alert, ocr_result, result, show_image, no_image, work_status, scale_params, login_result, state)
+            payload: 事件資料
+        """
+        with self._events_lock:
+            if event_type in self.MERGED_EVENTS:
+                pending = next((e for e in self._pending_events if e['type'] == event_type), None)
+                if pending:
+                    pending['payload'].update(payload or {})
+                    return
+                payload = dict(payload or {})
+            elif event_type in self.STATE_EVENTS:
+                self._pending_events = [e for e in self._pending_events if e['type'] != event_type]
+            self._pending_events.append({'type': event_type, 'payload': payload or {}})
+            schedule = len(self._pending_events) == 1
+        if schedule:
+            self._events_pending.emit()
+    
+    def _schedule_flush(self):
+        """在 GUI 線程啟動合併計時器"""
+        if not self._event_timer.isActive():
+            self._event_timer.start()
+    
+    def flush_events(self):
+        """
+        立即送出佇列中的事件
+        
+        GUI 線程接下來會長時間忙碌 (如等待 OCR) 時先呼叫，讓畫面先行更新。
+        """
+        with self._events_lock:
+            events = self._pending_events
+            self._pending_events = []
+        if events:
+            self.ui_events.emit(json.dumps(events, ensure_ascii=False))
+    
+    def ui_state_snapshot(self) -> Dict[str, Any]:
+        """目前的畫面狀態 (計數、帳號、操作員、資料庫連線)"""
+        return {
+            'total_count': self.test_counter,
+            'ng_count': self.ng_counter,
+            'account': self.account,
+            'operator': self.selected_operator,
+            'db_online': isinstance(self.db_manager, DatabaseManager),
+        }
+    
+    def publish_state(self):
+        """
+        推送畫面狀態的變動 (heartbeat 計時器定時呼叫，計數改變時也會立即呼叫)
+        
+        只送出與上次推送不同的欄位，沒有變動時不產生事件。時間顯示由網頁自行更新。
+        """
+        try:
+            self.reset_counters_if_new_day()
+            state = self.ui_state_snapshot()
+            with self._ui_state_lock:
+                delta = {key: value for key, value in state.items() if self._ui_state.get(key) != value}
+                self._ui_state.update(delta)
+            if delta:
+                self.push_event('state', delta)
+        except Exception as e:
+            print(f"推送畫面狀態失敗: {e}")
+    
+    def load_settings(self, ensure_dirs: bool = True):
+        """
+        載入設定
+        
+        Args:
+            ensure_dirs: 是否立即建立必要目錄 (啟動時由背景工作建立)
+        """
         try:
             config = self.config_manager.Config
             # 使用新的設定結構
@@ -530,9 +701,15 @@ class MainBridge(QObject):
             self.server_ip = config.Settings.Cognex.IP
             self.server_port = config.Settings.Cognex.Port
             self.server_port_cmd = config.Settings.Cognex.Port_Cmd
+            self.image_archive = create_image_archive(self.target_image_path, config)
+            if self.image_archive:
+                self.image_archive.on_error = self.on_archive_error
+            self.display_cache = DisplayCache(display_max_side=config.Settings.Image_Processing.Display_Max_Side,
+                                              max_size_mb=config.Settings.Performance.Image_Cache_Size_MB)
             
             # 確保目錄存在
-            self.ensure_directories()
+            if ensure_dirs:
+                self.ensure_directories()
         except Exception as e:
             print(f"載入設定失敗: {e}")
             # 使用預設值
@@ -541,7 +718,8 @@ class MainBridge(QObject):
             self.server_ip = '127.0.0.1'
             self.server_port = 502
             self.server_port_cmd = 503
-            self.ensure_directories()
+            if ensure_dirs:
+                self.ensure_directories()
     
     def ensure_directories(self):
         """確保必要目錄存在"""
@@ -600,34 +778,57 @@ class MainBridge(QObject):
                 pass
                 
         return normalized
-    def image_to_base64(self, image_path: str) -> str:
-        """將圖片檔案轉換為 base64 字串"""
-        try:
-            if not image_path or not os.path.exists(image_path):
-                print(f"圖片檔案不存在: {image_path}")
-                return None
-            
-            with open(image_path, 'rb') as image_file:
-                image_data = image_file.read()
-                base64_string = base64.b64encode(image_data).decode('utf-8')
-                
-                # 根據檔案副檔名決定 MIME 類型
-                ext = os.path.splitext(image_path)[1].lower()
-                if ext in ['.jpg', '.jpeg']:
-                    mime_type = 'image/jpeg'
-                elif ext == '.png':
-                    mime_type = 'image/png'
-                elif ext == '.bmp':
-                    mime_type = 'image/bmp'
-                elif ext == '.gif':
-                    mime_type = 'image/gif'
-                else:
-                    mime_type = 'image/jpeg'  # 預設
-                
-                return f"data:{mime_type};base64,{base64_string}"
-        except Exception as e:
-            print(f"轉換圖片為 base64 失敗: {e}")
-            return None
+    
+    def push_show_image(self, image_path: str, scale_params: Optional[Dict[str, Any]] = None):
+        """
+        推送 show_image 事件 (不在 GUI 線程解碼影像)
+        
+        顯示用影像已快取時直接使用；否則先顯示原圖，縮小影像在背景線程產生後再更新
+        (產生期間已改為顯示其他影像時不更新)。
+        """
+        self._display_request = image_path
+        display = self.display_cache.cached(image_path)
+        self.push_event('show_image', self.build_show_image_payload(image_path, display, scale_params))
+        if display:
+            return
+        
+        def on_ready(display):
+            if display and self._display_request == image_path:
+                self.push_event('show_image', self.build_show_image_payload(image_path, display, scale_params))
+        self.display_cache.prepare_async(image_path, on_ready)
+    
+    def build_show_image_payload(self, image_path: str, display: Optional[Dict[str, Any]],
+                                 scale_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        產生 show_image 事件資料
+        
+        網頁載入顯示用的縮小影像，並依原圖尺寸計算座標；display 為 None 時直接顯示原圖。
+        """
+        if display:
+            image_url = self.image_url(display['display'])
+            image_info = {
+                'width': display['width'],
+                'height': display['height'],
+                # 放大版在背景產生，登記時檔案可能尚未寫入
+                'zoomUrl': self.image_url(display['zoom'], must_exist=False)
+            }
+        else:
+            image_url = self.image_url(image_path)
+            image_info = None
+        print(f"顯示圖片: {image_path} -> {image_url}")
+        return {'url': image_url, 'scaleParams': scale_params, 'imageInfo': image_info}
+    
+    def image_url(self, file_path: str, must_exist: bool = True) -> str:
+        """
+        取得網頁載入影像用的網址
+        
+        使用 ocrimg:// scheme (由 ImageSchemeHandler 串流檔案)，未安裝時退回 file:// 路徑
+        """
+        if self.image_scheme:
+            url = self.image_scheme.url_for_file(file_path, must_exist)
+            if url:
+                return url
+        return self.normalize_path_for_web(file_path)
     
     def init_database(self):
         """初始化資料庫"""
@@ -715,7 +916,7 @@ class MainBridge(QObject):
                 print(f"登入失敗: {result}")
                 # 觸發認證失敗事件
                 
-                self.view.run_javascript('access_login_result(' + json.dumps(result, ensure_ascii=False) + ')')
+                self.push_event('login_result', result)
                 #return json.dumps(result, ensure_ascii=False)
             
             login_data = json.loads(login_data_json)
@@ -732,7 +933,7 @@ class MainBridge(QObject):
                 print(f"登入失敗: {result}")
                 # 觸發認證失敗事件
                 
-                self.view.run_javascript('access_login_result(' + json.dumps(result, ensure_ascii=False) + ')')
+                self.push_event('login_result', result)
                 #return json.dumps(result, ensure_ascii=False)
             
             # 查詢資料庫驗證帳號密碼
@@ -746,7 +947,7 @@ class MainBridge(QObject):
                 print(f"登入失敗: {result}")
                 # 觸發認證失敗事件
                 
-                self.view.run_javascript('access_login_result(' + json.dumps(result, ensure_ascii=False) + ')')
+                self.push_event('login_result', result)
                 #return json.dumps(result, ensure_ascii=False)
             
             # 驗證密碼
@@ -758,7 +959,7 @@ class MainBridge(QObject):
                 print(f"登入失敗: {result}")
                 # 觸發認證失敗事件
                 
-                self.view.run_javascript('access_login_result(' + json.dumps(result, ensure_ascii=False) + ')')
+                self.push_event('login_result', result)
                 #return json.dumps(result, ensure_ascii=False)
             
             # 登入成功，返回帳號資訊
@@ -791,7 +992,7 @@ class MainBridge(QObject):
             }
             
             print(f"[CRASH_DEBUG] 準備執行 JavaScript，時間: {datetime.now()}")
-            self.view.run_javascript('access_login_result(' + json.dumps(result, ensure_ascii=False) + ')')
+            self.push_event('login_result', result)
             print(f"[CRASH_DEBUG] JavaScript 執行完成，時間: {datetime.now()}")
             #return json.dumps(result, ensure_ascii=False)
             
@@ -869,8 +1070,7 @@ class MainBridge(QObject):
             print(f"連接 CCD 花費時間: {connect_time:.0f} ms")
             
             if not success:
-                if self.view:
-                    self.view.run_javascript('showAlert("'+message+'")')
+                self.push_event('alert', {'message': message})
                 return False, message
             
             # 等待圖片檔案
@@ -880,19 +1080,17 @@ class MainBridge(QObject):
             print(f"等待圖片檔案花費時間: {wait_time:.0f} ms")
             
             if not image_file:
-                if self.view:
-                    self.view.run_javascript('showAlert("等待圖片檔案超時")')
+                self.push_event('alert', {'message': '等待圖片檔案超時'})
                 return False, 'wait_pic_timeout'
             
             self.ocr_check_info.source_image_path = image_file
             
-            # 顯示圖片
+            # 顯示圖片 (使用縮小的顯示用影像)
             start_show = datetime.now()
-            if self.view and image_file:
-                # 將路徑轉換為 Web 友好的格式
-                image_url = self.normalize_path_for_web(image_file)
-                print(f"顯示圖片: {image_file} -> {image_url}")
-                self.view.run_javascript(f'showImage("{image_url}")')
+            if image_file:
+                self.push_show_image(image_file)
+                # 接下來等待 OCR 期間 GUI 線程忙碌，先送出讓圖片立即顯示
+                self.flush_events()
             show_time = (datetime.now() - start_show).total_seconds() * 1000
             print(f"顯示圖片花費時間: {show_time:.0f} ms")
             
@@ -910,7 +1108,11 @@ class MainBridge(QObject):
                 
                 try:
                     
-                    yolo_result = self.yolo_ocr.access_ocr(image_file)
+                    yolo_ocr = self.get_yolo_ocr()
+                    yolo_result = yolo_ocr.access_ocr(image_file)
+                    # 取得處理器後剛好切換設定檔時原本的處理器已關閉，改用新的處理器重試一次
+                    if not yolo_result['success'] and self.yolo_ocr is not yolo_ocr:
+                        yolo_result = self.get_yolo_ocr().access_ocr(image_file)
                     
                     if yolo_result['success'] and yolo_result['results']:
                         # 取得所有識別的文字並串接
@@ -933,12 +1135,10 @@ class MainBridge(QObject):
                     print(f"YOLO OCR 執行失敗: {e}")
             
             if not ocr_result:
-                if self.view:
-                    self.view.run_javascript('showAlert("取得OCR字串失敗")')
+                self.push_event('alert', {'message': '取得OCR字串失敗'})
                 return False, 'ocr_error'
             else:
-                if self.view:
-                    self.view.run_javascript('setOCRResult("'+ocr_result+'")')
+                self.push_event('ocr_result', {'text': ocr_result})
             self.ocr_result = ocr_result
             
             # 檢查結果
@@ -947,8 +1147,7 @@ class MainBridge(QObject):
                 self.test_counter += 1
                 self.ocr_check_info.is_correct = True
                 self.update_counters()
-                if self.view:
-                    self.view.run_javascript('showSuccessResult()')
+                self.push_event('result', {'ok': True})
                 check_time = (datetime.now() - start_check).total_seconds() * 1000
                 print(f"檢查結果花費時間: {check_time:.0f} ms")
                 return True, 'success'
@@ -957,16 +1156,14 @@ class MainBridge(QObject):
                 self.ng_counter += 1
                 self.ocr_check_info.is_correct = False
                 self.update_counters()
-                if self.view:
-                    self.view.run_javascript('showErrorResult()')
+                self.push_event('result', {'ok': False})
                 check_time = (datetime.now() - start_check).total_seconds() * 1000
                 print(f"檢查結果花費時間: {check_time:.0f} ms")
                 return True, 'error'
                 
         except Exception as e:
             print(f"OCR 測試失敗: {e}")
-            if self.view:
-                self.view.run_javascript('showAlert("'+str(e)+'")')
+            self.push_event('alert', {'message': str(e)})
             return False, 'error'
     
     def connect_ccd(self) -> tuple[bool, str]:
@@ -1132,35 +1329,96 @@ class MainBridge(QObject):
         except Exception as e:
             print(f"清空來源目錄失敗: {e}")
     
+    def reset_counters_if_new_day(self):
+        """換日時重置計數器"""
+        current_date = datetime.today()
+        if current_date.date() != self.today.date():
+            self.today = current_date
+            self.test_counter = 0
+            self.ng_counter = 0
+    
     def update_counters(self):
         """更新計數器"""
         try:
             # 檢查是否需要重置計數器（新的一天）
-            current_date = datetime.today()
-            if current_date.date() != self.today.date():
-                self.today = current_date
-                self.test_counter = 0
-                self.ng_counter = 0
+            self.reset_counters_if_new_day()
             
             # 這裡可以保存到資料庫或設定檔
             print(f"測試次數: {self.test_counter}, NG次數: {self.ng_counter}")
             
+            # 計數改變時立即推送，不等下一次 heartbeat
+            self.publish_state()
+            
         except Exception as e:
             print(f"更新計數器失敗: {e}")
     
+    def restore_counters(self):
+        """從每日統計表還原今日計數器（重新啟動後不歸零）"""
+        try:
+            if not self.db_manager:
+                return
+            today = datetime.today().date()
+            daily = self.db_manager.get_daily_statistics(today, today)
+            if daily:
+                self.test_counter = daily[0]['total_count']
+                self.ng_counter = daily[0]['ng_count']
+            self.today = datetime.today()
+            print(f"還原今日計數器 - 測試次數: {self.test_counter}, NG次數: {self.ng_counter}")
+        except Exception as e:
+            print(f"還原計數器失敗: {e}")
+    
+    def start_ocrlog_archiving(self):
+        """依備份設定在背景線程封存超過保留月數的 OCR 記錄 (ocrlog_live_months 為 0 時不執行)"""
+        if not isinstance(self.db_manager, DatabaseManager):
+            return
+        try:
+            archiver = create_archiver(self.db_manager, self.config_manager.Config)
+            if archiver is None:
+                return
+            
+            def run():
+                try:
+                    results = archiver.apply_retention()
+                    if results:
+                        print(f"OCR 記錄封存完成: {results}")
+                except Exception as e:
+                    print(f"OCR 記錄封存失敗: {e}")
+            
+            threading.Thread(target=run, name="ocrlog-archive", daemon=True).start()
+        except Exception as e:
+            print(f"啟動 OCR 記錄封存失敗: {e}")
+    
+    def start_image_retention(self):
+        """依備份設定在背景線程縮小超過保留天數的 OK 影像 (image_ok_downsample_days 為 0 時不執行)"""
+        if not self.image_archive or not self.image_archive.ok_downsample_days:
+            return
+        
+        def run():
+            try:
+                results = self.image_archive.apply_retention()
+                if results:
+                    print(f"OK 影像縮小完成: {results}")
+            except Exception as e:
+                print(f"OK 影像縮小失敗: {e}")
+        
+        threading.Thread(target=run, name="image-retention", daemon=True).start()
+    
     @pyqtSlot(result=str)
     def get_current_info(self) -> str:
-        """取得當前資訊"""
+        """
+        取得當前資訊 (完整的畫面狀態)
+        
+        網頁載入時呼叫一次取得完整狀態，之後由 state 事件推送變動的欄位。
+        """
         try:
+            self.reset_counters_if_new_day()
+            state = self.ui_state_snapshot()
+            with self._ui_state_lock:
+                self._ui_state = dict(state)
+            state['user_name'] = self.user_name
             return json.dumps({
                 'success': True,
-                'data': {
-                    'date': datetime.now().strftime('%Y/%m/%d'),
-                    'time': datetime.now().strftime('%H:%M:%S'),
-                    'total_count': self.test_counter,
-                    'ng_count': self.ng_counter,
-                    'user_name': self.user_name
-                }
+                'data': state
             }, ensure_ascii=False)
         except Exception as e:
             return json.dumps({
@@ -1218,8 +1476,7 @@ class MainBridge(QObject):
         """顯示圖片"""
         try:
             if not image_path or not os.path.exists(image_path):
-                if self.view:
-                    self.view.run_javascript('showNoImage()')
+                self.push_event('no_image')
                 return json.dumps({
                     'success': False,
                     'error': '圖片檔案不存在'
@@ -1235,22 +1492,8 @@ class MainBridge(QObject):
             
             print(f"圖片處理參數: scale={scale_params['scale']}, offsetX={scale_params['offsetX']}, offsetY={scale_params['offsetY']}")
             
-            # 轉換為 Web 友好的路徑格式
-            if self.view:
-                # 將路徑轉換為 Web 友好的格式
-                image_url = self.normalize_path_for_web(image_path)
-                print(f"手動顯示圖片: {image_path} -> {image_url}")
-                
-                # 先設定縮放參數，再顯示圖片
-                js_code = f"""
-                CanvasImage.setScaleParams({scale_params['scale']}, {scale_params['offsetX']}, {scale_params['offsetY']});
-                showImage("{image_url}", {{
-                    scale: {scale_params['scale']},
-                    offsetX: {scale_params['offsetX']},
-                    offsetY: {scale_params['offsetY']}
-                }});
-                """
-                self.view.run_javascript(js_code)
+            # 顯示圖片並套用縮放參數
+            self.push_show_image(image_path, scale_params)
             
             return json.dumps({
                 'success': True,
@@ -1268,8 +1511,7 @@ class MainBridge(QObject):
     def set_work_status(self, status: str) -> str:
         """設定工作狀態"""
         try:
-            if self.view:
-                self.view.run_javascript(f'setWorkStatus("{status}")')
+            self.push_event('work_status', {'status': status})
             
             return json.dumps({
                 'success': True,
@@ -1291,8 +1533,7 @@ class MainBridge(QObject):
             offset_x = params.get('offset_x', 0)
             offset_y = params.get('offset_y', 0)
             
-            if self.view:
-                self.view.run_javascript(f'setScaleParams({scale}, {offset_x}, {offset_y})')
+            self.push_event('scale_params', {'scale': scale, 'offsetX': offset_x, 'offsetY': offset_y})
             
             return json.dumps({
                 'success': True,
@@ -1383,6 +1624,9 @@ class MainBridge(QObject):
             # 儲存到資料庫
             success = self.db_manager.create_ocr_log(log_data)
             
+            if success and saved_image_path:
+                self.clear_failed_archive_image(saved_image_path)
+            
             if success:
                 # 重置檢查資訊
                 self.ocr_check_info = OCRCheckInfo()
@@ -1439,6 +1683,9 @@ class MainBridge(QObject):
             else:
                 c_path = "Err"
             
+            if self.image_archive:
+                return self.archive_image(source_image_path, c_path, keyword)
+            
             # 建立目錄結構: Target_Image_Path/cPath/yyMM/yyMMdd/
             now = datetime.now()
             base_path = os.path.join(self.target_image_path, c_path)
@@ -1466,6 +1713,61 @@ class MainBridge(QObject):
             print(f"儲存圖片失敗: {e}")
             return ""
     
+    def archive_image(self, source_image_path: str, c_path: str, keyword: str) -> str:
+        """
+        以內容雜湊儲存圖片並產生縮圖，Err 類型另外複製一份到備份路徑
+        
+        NG/Err 影像等待寫入完成 (失敗時由 save_image 回傳空字串，記錄不會指向不存在的檔案)；
+        OK 影像在背景寫入，失敗時由 on_archive_error 清除記錄的 Image。備份直接由來源影像複製。
+        """
+        now = datetime.now()
+        file_path = self.image_archive.store(source_image_path, c_path, now, wait=(c_path != "OK"))
+        
+        backup_base = self.config_manager.Config.Settings.Paths.OCR_Backup_Path
+        if c_path == "Err" and backup_base and os.path.exists(backup_base):
+            backup_day = os.path.join(backup_base, c_path, now.strftime("%y%m"), now.strftime("%y%m%d"))
+            os.makedirs(backup_day, exist_ok=True)
+            
+            # 檔名加上雜湊前 8 碼，不會與其他影像重複
+            source_code = getattr(self.ocr_check_info, 'source_code', 'UNKNOWN')
+            digest = os.path.splitext(os.path.basename(file_path))[0]
+            ext = os.path.splitext(source_image_path)[1]
+            filename = f"{source_code}_{now.strftime('%y%m%d')}_{now.strftime('%H%M%S')}_{keyword}_{digest[:8]}{ext}"
+            import shutil
+            shutil.copy2(source_image_path, os.path.join(backup_day, filename))
+        
+        return file_path
+    
+    def on_archive_error(self, image_path: str, error: Exception):
+        """
+        封存影像寫入失敗 (寫入線程)，清除指向該影像的記錄 Image 並通知網頁
+        
+        記錄可能尚未寫入資料庫，因此先記下路徑，由 clear_failed_archive_image 在新增記錄後處理。
+        """
+        print(f"封存影像寫入失敗 {image_path}: {error}")
+        with self._failed_archive_lock:
+            self._failed_archive_paths.add(image_path)
+        # 只需處理近期記錄 (可利用 Time 索引)
+        self.db_manager.clear_ocr_log_image(image_path, datetime.now() - timedelta(days=1))
+        self.push_event('alert', {'message': f'影像儲存失敗: {os.path.basename(image_path)} ({error})'})
+    
+    def clear_failed_archive_image(self, image_path: str):
+        """新增記錄後，若其影像已寫入失敗則清除該記錄的 Image"""
+        with self._failed_archive_lock:
+            if image_path not in self._failed_archive_paths:
+                return
+            self._failed_archive_paths.discard(image_path)
+        if os.path.exists(image_path):
+            return  # 相同內容的影像之後已重新寫入
+        self.db_manager.clear_ocr_log_image(image_path, datetime.now() - timedelta(days=1))
+    
+    def attach_thumbnails(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """在 OCR 記錄加上縮圖網址 (Thumbnail，沒有縮圖時為 None)"""
+        for log in logs:
+            thumbnail = ImageArchive.thumbnail_path(log.get('Image'))
+            log['Thumbnail'] = self.image_url(thumbnail) if thumbnail else None
+        return logs
+    
     def save_ccd_image(self, c_path: str, backup_path: str, keyword: str, source_image_path: str) -> str:
         """儲存 CCD 圖片，包含檔案命名和重複處理邏輯"""
         try:
@@ -1533,8 +1835,8 @@ class MainBridge(QObject):
                 from PyQt5.QtWidgets import QApplication
                 from PyQt5.QtGui import QPixmap, QScreen
                 from PyQt5.QtCore import Qt
+                import numpy as np
                 from PIL import Image
-                import io
                 
                 # 取得應用程式實例
                 app = QApplication.instance()
@@ -1682,6 +1984,83 @@ class MainBridge(QObject):
                 'error': str(e)
             }, ensure_ascii=False)
     
+    @pyqtSlot(str, result=str)
+    def get_ocr_log_page(self, params_json: str) -> str:
+        """
+        分頁查詢歷史紀錄 (keyset 分頁，啟用 ocrlog 封存時涵蓋已封存的月份)
+        
+        參數 (JSON): limit, cursor (上一頁回傳的 next_cursor，第一頁為 null),
+                     start_date / end_date (YYYY-MM-DD，可選), account (可選)
+        """
+        try:
+            params = json.loads(params_json) if params_json else {}
+            limit = params.get('limit', 100)
+            account_id = params.get('account') or None
+            
+            start_day = end_day = None
+            if params.get('start_date'):
+                start_day = datetime.strptime(params['start_date'], '%Y-%m-%d').date()
+            if params.get('end_date'):
+                end_day = datetime.strptime(params['end_date'], '%Y-%m-%d').date()
+            
+            # 已啟用 ocrlog 封存時，資料表的記錄翻完後接續讀取封存檔
+            archiver = create_archiver(self.db_manager, self.config_manager.Config)
+            page = (archiver or self.db_manager).get_ocr_logs_page(
+                limit=limit,
+                cursor=params.get('cursor'),
+                start_date=datetime.combine(start_day, datetime.min.time()) if start_day else None,
+                end_date=datetime.combine(end_day, datetime.max.time()) if end_day else None,
+                account_id=account_id
+            )
+            
+            # 總筆數由每日統計表取得 (未啟用封存時不含已封存的月份)，只在第一頁查詢
+            total = None
+            if not params.get('cursor'):
+                total = self.db_manager.count_ocr_logs(start_day, end_day, account_id, live_only=archiver is None)
+            
+            return json.dumps({
+                'success': True,
+                'data': self.attach_thumbnails(page['items']),
+                'next_cursor': page['next_cursor'],
+                'total': total
+            }, ensure_ascii=False)
+        except Exception as e:
+            return json.dumps({
+                'success': False,
+                'error': str(e)
+            }, ensure_ascii=False)
+    
+    @pyqtSlot(str, result=str)
+    def search_ocr_logs(self, params_json: str) -> str:
+        """
+        以部分標籤代碼搜尋歷史紀錄
+        
+        參數 (JSON): query, limit, start_date / end_date (YYYY-MM-DD，可選)
+        """
+        try:
+            params = json.loads(params_json) if params_json else {}
+            start_date = end_date = None
+            if params.get('start_date'):
+                start_date = datetime.combine(datetime.strptime(params['start_date'], '%Y-%m-%d').date(), datetime.min.time())
+            if params.get('end_date'):
+                end_date = datetime.combine(datetime.strptime(params['end_date'], '%Y-%m-%d').date(), datetime.max.time())
+            
+            logs = self.db_manager.search_ocr_logs(
+                params.get('query', ''),
+                start_date=start_date,
+                end_date=end_date,
+                limit=params.get('limit', 100)
+            )
+            return json.dumps({
+                'success': True,
+                'data': self.attach_thumbnails(logs)
+            }, ensure_ascii=False)
+        except Exception as e:
+            return json.dumps({
+                'success': False,
+                'error': str(e)
+            }, ensure_ascii=False)
+    
     @pyqtSlot(str, result=str)
     def do_action(self, action_data_json: str) -> str:
         """執行動作"""
@@ -1803,6 +2182,7 @@ class MainBridge(QObject):
             
             if not self.account_window:
                 # 建立新的帳號管理視窗
+                from account import AccountManagerWindow
                 self.account_window = AccountManagerWindow(self.db_manager)
                 # 設定為最上層視窗
                 self.account_window.setWindowFlags(Qt.WindowStaysOnTopHint)
@@ -2080,6 +2460,7 @@ class MainBridge(QObject):
                     default_dir = ''
                 
                 try:
+                    from export import ExportWindow
                     self.export_window = ExportWindow(default_dir, self.db_manager)
                     # 設定為最上層視窗
                     self.export_window.setWindowFlags(Qt.WindowStaysOnTopHint)
@@ -2117,6 +2498,9 @@ class MainBridge(QObject):
     def on_export_window_closed(self, event):
         """匯出視窗關閉事件"""
         print("匯出視窗已關閉")
+        # 關閉前取消並等待背景匯出結束，避免線程在視窗釋放後仍在執行
+        if self.export_window:
+            self.export_window.cancel_export(wait=True)
         self.export_window = None
         event.accept()
     
@@ -2146,6 +2530,11 @@ class MainBridge(QObject):
                 'timing': {
                     'ocr_retry_time': config.Settings.Timing.OCR_Retry_Time,
                     'pic_wait_time': config.Settings.Timing.Pic_Wait_Time
+                },
+                'ocr_engine': {
+                    'profile': config.Settings.OCR_Engine.Profile,
+                    'profiles': list(config.Settings.OCR_Engine.Profiles),
+                    'switching': self._ocr_switching
                 }
             }
             
@@ -2233,6 +2622,14 @@ class MainBridge(QObject):
                     'error': '圖片等待時間不得小於1000毫秒'
                 }, ensure_ascii=False)
             
+            # 驗證 OCR 引擎設定檔
+            ocr_profile = settings_data.get('ocr_engine', {}).get('profile', '')
+            if ocr_profile and ocr_profile not in self.config_manager.Config.Settings.OCR_Engine.Profiles:
+                return json.dumps({
+                    'success': False,
+                    'error': f'未知的 OCR 引擎設定檔: {ocr_profile}'
+                }, ensure_ascii=False)
+            
             # 更新設定
             config = self.config_manager.Config
             
@@ -2264,9 +2661,15 @@ class MainBridge(QObject):
             # 重新載入設定到記憶體
             self.load_settings()
             
+            # 切換 OCR 引擎設定檔 (背景載入，完成後才替換)
+            message = '設定儲存成功'
+            if ocr_profile and ocr_profile != config.Settings.OCR_Engine.Profile:
+                error = self.switch_ocr_profile(ocr_profile)
+                message += f'，{error}' if error else f'，OCR 引擎切換為 {ocr_profile} 中'
+            
             return json.dumps({
                 'success': True,
-                'message': '設定儲存成功'
+                'message': message
             }, ensure_ascii=False)
             
         except Exception as e:
@@ -2331,10 +2734,7 @@ class WebViewWrapper:
     def run_javascript(self, js_code):
         """執行 JavaScript 代碼"""
         try:
-            print(f"[CRASH_DEBUG] WebViewWrapper 開始執行 JavaScript: {datetime.now()}")
-            print(f"[CRASH_DEBUG] JavaScript 代碼長度: {len(js_code)}")
             self.web_view.page().runJavaScript(js_code)
-            print(f"[CRASH_DEBUG] WebViewWrapper JavaScript 執行完成: {datetime.now()}")
         except Exception as e:
             print(f"[CRASH_DEBUG] WebViewWrapper 執行 JavaScript 失敗: {e}")
             import traceback
@@ -2370,6 +2770,10 @@ class MainWindow(QMainWindow):
         self.web_view.setContextMenuPolicy(Qt.NoContextMenu)
         layout.addWidget(self.web_view)
         
+        # 影像以 ocrimg:// 提供給網頁 (不經過 base64 / file://)
+        self.image_scheme_handler = ImageSchemeHandler(self)
+        self.image_scheme_handler.install(self.web_view.page().profile())
+        
         # 建立 WebChannel
         self.channel = QWebChannel()
         self.web_view.page().setWebChannel(self.channel)
@@ -2395,6 +2799,7 @@ class MainWindow(QMainWindow):
         web_wrapper = WebViewWrapper(self.web_view)
         print(f"創建 MainBridge，main_window: {self}")
         self.bridge = MainBridge(self.config_manager, web_wrapper, self)
+        self.bridge.image_scheme = self.image_scheme_handler
         
         # 註冊橋接物件
         self.channel.registerObject('api', self.bridge)
@@ -2419,38 +2824,11 @@ class MainWindow(QMainWindow):
             self.setWindowIcon(QIcon('icon.ico'))
         except:
             pass
-        
-        # 設定定時器更新時間
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_time)
-        self.timer.start(1000)  # 每秒更新一次
-    
-    def update_time(self):
-        """更新時間"""
-        try:
-            current_time = datetime.now().strftime('%H:%M:%S')
-            current_date = datetime.now().strftime('%Y/%m/%d')
-            
-            # 透過 JavaScript 更新時間，添加元素存在檢查
-            js_code = f"""
-            (function() {{
-                var timeElement = document.getElementById('currentTime');
-                var dateElement = document.getElementById('currentDate');
-                if (timeElement) timeElement.textContent = '{current_time}';
-                if (dateElement) dateElement.textContent = '{current_date}';
-            }})();
-            """
-            self.web_view.page().runJavaScript(js_code)
-        except Exception as e:
-            print(f"更新時間失敗: {e}")
     
     def run_javascript(self, js_code):
         """執行 JavaScript 代碼"""
         try:
-            print(f"[CRASH_DEBUG] MainWindow 開始執行 JavaScript: {datetime.now()}")
-            print(f"[CRASH_DEBUG] JavaScript 代碼長度: {len(js_code)}")
             self.web_view.page().runJavaScript(js_code)
-            print(f"[CRASH_DEBUG] MainWindow JavaScript 執行完成: {datetime.now()}")
         except Exception as e:
             print(f"[CRASH_DEBUG] MainWindow 執行 JavaScript 失敗: {e}")
             import traceback
@@ -2458,6 +2836,8 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """關閉視窗事件"""
+        if self.bridge:
+            self.bridge._shutdown_event.set()
         try:
             if hasattr(self.bridge, 'db_manager') and self.bridge.db_manager:
                 self.bridge.db_manager.close()
@@ -2485,6 +2865,9 @@ def main():
         print("程式開始執行...")
         logging.info("程式開始執行...")
         
+        # 自訂 URL scheme 需在建立 QApplication 之前註冊
+        register_image_scheme()
+        
         # 建立應用程式
         app = QApplication(sys.argv)
         logging.info("QApplication 建立成功")
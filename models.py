@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from sqlalchemy import CHAR, DateTime, ForeignKeyConstraint, Index, Integer, String
+from sqlalchemy import CHAR, Date, DateTime, ForeignKeyConstraint, Index, Integer, String
 from sqlalchemy.dialects.mysql import TINYINT
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import datetime
@@ -25,8 +25,9 @@ class Ocrlog(Base):
     __tablename__ = 'ocrlog'
     __table_args__ = (
         ForeignKeyConstraint(['Account'], ['account.Account'], ondelete='CASCADE', onupdate='CASCADE', name='FK_OCRLog_ToAccount'),
-        Index('IX_OCRLog_Account', 'Account'),
-        Index('IX_OCRLog_Time', 'Time')
+        Index('IX_OCRLog_Account_Time', 'Account', 'Time'),
+        Index('IX_OCRLog_Time', 'Time'),
+        Index('IX_OCRLog_Time_Stats', 'Time', 'OK', 'Judgment', 'Account')
     )
 
     Id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -45,3 +46,16 @@ class Ocrlog(Base):
     ExteriorErrReason: Mapped[Optional[int]] = mapped_column(Integer)
 
     account: Mapped['Account'] = relationship('Account', back_populates='ocrlog')
+
+
+class OcrlogDaily(Base):
+    __tablename__ = 'ocrlog_daily'
+    __table_args__ = (
+        Index('IX_OCRLogDaily_Account', 'Account'),
+    )
+
+    Day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    Account_: Mapped[str] = mapped_column('Account', CHAR(20, 'utf8mb4_unicode_ci'), primary_key=True)
+    Judgment: Mapped[int] = mapped_column(Integer, primary_key=True)
+    OK: Mapped[int] = mapped_column(TINYINT(1), primary_key=True)
+    Count: Mapped[int] = mapped_column(Integer, default=0)
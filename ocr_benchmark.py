@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR 準確率與效能基準測試
+以 YOLOOCR 辨識 inference/ 資料夾的標籤圖片，檔名第一個 "_" 之前為正確答案
+(例: 25-0718-E2_250801_081604_OCR_Fold.jpg → 25-0718-E2)，報表包含:
+
+- 完全正確率、字元錯誤率 (CER，編輯距離 / 正確答案長度)
+- total_ms / yolo_ms / trocr_ms 的 p50 / p95 / p99
+- 吞吐量 (張/秒)、程序記憶體峰值 (RSS)、GPU 記憶體峰值
+
+報表存為 JSON，可指定基準報表 (--baseline) 比較，超過門檻時列出退步項目並以結束碼 1 結束，
+OCR 的效能修改需同時確認速度與準確率沒有退步。
+
+用法:
+    python ocr_benchmark.py [資料夾] [--output benchmark.json] [--baseline baseline.json]
+                            [--pipeline --workers 4] [--limit N] [--warmup 3] [--profile 名稱]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from batch_scheduler import percentile
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+TIMING_KEYS = ("total_ms", "yolo_ms", "trocr_ms")
+
+# 預設退步門檻: 正確率與 CER 為絕對值，延遲、吞吐量與記憶體為相對比例
+DEFAULT_THRESHOLDS = {
+    'accuracy_drop': 0.0,
+    'cer_increase': 0.005,
+    'latency_increase': 0.10,
+    'throughput_drop': 0.10,
+    'memory_increase': 0.20,
+}
+
+
+def ground_truth(image_path: str) -> str:
+    """由檔名取得正確答案 (第一個 "_" 之前)"""
+    return os.path.basename(image_path).split("_", 1)[0]
+
+
+def edit_distance(a: str, b: str) -> int:
+    """字元編輯距離 (Levenshtein)"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def peak_rss_mb() -> float:
+    """本程序的記憶體峰值 (MB)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 單位為 KB，macOS 為 bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+    except Exception as e:
+        logging.debug(f"無法取得記憶體峰值: {e}")
+    return 0.0
+
+
+def _cuda():
+    """已匯入 torch 且有 GPU 時回傳 torch.cuda (未載入模型時不匯入 torch)"""
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        return torch.cuda
+    return None
+
+
+def reset_gpu_peak():
+    cuda = _cuda()
+    if cuda:
+        cuda.reset_peak_memory_stats()
+
+
+def gpu_peak_mb() -> Optional[float]:
+    """GPU 記憶體峰值 (MB)，無 GPU 時為 None"""
+    cuda = _cuda()
+    if not cuda:
+        return None
+    return round(cuda.max_memory_allocated() / (1024 * 1024), 1)
+
+
+def list_images(folder: str, limit: int = 0) -> List[str]:
+    image_paths = sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                         if name.lower().endswith(IMAGE_EXTENSIONS))
+    return image_paths[:limit] if limit > 0 else image_paths
+
+
+def run_benchmark(yolo_ocr, image_paths: List[str], pipeline: bool = False, workers: int = 4,
+                  warmup: int = 3) -> Dict[str, Any]:
+    """
+    執行基準測試
+
+    Args:
+        yolo_ocr: YOLOOCR 處理器
+        image_paths: 圖片路徑 (檔名含正確答案)
+        pipeline: 是否以管線模式 (iter_ocr_pipeline) 處理，否則逐張呼叫 access_ocr
+        workers: 管線模式的前處理線程數
+        warmup: 正式計時前先辨識的張數 (不列入統計)
+
+    Returns:
+        報表 (summary 為統計，images 為各圖片結果)
+    """
+    yolo_ocr.warm_up()
+    for image_path in image_paths[:warmup]:
+        yolo_ocr.access_ocr(image_path)
+    # 預熱的圖片不使用快取結果
+    if hasattr(yolo_ocr, "clear_cache"):
+        yolo_ocr.clear_cache()
+    reset_gpu_peak()
+
+    if pipeline:
+        results = yolo_ocr.iter_ocr_pipeline(image_paths, workers=workers)
+    else:
+        results = ((image_path, yolo_ocr.access_ocr(image_path)) for image_path in image_paths)
+
+    images = []
+    start = time.perf_counter()
+    for image_path, result in results:
+        expected = ground_truth(image_path)
+        verified = yolo_ocr.verify_result(result, expected)
+        text = verified['text'].strip()
+        images.append({
+            'file': os.path.basename(image_path),
+            'expected': expected,
+            'text': text,
+            'match': verified['match'],
+            'distance': edit_distance(text, expected),
+            'success': verified['success'],
+            'timing': {key: result.get('timing', {}).get(key, 0) for key in TIMING_KEYS},
+            'error': result.get('error'),
+        })
+    elapsed = time.perf_counter() - start
+
+    model_info = dict(yolo_ocr.get_model_info())
+    model_info.pop('recognizer_stats', None)
+    return {
+        'created': datetime.now().isoformat(timespec="seconds"),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'model': model_info,
+        'mode': f"pipeline (workers={workers})" if pipeline else "sequential",
+        'summary': summarize(images, elapsed),
+        'images': images,
+    }
+
+
+def summarize(images: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """正確率、CER、延遲百分位數、吞吐量與記憶體"""
+    count = len(images)
+    total_chars = sum(len(image['expected']) for image in images)
+    summary = {
+        'images': count,
+        'correct': sum(1 for image in images if image['match']),
+        'failed': sum(1 for image in images if not image['success']),
+        'accuracy': round(sum(1 for image in images if image['match']) / count, 4) if count else 0.0,
+        'cer': round(sum(image['distance'] for image in images) / total_chars, 4) if total_chars else 0.0,
+        'elapsed_s': round(elapsed, 2),
+        'throughput_ips': round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency': {},
+        'peak_rss_mb': peak_rss_mb(),
+        'gpu_peak_mb': gpu_peak_mb(),
+    }
+    for key in TIMING_KEYS:
+        values = sorted(image['timing'][key] for image in images)
+        summary['latency'][key] = {
+            'p50': round(percentile(values, 0.50), 2),
+            'p95': round(percentile(values, 0.95), 2),
+            'p99': round(percentile(values, 0.99), 2),
+            'mean': round(sum(values) / len(values), 2) if values else 0.0,
+        }
+    return summary
+
+
+def compare(summary: Dict[str, Any], baseline: Dict[str, Any],
+            thresholds: Dict[str, float] = None) -> List[str]:
+    """
+    與基準報表比較
+
+    Returns:
+        超過門檻的退步項目說明 (空列表表示沒有退步)
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    regressions = []
+
+    if baseline['accuracy'] - summary['accuracy'] > thresholds['accuracy_drop'] + 1e-9:
+        regressions.append(f"正確率 {baseline['accuracy']:.2%} → {summary['accuracy']:.2%}")
+    if summary['cer'] - baseline['cer'] > thresholds['cer_increase'] + 1e-9:
+        regressions.append(f"CER {baseline['cer']:.4f} → {summary['cer']:.4f}")
+
+    for key in TIMING_KEYS:
+        for quantile in ("p50", "p95", "p99"):
+            old = baseline['latency'][key][quantile]
+            new = summary['latency'][key][quantile]
+            if old > 0 and new > old * (1 + thresholds['latency_increase']):
+                regressions.append(f"{key} {quantile} {old:.1f} → {new:.1f} ms (+{new / old - 1:.0%})")
+
+    old, new = baseline['throughput_ips'], summary['throughput_ips']
+    if old > 0 and new < old * (1 - thresholds['throughput_drop']):
+        regressions.append(f"吞吐量 {old:.2f} → {new:.2f} 張/秒 ({new / old - 1:.0%})")
+
+    for key, label in (('peak_rss_mb', "記憶體峰值"), ('gpu_peak_mb', "GPU 記憶體峰值")):
+        old, new = baseline.get(key), summary.get(key)
+        if old and new and new > old * (1 + thresholds['memory_increase']):
+            regressions.append(f"{label} {old:.0f} → {new:.0f} MB (+{new / old - 1:.0%})")
+    return regressions
+
+
+def format_summary(summary: Dict[str, Any], baseline: Dict[str, Any] = None) -> str:
+    """產生文字報表 (有基準時並列基準數值)"""
+    def column(getter, fmt):
+        value = fmt.format(getter(summary))
+        if baseline is None:
+            return value
+        try:
+            return f"{value:>12}  (基準 {fmt.format(getter(baseline))})"
+        except (KeyError, TypeError, ValueError):
+            return value
+
+    lines = [
+        f"圖片數: {summary['images']}  正確: {summary['correct']}  失敗: {summary['failed']}",
+        f"正確率:   {column(lambda s: s['accuracy'] * 100, '{:.2f}%')}",
+        f"CER:      {column(lambda s: s['cer'], '{:.4f}')}",
+        f"吞吐量:   {column(lambda s: s['throughput_ips'], '{:.2f} 張/秒')}",
+        f"RSS 峰值: {column(lambda s: s['peak_rss_mb'], '{:.0f} MB')}",
+    ]
+    if summary.get('gpu_peak_mb') is not None:
+        lines.append(f"GPU 峰值: {column(lambda s: s['gpu_peak_mb'], '{:.0f} MB')}")
+    for key in TIMING_KEYS:
+        for quantile in ("p50", "p95", "p99"):
+            lines.append(f"{key} {quantile}: " +
+                         column(lambda s, k=key, q=quantile: s['latency'][k][q], '{:.1f} ms'))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from config_manager import ConfigManager
+
+    config = ConfigManager().Config
+
+    parser = argparse.ArgumentParser(description="OCR 準確率與效能基準測試")
+    parser.add_argument("folder", nargs="?", default="inference", help="圖片資料夾 (預設 inference)")
+    parser.add_argument("--output", default="benchmark.json", help="報表檔 (JSON)")
+    parser.add_argument("--baseline", help="比較用的基準報表")
+    parser.add_argument("--save-baseline", action="store_true", help="將本次報表同時存為基準 (--baseline 指定的檔案)")
+    parser.add_argument("--pipeline", action="store_true", help="以管線模式處理 (量測吞吐量)")
+    parser.add_argument("--workers", type=int, default=4, help="管線模式的前處理線程數")
+    parser.add_argument("--limit", type=int, default=0, help="只測試前 N 張")
+    parser.add_argument("--warmup", type=int, default=3, help="預熱張數 (不列入統計)")
+    parser.add_argument("--profile", default=config.Settings.OCR_Engine.Profile,
+                        choices=list(config.Settings.OCR_Engine.Profiles), help="OCR 引擎設定檔")
+    for name, value in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--max-{name.replace('_', '-')}", type=float, default=value, dest=name,
+                            help=f"退步門檻 (預設 {value})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    image_paths = list_images(args.folder, args.limit)
+    if not image_paths:
+        print(f"資料夾內沒有圖片: {args.folder}")
+        sys.exit(1)
+
+    from ocr_service import create_ocr_engine
+    report = run_benchmark(create_ocr_engine(config, local=True, profile=args.profile), image_paths, args.pipeline, args.workers, args.warmup)
+
+    baseline_summary = None
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline_summary = json.load(f)['summary']
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"已儲存基準: {args.baseline}")
+
+    print(format_summary(report['summary'], baseline_summary))
+    print(f"\n報表: {args.output}")
+
+    if baseline_summary is not None:
+        thresholds = {name: getattr(args, name) for name in DEFAULT_THRESHOLDS}
+        regressions = compare(report['summary'], baseline_summary, thresholds)
+        if regressions:
+            print("\n與基準比較退步:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\n與基準比較: 沒有超過門檻的退步")
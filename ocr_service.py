@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR 推論服務
+同一台電腦上的多個站台 (main.py)、測試工具共用一個載入 YOLO / TrOCR 模型的程序，
+以本機 HTTP (127.0.0.1) 提供 access_ocr / verify。服務端在單一模型線程處理請求，
+等待中的請求合併為一批 (YOLO 一次檢測、TrOCR 一次批次推論)，多站台同時送出時 GPU 使用率較高。
+
+用戶端 OCRClient 與 YOLOOCR 有相同的介面 (access_ocr / verify / get_model_info / warm_up)，
+只使用標準函式庫，不需要匯入 torch。影像以檔案路徑傳送 (服務與站台在同一台電腦)。
+
+啟動服務: python ocr_service.py [--host 127.0.0.1] [--port 8650] [--batch-max-size 8] [--batch-wait-ms 5]
+         [--profile gpu-fp16-batched]
+"""
+
+import json
+import time
+import logging
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from batch_scheduler import MicroBatchScheduler
+
+
+class OCRService:
+    """在單一模型線程處理所有請求，等待中的請求合併為一批"""
+
+    def __init__(self, yolo_ocr, batch_max_size: int = 8, batch_wait_ms: float = 5):
+        """
+        Args:
+            yolo_ocr: YOLOOCR 處理器
+            batch_max_size: 每批最多張數
+            batch_wait_ms: 收到第一個請求後等待其他請求的最長時間 (毫秒)
+        """
+        self.yolo_ocr = yolo_ocr
+        self.scheduler = MicroBatchScheduler(yolo_ocr.access_ocr_batch, batch_max_size, batch_wait_ms,
+                                             name="ocr-service")
+
+    def submit(self, image_path: str) -> Future:
+        """加入辨識請求，回傳結果的 Future"""
+        return self.scheduler.submit(image_path)
+
+    def access_ocr(self, image_path: str, timeout: float = None) -> Dict[str, Any]:
+        """辨識單張圖片 (等待所在批次完成)"""
+        return self.submit(image_path).result(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """請求批次與延遲統計"""
+        return self.scheduler.stats()
+
+
+class _OCRRequestHandler(BaseHTTPRequestHandler):
+    """HTTP 請求處理 (JSON)"""
+
+    service: OCRService = None
+    request_timeout: float = 60
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._reply(404, {'success': False, 'error': f"未知的路徑: {self.path}"})
+            return
+        self._reply(200, {
+            'success': True,
+            'model': self.service.yolo_ocr.get_model_info(),
+            'stats': self.service.stats(),
+        })
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(length).decode('utf-8') or "{}")
+            image_path = data.get('image_path', '')
+
+            if self.path == "/access_ocr":
+                self._reply(200, self.service.access_ocr(image_path, self.request_timeout))
+            elif self.path == "/verify":
+                result = self.service.access_ocr(image_path, self.request_timeout)
+                self._reply(200, self.service.yolo_ocr.verify_result(result, data.get('expected', '')))
+            else:
+                self._reply(404, {'success': False, 'error': f"未知的路徑: {self.path}"})
+        except Exception as e:
+            logging.error(f"處理 OCR 請求失敗: {e}")
+            self._reply(500, {'success': False, 'error': str(e)})
+
+    def _reply(self, status: int, data: Dict[str, Any]):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+def create_server(service: OCRService, host: str = "127.0.0.1", port: int = 8650) -> ThreadingHTTPServer:
+    """建立 HTTP 服務 (呼叫 serve_forever 開始服務)"""
+    handler = type("OCRRequestHandler", (_OCRRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+class OCRClient:
+    """OCR 推論服務的用戶端，介面與 YOLOOCR 相同"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8650, timeout: float = 30):
+        """
+        Args:
+            host: 服務位址
+            port: 服務連接埠
+            timeout: 等待回應的秒數
+        """
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+
+    def access_ocr(self, image_path: str) -> Dict[str, Any]:
+        """辨識單張圖片 (回傳格式同 YOLOOCR.access_ocr)，服務無法連線時回傳失敗結果"""
+        try:
+            return self._request("/access_ocr", {'image_path': image_path})
+        except Exception as e:
+            return self._error_result(f"OCR service request failed: {e}")
+
+    def access_ocr_batch(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """辨識多張圖片 (各自送出，由服務端合併批次)"""
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max(1, min(len(image_paths), 8))) as executor:
+            return list(executor.map(self.access_ocr, image_paths))
+
+    def verify(self, image_path: str, expected: str) -> Dict[str, Any]:
+        """辨識圖片並與預期文字比對 (回傳格式同 YOLOOCR.verify)"""
+        try:
+            return self._request("/verify", {'image_path': image_path, 'expected': expected})
+        except Exception as e:
+            return {'success': False, 'match': False, 'text': "", 'expected': expected,
+                    'result': self._error_result(f"OCR service request failed: {e}")}
+
+    def get_model_info(self) -> Dict[str, Any]:
+        """取得服務端的模型資訊"""
+        try:
+            info = dict(self._request("/health").get('model', {}))
+        except Exception as e:
+            info = {'device': "Not connected", 'initialized': False, 'error': str(e)}
+        info['service'] = self.base_url
+        return info
+
+    def warm_up(self, wait: float = None) -> float:
+        """
+        等待服務就緒 (模型由服務端載入)
+
+        Args:
+            wait: 最長等待秒數 (預設為 timeout)
+
+        Returns:
+            等待時間 (毫秒)
+        """
+        start_time = time.perf_counter()
+        deadline = time.monotonic() + (self.timeout if wait is None else wait)
+        while True:
+            try:
+                self._request("/health", timeout=2)
+                return (time.perf_counter() - start_time) * 1000
+            except Exception as e:
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"無法連接 OCR 服務 {self.base_url}: {e}")
+                time.sleep(0.5)
+
+    def close(self, timeout: float = None) -> bool:
+        """介面同 YOLOOCR.close (模型由服務端管理，不需釋放)"""
+        return True
+
+    def _request(self, path: str, data: Dict[str, Any] = None, timeout: float = None) -> Dict[str, Any]:
+        """送出請求並解析 JSON 回應 (data 為 None 時使用 GET)"""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8') if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body,
+                                         headers={'Content-Type': 'application/json; charset=utf-8'})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            return json.loads(e.read().decode('utf-8'))
+
+    @staticmethod
+    def _error_result(error: str) -> Dict[str, Any]:
+        """失敗時的回傳格式 (同 YOLOOCR)"""
+        return {
+            "success": False,
+            "results": [],
+            "timing": {"total_ms": 0, "yolo_ms": 0, "trocr_ms": 0, "text_count": 0},
+            "error": error
+        }
+
+
+def create_ocr_engine(config=None, local: bool = False, profile: str = None):
+    """
+    依 config.yaml 的 ocr_service 與 ocr_engine 設定建立 OCR 處理器
+
+    Args:
+        config: 設定 (預設讀取 config.yaml)
+        local: 是否一律在本程序載入模型 (服務端使用)
+        profile: OCR 引擎設定檔名稱 (預設為 ocr_engine.profile)
+
+    Returns:
+        mode 為 server 時為 OCRClient，否則為依設定檔在本程序載入模型的 YOLOOCR
+    """
+    if config is None:
+        from config_manager import ConfigManager
+        config = ConfigManager().Config
+
+    service_config = config.Settings.OCR_Service
+    if service_config.Mode == "server" and not local:
+        return OCRClient(service_config.Host, service_config.Port, service_config.Timeout)
+
+    engine_config = config.Settings.OCR_Engine
+    name = profile or engine_config.Profile
+    engine_profile = engine_config.get_profile(name)
+    performance = config.Settings.Performance
+
+    from yolo_ocr import YOLOOCR
+    return YOLOOCR(yolo_weights=engine_config.Yolo_Weights,
+                   model_dir=engine_config.Model_Dir,
+                   processor_dir=engine_config.Processor_Dir,
+                   gen_max_len=engine_profile.Max_Length,
+                   gen_beams=engine_profile.Beams,
+                   gen_batch_size=engine_profile.Batch_Size,
+                   batch_wait_ms=engine_profile.Batch_Wait_Ms,
+                   use_fp16=engine_profile.Precision == "fp16",
+                   use_int8=engine_profile.Precision == "int8",
+                   device=engine_profile.Backend,
+                   roi_mode=engine_profile.Roi_Mode,
+                   cache_size=engine_profile.Cache_Size,
+                   num_threads=performance.Max_Concurrent_Processes,
+                   gpu_memory_limit_mb=performance.Gpu_Memory_Limit_MB,
+                   profile=name)
+
+
+if __name__ == "__main__":
+    import argparse
+    from config_manager import ConfigManager
+
+    config = ConfigManager().Config
+    service_config = config.Settings.OCR_Service
+
+    parser = argparse.ArgumentParser(description="OCR 推論服務")
+    parser.add_argument("--host", default=service_config.Host, help="服務位址")
+    parser.add_argument("--port", type=int, default=service_config.Port, help="服務連接埠")
+    parser.add_argument("--batch-max-size", type=int, default=service_config.Batch_Max_Size, help="每批最多張數")
+    parser.add_argument("--batch-wait-ms", type=float, default=service_config.Batch_Wait_Ms,
+                        help="收集同一批請求的最長等待時間 (毫秒)")
+    parser.add_argument("--profile", default=config.Settings.OCR_Engine.Profile,
+                        choices=list(config.Settings.OCR_Engine.Profiles), help="OCR 引擎設定檔")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    yolo_ocr = create_ocr_engine(config, local=True, profile=args.profile)
+    logging.info(f"模型預熱完成: {yolo_ocr.warm_up():.0f} ms")
+
+    service = OCRService(yolo_ocr, args.batch_max_size, args.batch_wait_ms)
+    server = create_server(service, args.host, args.port)
+    logging.info(f"OCR 推論服務啟動: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+資料夾監看 OCR (無介面批次處理)
+監看資料夾 (預設為 config.yaml 的 ocr_image_save_path，即 Cognex FTP 上傳目錄)，
+新出現的圖片依序經過 解碼 → YOLO 檢測 → TrOCR 辨識 → 寫入 JSON Lines 結果檔。
+
+- 掃描線程與辨識之間為有界佇列，辨識跟不上時掃描會暫停 (背壓)，不會一次讀入大量圖片
+- 已處理的檔案記錄在 ledger 檔 (路徑、修改時間、大小)，中斷後重新執行會從未處理的檔案繼續
+- 檔案在 settle 秒內仍有變動 (FTP 上傳中) 時先不處理
+
+用法:
+    python ocr_watch.py [資料夾] [--output results.jsonl] [--once] [--recursive]
+                        [--workers 4] [--prefetch 8] [--queue-size 64] [--interval 2] [--profile 名稱]
+    python ocr_watch.py --self-check    (回歸檢查，不載入模型)
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Iterator, Optional, Set
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class ProcessedLedger:
+    """已處理檔案記錄 (每行: 路徑\\t修改時間\\t大小)，檔案內容改變後視為新檔案"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._keys: Set[str] = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._keys.update(line.rstrip("\n") for line in f if line.strip())
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def key(file_path: str, stat: os.stat_result) -> str:
+        return f"{os.path.abspath(file_path)}\t{stat.st_mtime_ns}\t{stat.st_size}"
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._keys
+
+    def add(self, key: str):
+        """記錄已處理 (寫入結果之後呼叫)"""
+        with self._lock:
+            if key in self._keys:
+                return
+            self._keys.add(key)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(key + "\n")
+
+
+class FolderScanner:
+    """定期掃描資料夾，將未處理的圖片放入有界佇列"""
+
+    def __init__(self, folder: str, ledger: ProcessedLedger, queue_size: int = 64, interval: float = 2.0,
+                 settle: float = 1.0, recursive: bool = False, once: bool = False):
+        """
+        Args:
+            folder: 監看的資料夾
+            ledger: 已處理檔案記錄
+            queue_size: 等待辨識的最多檔案數 (佇列滿時掃描暫停)
+            interval: 掃描間隔秒數
+            settle: 檔案最後修改後需經過的秒數 (避免讀到上傳中的檔案)
+            recursive: 是否包含子資料夾
+            once: 只掃描一次 (處理完現有檔案後結束)
+        """
+        self.folder = folder
+        self.ledger = ledger
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.interval = interval
+        self.settle = settle
+        self.recursive = recursive
+        self.once = once
+        self.stop_event = threading.Event()
+        self._queued: Set[str] = set()   # 已放入佇列尚未處理完的 ledger key
+        self._thread = threading.Thread(target=self._run, name="ocr-watch-scan", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def done(self, key: str):
+        """檔案處理完成"""
+        self._queued.discard(key)
+
+    def iter_files(self) -> Iterator[Optional[tuple]]:
+        """
+        依佇列順序取出 (檔案路徑, ledger key)，掃描結束時停止
+
+        佇列中沒有檔案時立即產生 None (不等待)，讓辨識管線先處理完已讀入的圖片。
+        """
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                yield None
+                continue
+            if item is None:
+                return
+            yield item
+
+    def _run(self):
+        try:
+            while not self.stop_event.is_set():
+                for item in self._scan():
+                    # 佇列滿時在此等待 (背壓)，期間仍可被停止
+                    while not self.stop_event.is_set():
+                        try:
+                            self.queue.put(item, timeout=0.5)
+                            break
+                        except queue.Full:
+                            continue
+                    if self.stop_event.is_set():
+                        break
+                if self.once or self.stop_event.wait(self.interval):
+                    break
+        except Exception as e:
+            logging.error(f"掃描資料夾失敗: {e}")
+        finally:
+            self.queue.put(None)
+
+    def _scan(self) -> Iterator[tuple]:
+        """列出未處理且已穩定的圖片 (依修改時間排序)"""
+        candidates = []
+        now = time.time()
+        for root, dirs, files in os.walk(self.folder):
+            if not self.recursive:
+                dirs.clear()
+            for name in files:
+                if not name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime < self.settle:
+                    continue
+                key = ProcessedLedger.key(path, stat)
+                if key in self._queued or self.ledger.contains(key):
+                    continue
+                candidates.append((stat.st_mtime, path, key))
+
+        for _, path, key in sorted(candidates):
+            self._queued.add(key)
+            yield path, key
+
+
+class JsonlSink:
+    """辨識結果寫入 JSON Lines 檔 (每筆立即寫出)"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, image_path: str, result: dict):
+        text = result['results'][0]['text'] if result.get('success') and result.get('results') else ""
+        record = {
+            'path': image_path,
+            'time': datetime.now().isoformat(timespec="seconds"),
+            'success': result.get('success', False),
+            'text': text,
+            'results': result.get('results', []),
+            'timing': result.get('timing', {}),
+            'error': result.get('error'),
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def run_watch(yolo_ocr, folder: str, output: str, ledger_path: Optional[str] = None, once: bool = False,
+              recursive: bool = False, workers: int = 4, prefetch: int = 8, queue_size: int = 64,
+              interval: float = 2.0, settle: float = 1.0, stop_event: Optional[threading.Event] = None) -> int:
+    """
+    監看資料夾並辨識新圖片
+
+    Args:
+        stop_event: 設定後停止監看 (已讀入的圖片處理完後返回)，預設只能以 Ctrl+C 停止
+
+    Returns:
+        本次處理的圖片數
+    """
+    ledger = ProcessedLedger(ledger_path or output + ".ledger")
+    scanner = FolderScanner(folder, ledger, queue_size, interval, settle, recursive, once)
+    if stop_event is not None:
+        scanner.stop_event = stop_event
+    sink = JsonlSink(output)
+    keys = {}   # 路徑 → 處理中的 ledger key (同一檔案處理前又被修改時會有多筆)
+
+    def paths():
+        for item in scanner.iter_files():
+            if item is None:
+                yield None      # 目前沒有新檔案
+                continue
+            path, key = item
+            keys.setdefault(path, deque()).append(key)
+            yield path
+
+    logging.info(f"監看 {folder} (已處理 {len(ledger)} 個檔案)，結果寫入 {output}")
+    count = 0
+    start = time.perf_counter()
+    scanner.start()
+    try:
+        for image_path, result in yolo_ocr.iter_ocr_pipeline(paths(), workers=workers, prefetch=prefetch):
+            sink.write(image_path, result)
+            pending = keys[image_path]
+            key = pending.popleft()
+            if not pending:
+                del keys[image_path]
+            ledger.add(key)
+            scanner.done(key)
+            count += 1
+            if count % 100 == 0:
+                elapsed = time.perf_counter() - start
+                logging.info(f"已處理 {count} 張，{count / elapsed:.1f} 張/秒，等待中 {scanner.queue.qsize()} 張")
+    except KeyboardInterrupt:
+        logging.info("中斷，下次執行會從未處理的檔案繼續")
+    finally:
+        scanner.stop()
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    logging.info(f"完成 {count} 張，{elapsed:.1f} 秒" + (f"，{count / elapsed:.1f} 張/秒" if elapsed > 0 else ""))
+    return count
+
+
+def self_check(file_counts=(3, 20), prefetch: int = 8, timeout: float = 5.0) -> bool:
+    """
+    回歸檢查: 監看模式下資料夾沒有新檔案時，已讀入的圖片 (含少於 prefetch 張的情況) 需全部寫出結果
+
+    以替代的模型階段執行 YOLOOCR.iter_ocr_pipeline，不載入模型。
+    """
+    import tempfile
+    from yolo_ocr import YOLOOCR
+
+    class _StageStubOCR(YOLOOCR):
+        def _initialize_models(self):
+            pass
+
+        def _decode(self, image_path):
+            return None, image_path
+
+        def _detect(self, bgr_images, pil_images):
+            return [[([0, 0, 1, 1], 1.0)] for _ in pil_images]
+
+        def _prepare_pixel_values(self, pil_img, boxes):
+            return [os.path.basename(pil_img)]
+
+        def _generate(self, pixel_values):
+            return list(pixel_values)
+
+    ok = True
+    for file_count in file_counts:
+        with tempfile.TemporaryDirectory() as folder:
+            settled = time.time() - 60
+            for index in range(file_count):
+                path = os.path.join(folder, f"{index:03d}.jpg")
+                open(path, "wb").close()
+                os.utime(path, (settled, settled))
+            output = os.path.join(folder, "results", "out.jsonl")
+
+            stop_event = threading.Event()
+            watcher = threading.Thread(target=run_watch, args=(_StageStubOCR(), folder, output),
+                                       kwargs={'prefetch': prefetch, 'interval': 0.2, 'settle': 0,
+                                               'stop_event': stop_event}, daemon=True)
+            watcher.start()
+            deadline = time.monotonic() + timeout
+            written = 0
+            while time.monotonic() < deadline and written < file_count:
+                time.sleep(0.1)
+                if os.path.exists(output):
+                    with open(output, "r", encoding="utf-8") as f:
+                        written = sum(1 for _ in f)
+            stop_event.set()
+            watcher.join(timeout)
+
+            passed = written == file_count and not watcher.is_alive()
+            ok = ok and passed
+            print(f"{'OK' if passed else 'FAIL'}: 監看模式 {file_count} 張 (prefetch {prefetch})，"
+                  f"{timeout:.0f} 秒內寫出 {written} 張")
+    return ok
+
+
+if __name__ == "__main__":
+    if "--self-check" in sys.argv:
+        logging.basicConfig(level=logging.WARNING)
+        sys.exit(0 if self_check() else 1)
+
+    from config_manager import ConfigManager
+    from ocr_service import create_ocr_engine
+
+    config = ConfigManager().Config
+
+    parser = argparse.ArgumentParser(description="資料夾監看 OCR")
+    parser.add_argument("folder", nargs="?", default=config.Settings.Paths.OCR_Image_Save_Path,
+                        help="監看的資料夾 (預設為 ocr_image_save_path)")
+    parser.add_argument("--output", default="ocr_watch_results.jsonl", help="結果檔 (JSON Lines)")
+    parser.add_argument("--ledger", help="已處理檔案記錄 (預設為 <output>.ledger)")
+    parser.add_argument("--once", action="store_true", help="處理完現有檔案後結束")
+    parser.add_argument("--recursive", action="store_true", help="包含子資料夾")
+    parser.add_argument("--workers", type=int, default=config.Settings.Performance.Max_Concurrent_Processes,
+                        help="前處理線程數 (預設為 max_concurrent_processes)")
+    parser.add_argument("--prefetch", type=int, default=8, help="預先解碼的圖片數")
+    parser.add_argument("--queue-size", type=int, default=64, help="等待辨識的最多檔案數")
+    parser.add_argument("--interval", type=float, default=2.0, help="掃描間隔秒數")
+    parser.add_argument("--settle", type=float, default=1.0, help="檔案最後修改後需經過的秒數")
+    parser.add_argument("--profile", default=config.Settings.OCR_Engine.Profile,
+                        choices=list(config.Settings.OCR_Engine.Profiles), help="OCR 引擎設定檔")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if not os.path.isdir(args.folder):
+        print(f"資料夾不存在: {args.folder}")
+        sys.exit(1)
+
+    # 管線模式需要在本程序載入模型
+    yolo_ocr = create_ocr_engine(config, local=True, profile=args.profile)
+    yolo_ocr.warm_up()
+    run_watch(yolo_ocr, args.folder, args.output, args.ledger, args.once, args.recursive,
+              args.workers, args.prefetch, args.queue_size, args.interval, args.settle)
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR 記錄封存模組
+ocrlog 依月份分段管理: 只保留最近 N 個月在資料表中，較舊的月份寫入壓縮封存檔
+(每月一個 gzip JSON Lines 檔) 後從資料表移除，並提供同時查詢資料表與封存檔的 API
+(匯出與歷史紀錄分頁經由此處讀取，封存的月份不會遺漏)。
+
+InnoDB 的分割表不支援外鍵 (ocrlog 有 FK_OCRLog_ToAccount)，因此以封存方式
+讓資料表維持固定大小，而不使用 MySQL 原生 PARTITION。
+"""
+
+import os
+import re
+import glob
+import gzip
+import json
+import logging
+import datetime
+from itertools import groupby
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from database_manager import DatabaseManager
+from models import Ocrlog
+
+
+# 封存檔名稱: ocrlog-YYYY-MM.jsonl.gz，同一月份再次封存時為 ocrlog-YYYY-MM.1.jsonl.gz ...
+ARCHIVE_FILE_PATTERN = re.compile(r"^ocrlog-(\d{4})-(\d{2})(?:\.(\d+))?\.jsonl\.gz$")
+
+
+def month_start(value: datetime.datetime) -> datetime.datetime:
+    """取得所在月份的第一天 00:00"""
+    return datetime.datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime.datetime, months: int) -> datetime.datetime:
+    """月份加減 (value 需為月初)"""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime.datetime(index // 12, index % 12 + 1, 1)
+
+
+class OcrlogArchiver:
+    """ocrlog 月份封存管理"""
+
+    def __init__(self, db_manager: DatabaseManager, archive_dir: str, live_months: int = 12):
+        """
+        Args:
+            db_manager: 資料庫管理器
+            archive_dir: 封存檔目錄
+            live_months: 資料表保留的月數 (含當月)
+        """
+        self.db_manager = db_manager
+        self.archive_dir = archive_dir
+        self.live_months = max(1, live_months)
+
+    def get_horizon(self, now: Optional[datetime.datetime] = None) -> datetime.datetime:
+        """取得保留界線，此時間之前的月份會被封存"""
+        return add_months(month_start(now or datetime.datetime.now()), -(self.live_months - 1))
+
+    def list_archived_months(self) -> List[str]:
+        """列出已封存的月份 (YYYY-MM)"""
+        months = set()
+        for path in self._archive_files():
+            match = ARCHIVE_FILE_PATTERN.match(os.path.basename(path))
+            months.add(f"{match.group(1)}-{match.group(2)}")
+        return sorted(months)
+
+    def apply_retention(self, now: Optional[datetime.datetime] = None) -> Dict[str, int]:
+        """
+        封存所有早於保留界線的月份
+
+        Returns:
+            {月份: 封存筆數}
+        """
+        horizon = self.get_horizon(now)
+        oldest = self.db_manager.get_oldest_ocr_log_time()
+        results = {}
+        if oldest is None or oldest >= horizon:
+            return results
+
+        month = month_start(oldest)
+        while month < horizon:
+            count = self.archive_month(month)
+            if count:
+                results[month.strftime("%Y-%m")] = count
+            month = add_months(month, 1)
+
+        logging.info(f"ocrlog 封存完成: {results}")
+        return results
+
+    def archive_month(self, month: datetime.datetime) -> int:
+        """
+        將指定月份的資料寫入封存檔並從資料表移除
+
+        先寫入暫存檔再改名，確認檔案完整後才刪除資料表中的記錄；
+        刪除失敗時移除封存檔，資料仍完整保留在資料表中。
+
+        Args:
+            month: 月份 (任一時間，以所在月份計算)
+
+        Returns:
+            封存筆數
+        """
+        start = month_start(month)
+        end = add_months(start, 1)
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        path = self._new_archive_path(start)
+        temp_path = path + ".tmp"
+        count = 0
+        max_id = None
+
+        try:
+            chunks = self.db_manager.iter_ocr_log_chunks(start, end - datetime.timedelta(microseconds=1),
+                                                         chunk_size=5000, descending=False)
+            with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+                for rows in chunks:
+                    for row in rows:
+                        data = dict(row._mapping)
+                        data['Time'] = data['Time'].isoformat() if data['Time'] else None
+                        f.write(json.dumps(data, ensure_ascii=False) + "\n")
+                        max_id = data['Id'] if max_id is None else max(max_id, data['Id'])
+                        count += 1
+
+            if count == 0:
+                os.remove(temp_path)
+                return 0
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        try:
+            self.db_manager.purge_archived_ocr_logs(start, end, max_id)
+        except Exception:
+            logging.error(f"移除已封存記錄失敗，刪除封存檔 {path}")
+            os.remove(path)
+            raise
+
+        logging.info(f"已封存 {start.strftime('%Y-%m')}: {count} 筆 -> {path}")
+        return count
+
+    def iter_archived_logs(self, start_date: datetime.datetime, end_date: datetime.datetime,
+                           account_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        讀取封存檔中日期範圍內的 OCR 記錄 (依月份遞增)
+
+        Args:
+            start_date: 開始時間 (含)
+            end_date: 結束時間 (含)
+            account_id: 帳戶ID (可選)
+
+        Yields:
+            OCR 記錄資料 (格式同 DatabaseManager.get_ocr_logs)
+        """
+        first_month = month_start(start_date)
+        for path in self._archive_files():
+            match = ARCHIVE_FILE_PATTERN.match(os.path.basename(path))
+            month = datetime.datetime(int(match.group(1)), int(match.group(2)), 1)
+            if month < first_month or month > end_date:
+                continue
+
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    data = json.loads(line)
+                    if account_id and data.get('Account') != account_id:
+                        continue
+                    time = datetime.datetime.fromisoformat(data['Time']) if data.get('Time') else None
+                    if time is None or start_date <= time <= end_date:
+                        yield data
+
+    def query_ocr_logs(self, start_date: datetime.datetime, end_date: datetime.datetime,
+                       account_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        查詢日期範圍內的 OCR 記錄，同時涵蓋封存檔與資料表
+
+        範圍完全在保留界線之後時只查詢資料表。
+
+        Yields:
+            OCR 記錄資料 (封存資料在前，各自依時間遞增)
+        """
+        # 封存檔只會包含保留界線之前的月份
+        if start_date < self.get_horizon():
+            yield from self.iter_archived_logs(start_date, end_date, account_id)
+
+        chunks = self.db_manager.iter_ocr_log_chunks(start_date, end_date, descending=False, account_id=account_id)
+        try:
+            for rows in chunks:
+                for row in rows:
+                    data = dict(row._mapping)
+                    data['Time'] = data['Time'].isoformat() if data['Time'] else None
+                    yield data
+        finally:
+            chunks.close()
+
+    def iter_archived_chunks(self, start_date: datetime.datetime, end_date: datetime.datetime,
+                             chunk_size: int = 1000, descending: bool = True) -> Iterator[List[tuple]]:
+        """
+        分批讀取封存檔中日期範圍內的原始列 (格式同 DatabaseManager.iter_ocr_log_chunks，供匯出使用)
+
+        每列欄位順序與 Ocrlog.__table__.c 相同，Time 還原為 datetime。
+        封存檔以月份為單位讀入後依 (Time, Id) 排序，記憶體用量為一個月份的資料量。
+
+        Args:
+            start_date: 開始時間 (含)
+            end_date: 結束時間 (含)
+            chunk_size: 每批筆數
+            descending: 是否依 Time 遞減排序 (False 時遞增)
+
+        Yields:
+            一批資料列 (tuple 的列表)
+        """
+        columns = [column.name for column in Ocrlog.__table__.c]
+        for _, paths in self._archived_months(start_date, end_date, descending):
+            rows = [tuple(data.get(column) for column in columns)
+                    for data in self._read_month(paths, start_date, end_date, descending=descending, as_rows=True)]
+            for start in range(0, len(rows), chunk_size):
+                yield rows[start:start + chunk_size]
+
+    def get_ocr_logs_page(self, limit: int = 100, cursor: Optional[str] = None,
+                          start_date: Optional[datetime.datetime] = None, end_date: Optional[datetime.datetime] = None,
+                          account_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        以 keyset 分頁查詢 OCR 記錄，資料表的記錄翻完後接續讀取封存檔
+
+        參數與回傳格式同 DatabaseManager.get_ocr_logs_page (依 Time, Id 遞減)；
+        封存的月份都早於資料表中的記錄，游標落在封存範圍時資料表查詢直接回傳空頁。
+        """
+        page = self.db_manager.get_ocr_logs_page(limit, cursor, start_date, end_date, account_id)
+        if page['next_cursor'] is not None:
+            return page
+
+        items = page['items']
+        before = None
+        if items:
+            before = (datetime.datetime.fromisoformat(items[-1]['Time']), items[-1]['Id'])
+        elif cursor:
+            last_time, last_id = self.db_manager._decode_cursor(cursor)
+            before = (datetime.datetime.fromisoformat(last_time), last_id)
+
+        # 多取一筆判斷是否還有下一頁
+        wanted = limit - len(items) + 1
+        for month, paths in self._archived_months(start_date, end_date, descending=True):
+            if before and month > before[0]:
+                continue
+            for data in self._read_month(paths, start_date, end_date, account_id, descending=True):
+                if before and (datetime.datetime.fromisoformat(data['Time']), data['Id']) >= before:
+                    continue
+                items.append(data)
+                wanted -= 1
+                if wanted == 0:
+                    break
+            if wanted == 0:
+                break
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = self.db_manager._encode_cursor([items[-1]['Time'], items[-1]['Id']])
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def _archived_months(self, start_date: Optional[datetime.datetime], end_date: Optional[datetime.datetime],
+                         descending: bool = False) -> List[Tuple[datetime.datetime, List[str]]]:
+        """與日期範圍重疊的封存月份 [(月份, 封存檔列表)]"""
+        def file_month(path):
+            match = ARCHIVE_FILE_PATTERN.match(os.path.basename(path))
+            return datetime.datetime(int(match.group(1)), int(match.group(2)), 1)
+
+        months = []
+        for month, paths in groupby(self._archive_files(), key=file_month):
+            if start_date and month < month_start(start_date):
+                continue
+            if end_date and month > end_date:
+                continue
+            months.append((month, list(paths)))
+        return months[::-1] if descending else months
+
+    def _read_month(self, paths: List[str], start_date: Optional[datetime.datetime],
+                    end_date: Optional[datetime.datetime], account_id: Optional[str] = None,
+                    descending: bool = False, as_rows: bool = False) -> List[Dict[str, Any]]:
+        """
+        讀取一個月份的封存檔 (同月份可能有多個檔案) 並依 (Time, Id) 排序
+
+        Args:
+            as_rows: Time 還原為 datetime (否則保留 isoformat 字串，格式同 DatabaseManager.get_ocr_logs)
+        """
+        records = []
+        for path in paths:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    data = json.loads(line)
+                    if account_id and data.get('Account') != account_id:
+                        continue
+                    if not data.get('Time'):
+                        continue
+                    time = datetime.datetime.fromisoformat(data['Time'])
+                    if (start_date and time < start_date) or (end_date and time > end_date):
+                        continue
+                    if as_rows:
+                        data['Time'] = time
+                    records.append((time, data['Id'], data))
+        records.sort(key=lambda record: record[:2], reverse=descending)
+        return [data for *_, data in records]
+
+    def _archive_files(self) -> List[str]:
+        """依月份與序號排序的封存檔列表"""
+        files = []
+        for path in glob.glob(os.path.join(self.archive_dir, "ocrlog-*.jsonl.gz")):
+            match = ARCHIVE_FILE_PATTERN.match(os.path.basename(path))
+            if match:
+                files.append((match.group(1), match.group(2), int(match.group(3) or 0), path))
+        return [path for *_, path in sorted(files)]
+
+    def _new_archive_path(self, month: datetime.datetime) -> str:
+        """取得新的封存檔路徑 (同月份已有封存檔時加上序號)"""
+        base = os.path.join(self.archive_dir, f"ocrlog-{month.strftime('%Y-%m')}")
+        path = base + ".jsonl.gz"
+        sequence = 0
+        while os.path.exists(path):
+            sequence += 1
+            path = f"{base}.{sequence}.jsonl.gz"
+        return path
+
+
+def create_archiver(db_manager: DatabaseManager, config=None) -> Optional[OcrlogArchiver]:
+    """
+    依 config.yaml 的備份設定建立封存管理器
+
+    Returns:
+        OcrlogArchiver，未啟用封存 (ocrlog_live_months 為 0) 時為 None
+    """
+    if config is None:
+        from config_manager import ConfigManager
+        config = ConfigManager().Config
+
+    backup_config = config.Settings.Backup
+    if not backup_config.Ocrlog_Live_Months or backup_config.Ocrlog_Live_Months <= 0:
+        return None
+
+    archive_dir = backup_config.Ocrlog_Archive_Path or os.path.join(
+        config.Settings.Paths.OCR_Backup_Path, "ocrlog_archive")
+    return OcrlogArchiver(db_manager, archive_dir, backup_config.Ocrlog_Live_Months)
+
+
+if __name__ == "__main__":
+    import argparse
+    from config_manager import ConfigManager
+
+    parser = argparse.ArgumentParser(description="ocrlog 月份封存工具")
+    parser.add_argument("--apply", action="store_true", help="封存早於保留界線的月份")
+    parser.add_argument("--live-months", type=int, help="資料表保留月數 (預設讀取 config.yaml)")
+    parser.add_argument("--archive-dir", help="封存檔目錄 (預設讀取 config.yaml)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    config = ConfigManager().Config
+    mysql_config = config.MySql
+    connection_string = f"mysql+pymysql://{mysql_config.User}:{mysql_config.Password}@{mysql_config.Host}:{mysql_config.Port}/{mysql_config.Database}?charset={mysql_config.Charset}"
+    db_manager = DatabaseManager(connection_string)
+
+    archiver = create_archiver(db_manager, config)
+    if args.live_months or args.archive_dir or archiver is None:
+        archiver = OcrlogArchiver(
+            db_manager,
+            args.archive_dir or (archiver.archive_dir if archiver else os.path.join(
+                config.Settings.Paths.OCR_Backup_Path, "ocrlog_archive")),
+            args.live_months or (archiver.live_months if archiver else 12)
+        )
+
+    print(f"封存目錄: {archiver.archive_dir}")
+    print(f"保留界線: {archiver.get_horizon():%Y-%m-%d}")
+    if args.apply:
+        print(f"封存結果: {archiver.apply_retention()}")
+    print(f"已封存月份: {archiver.list_archived_months()}")
+    db_manager.close()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+啟動流程管理
+將啟動時的各項工作 (設定與目錄、資料庫連線、CCD 連線檢查、模型載入) 以背景線程同時執行，
+完成狀態以 Qt 信號回報 (在 GUI 線程接收)，初始化視窗可即時顯示各項進度。
+
+工作分為關鍵與非關鍵: 關鍵工作全部完成即可顯示主視窗，非關鍵工作 (如 CCD 連線、模型預熱)
+在主視窗顯示後繼續於背景執行。
+"""
+
+import time
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+def tcp_reachable(host: str, port: int, timeout: float = 1.0) -> bool:
+    """以 TCP 連線檢查主機連接埠是否可連線 (不需要執行 ping 指令)"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def wait_for_tcp(host: str, port: int, total_timeout: float = 30, interval: float = 1.0,
+                 on_retry: Optional[Callable[[int], None]] = None,
+                 stop_event: Optional[threading.Event] = None) -> bool:
+    """
+    重複嘗試 TCP 連線直到成功或逾時
+
+    Args:
+        host: 主機
+        port: 連接埠
+        total_timeout: 最長等待秒數
+        interval: 每次嘗試的間隔秒數
+        on_retry: 連線失敗時呼叫 (參數為重試次數)
+        stop_event: 設定後停止等待
+
+    Returns:
+        是否連線成功
+    """
+    deadline = time.monotonic() + total_timeout
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        if tcp_reachable(host, port, timeout=min(interval, max(0.1, deadline - started))):
+            return True
+        attempt += 1
+        if time.monotonic() >= deadline:
+            return False
+        if on_retry:
+            on_retry(attempt)
+        wait = max(0.0, interval - (time.monotonic() - started))
+        if stop_event is not None:
+            if stop_event.wait(wait):
+                return False
+        else:
+            time.sleep(wait)
+
+
+class StartupTask:
+    """啟動工作"""
+
+    def __init__(self, name: str, label: str, func: Callable[["StartupTask"], Optional[str]],
+                 critical: bool = True):
+        """
+        Args:
+            name: 工作名稱 (識別用)
+            label: 顯示名稱
+            func: 工作函式，參數為工作本身 (可呼叫 report 回報進度)，回傳完成說明
+            critical: 是否為關鍵工作 (全部關鍵工作完成後即可顯示主視窗)
+        """
+        self.name = name
+        self.label = label
+        self.func = func
+        self.critical = critical
+        self.status = "pending"     # pending / running / done / failed
+        self.detail = ""
+        self.elapsed = 0.0
+        self.orchestrator = None
+
+    def report(self, detail: str):
+        """回報工作進度 (可由工作線程呼叫)"""
+        self.detail = detail
+        if self.orchestrator:
+            self.orchestrator.task_progress.emit(self.name, detail)
+
+
+class StartupOrchestrator(QObject):
+    """同時執行啟動工作並回報進度"""
+
+    task_progress = pyqtSignal(str, str)        # 工作名稱, 進度說明
+    task_finished = pyqtSignal(str, bool, str)  # 工作名稱, 是否成功, 說明
+    critical_ready = pyqtSignal()               # 關鍵工作全部完成
+    all_done = pyqtSignal()                     # 全部工作完成
+    _task_done = pyqtSignal()                   # 內部使用: 在 task_finished 之後檢查整體狀態
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks: Dict[str, StartupTask] = {}
+        self._executor = None
+        self._critical_emitted = False
+        self._all_emitted = False
+        self._start_time = 0.0
+        # 工作線程發出的完成通知在 GUI 線程處理 (跨線程信號自動排入佇列)
+        self._task_done.connect(self._check_finished)
+
+    def add_task(self, name: str, label: str, func: Callable[[StartupTask], Optional[str]],
+                 critical: bool = True) -> StartupTask:
+        """加入啟動工作 (需在 start 之前)"""
+        task = StartupTask(name, label, func, critical)
+        task.orchestrator = self
+        self.tasks[name] = task
+        return task
+
+    def start(self):
+        """以背景線程同時執行所有工作"""
+        self._start_time = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.tasks)), thread_name_prefix="startup")
+        for task in self.tasks.values():
+            task.status = "running"
+            self._executor.submit(self._run_task, task)
+        self._executor.shutdown(wait=False)
+        if not self.tasks:
+            self._check_finished()
+
+    def progress(self) -> int:
+        """已完成工作的百分比"""
+        if not self.tasks:
+            return 100
+        finished = sum(1 for task in self.tasks.values() if task.status in ("done", "failed"))
+        return int(finished * 100 / len(self.tasks))
+
+    def summary(self) -> List[str]:
+        """各工作的狀態與花費時間"""
+        return [f"{task.label}: {task.status} {task.elapsed:.2f}s {task.detail}".rstrip()
+                for task in self.tasks.values()]
+
+    def _run_task(self, task: StartupTask):
+        """執行單一工作 (工作線程)"""
+        started = time.perf_counter()
+        try:
+            detail = task.func(task) or ""
+            ok = True
+        except Exception as e:
+            logging.error(f"啟動工作 {task.label} 失敗: {e}")
+            detail = str(e)
+            ok = False
+        task.elapsed = time.perf_counter() - started
+        task.detail = detail
+        task.status = "done" if ok else "failed"
+        self.task_finished.emit(task.name, ok, detail)
+        self._task_done.emit()
+
+    def _check_finished(self):
+        """工作完成 (GUI 線程)，判斷關鍵工作與全部工作是否完成"""
+        tasks = list(self.tasks.values())
+        finished = lambda task: task.status in ("done", "failed")
+        if not self._critical_emitted and all(finished(task) for task in tasks if task.critical):
+            self._critical_emitted = True
+            logging.info(f"關鍵啟動工作完成: {time.perf_counter() - self._start_time:.2f}s")
+            self.critical_ready.emit()
+        if not self._all_emitted and all(finished(task) for task in tasks):
+            self._all_emitted = True
+            logging.info(f"全部啟動工作完成: {time.perf_counter() - self._start_time:.2f}s")
+            self.all_done.emit()
@@ -7,6 +7,7 @@ YOLO OCR 測試程式
 
 import sys
 import os
+import importlib.util
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QLabel, QTextEdit, 
                              QFileDialog, QMessageBox, QProgressBar, QGroupBox)
@@ -18,7 +19,13 @@ from PIL import Image
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from yolo_ocr import YOLOOCR
+    from config_manager import ConfigManager
+    from ocr_service import create_ocr_engine
+    # create_ocr_engine 建立時才匯入 yolo_ocr，在本程序載入模型時先確認相依套件
+    if ConfigManager().Config.Settings.OCR_Service.Mode != "server":
+        for module_name in ("torch", "cv2", "ultralytics", "transformers"):
+            if importlib.util.find_spec(module_name) is None:
+                raise ImportError(f"No module named '{module_name}'")
     YOLO_AVAILABLE = True
 except ImportError as e:
     YOLO_AVAILABLE = False
@@ -165,7 +172,8 @@ class YOLOOCRTestWindow(QMainWindow):
             return
         
         try:
-            self.yolo_ocr = YOLOOCR()
+            # ocr_service.mode 為 server 時使用共用的 OCR 推論服務，不另外載入模型
+            self.yolo_ocr = create_ocr_engine()
             self.status_label.setText("✅ YOLO OCR 已初始化")
             
             # 顯示模型資訊
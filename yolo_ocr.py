@@ -2,16 +2,26 @@
 # -*- coding: utf-8 -*-
 
 import os
+import copy
 import cv2
 import torch
 import time
+import threading
 from pathlib import Path
-from typing import Tuple, Optional, Dict, Any
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Optional, Dict, Any, List, Iterable, Iterator
 from PIL import Image, ImageOps
 
 from ultralytics import YOLO
 from transformers import TrOCRProcessor, VisionEncoderDecoderModel
 
+from batch_scheduler import MicroBatchScheduler
+
+
+# iter_ocr_pipeline 的輸入結束
+_PIPELINE_END = object()
+
 
 class YOLOOCR:
     """YOLO + TrOCR OCR 處理類別"""
@@ -27,8 +37,17 @@ class YOLOOCR:
                  stage2_fill: Tuple[int, int, int] = (255, 255, 255),
                  gen_max_len: int = 32,
                  gen_beams: int = 1,
+                 gen_batch_size: int = 16,
+                 batch_wait_ms: float = 0,
                  use_fp16: bool = True,
-                 optimize_memory: bool = True):
+                 optimize_memory: bool = True,
+                 device: str = "auto",
+                 use_int8: bool = False,
+                 roi_mode: str = "yolo",
+                 cache_size: int = 0,
+                 num_threads: int = 0,
+                 gpu_memory_limit_mb: int = 0,
+                 profile: str = ""):
         """
         初始化 YOLO OCR 處理器
         
@@ -43,8 +62,17 @@ class YOLOOCR:
             stage2_fill: 第二階段填充顏色
             gen_max_len: 生成最大長度
             gen_beams: 生成束搜索數量 (1=greedy, 更快)
+            gen_batch_size: TrOCR 每次批次推論的最多文字區域數
+            batch_wait_ms: 合併多個線程的文字區域為一批的最長等待時間 (毫秒，0 表示不合併，由各呼叫端直接推論)
             use_fp16: 是否使用 FP16 精度 (GPU 優化)
             optimize_memory: 是否啟用記憶體優化
+            device: 推論裝置 auto / cuda / cpu (cuda 無法使用時改用 cpu)
+            use_int8: CPU 推論時是否以動態量化 (INT8) 執行 TrOCR
+            roi_mode: yolo (YOLO 檢測文字區域) / full (整張圖片為一個文字區域，不載入 YOLO)
+            cache_size: 保留最近幾張圖片的辨識結果 (依檔案路徑、修改時間與大小，0 表示不快取)
+            num_threads: CPU 推論的線程數 (0 表示使用 torch 預設)
+            gpu_memory_limit_mb: 本程序可使用的 GPU 記憶體上限 (MB，0 表示不限制)
+            profile: 設定檔名稱 (顯示用)
         """
         self.yolo_weights = yolo_weights
         self.model_dir = model_dir
@@ -56,8 +84,25 @@ class YOLOOCR:
         self.stage2_fill = stage2_fill
         self.gen_max_len = gen_max_len
         self.gen_beams = gen_beams
+        self.gen_batch_size = max(1, gen_batch_size)
+        # 多個線程同時呼叫 access_ocr 時 (如稽核工具與產線共用模型)，文字區域由排程器合併為一次 generate
+        self.recognizer = None
+        if batch_wait_ms > 0:
+            self.recognizer = MicroBatchScheduler(self._recognize_batch, self.gen_batch_size, batch_wait_ms,
+                                                  name="trocr-batch")
         self.use_fp16 = use_fp16
         self.optimize_memory = optimize_memory
+        self.requested_device = device
+        self.use_int8 = use_int8
+        self.roi_mode = roi_mode
+        self.num_threads = num_threads
+        self.gpu_memory_limit_mb = gpu_memory_limit_mb
+        self.profile = profile
+        
+        # 辨識結果快取 (OCR 重試時同一檔案不重新推論)
+        self.cache_size = max(0, cache_size)
+        self._cache: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
         
         # 模型和設備
         self.det_model = None
@@ -65,15 +110,59 @@ class YOLOOCR:
         self.trocr_model = None
         self.device = None
         self._initialized = False
+        # 啟動時在背景線程載入模型，與第一次 OCR 同時發生時只載入一次
+        self._init_lock = threading.Lock()
+        # 進行中的辨識數 (切換設定檔時 close 後由最後一個辨識結束時才釋放模型)
+        self._active_calls = 0
+        self._calls_cond = threading.Condition()
+        self._closed = False
+        self._release_deferred = False
+        self._released = False
         
     def _initialize_models(self):
         """初始化模型（延遲載入）"""
         if self._initialized:
             return
-            
+        with self._init_lock:
+            if self._closed:
+                raise RuntimeError("OCR processor has been closed")
+            if not self._initialized:
+                self._load_models()
+    
+    def _begin_call(self) -> bool:
+        """開始一次辨識，已關閉時回傳 False"""
+        with self._calls_cond:
+            if self._closed:
+                return False
+            self._active_calls += 1
+            return True
+    
+    def _end_call(self):
+        """結束一次辨識 (close 逾時後由最後一個辨識釋放模型)"""
+        with self._calls_cond:
+            self._active_calls -= 1
+            self._calls_cond.notify_all()
+            release = self._release_deferred and self._take_release()
+        if release:
+            self._release_models()
+    
+    def _take_release(self) -> bool:
+        """已關閉且沒有進行中的辨識時取得釋放模型的權利 (只會成功一次，呼叫時需持有 _calls_cond)"""
+        if not self._closed or self._active_calls or self._released:
+            return False
+        self._released = True
+        return True
+    
+    def _load_models(self):
+        """載入 YOLO 與 TrOCR 模型"""
         try:
-            print(">> Loading YOLO...")
-            self.det_model = YOLO(self.yolo_weights)
+            self.device = self._select_device()
+            if self.device.type == "cpu" and self.num_threads > 0:
+                torch.set_num_threads(self.num_threads)
+            
+            if self.roi_mode == "yolo":
+                print(">> Loading YOLO...")
+                self.det_model = YOLO(self.yolo_weights)
             
             print(">> Loading TrOCR...")
             self.processor = TrOCRProcessor.from_pretrained(self.processor_dir)
@@ -85,20 +174,30 @@ class YOLOOCR:
                 ip.do_resize = False
                 ip.size = {"height": self.stage2_size, "width": self.stage2_size}
             
-            # ✅ 使用 FP16 加速推論
-            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            # ✅ 使用 FP16 加速推論 (GPU) 或 INT8 動態量化 (CPU)
             self.trocr_model = VisionEncoderDecoderModel.from_pretrained(self.model_dir)
             
             if self.use_fp16 and self.device.type == "cuda":
                 self.trocr_model = self.trocr_model.half()
                 print(">> Using FP16 precision for GPU acceleration")
+            elif self.use_int8 and self.device.type == "cpu":
+                self.trocr_model = torch.quantization.quantize_dynamic(
+                    self.trocr_model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                print(">> Using INT8 dynamic quantization for CPU inference")
             
             self.trocr_model.to(self.device).eval()
             
             # 記憶體優化
-            if self.optimize_memory and self.device.type == "cuda":
-                torch.cuda.empty_cache()
-                print(">> GPU memory optimized")
+            if self.device.type == "cuda":
+                if self.gpu_memory_limit_mb > 0:
+                    total = torch.cuda.get_device_properties(self.device).total_memory
+                    fraction = min(1.0, self.gpu_memory_limit_mb * 1024 * 1024 / total)
+                    torch.cuda.set_per_process_memory_fraction(fraction, self.device)
+                    print(f">> GPU memory limited to {self.gpu_memory_limit_mb} MB")
+                if self.optimize_memory:
+                    torch.cuda.empty_cache()
+                    print(">> GPU memory optimized")
             
             self._initialized = True
             print(">> Models loaded successfully")
@@ -106,6 +205,27 @@ class YOLOOCR:
         except Exception as e:
             raise RuntimeError(f"Failed to initialize models: {str(e)}")
     
+    def _select_device(self) -> "torch.device":
+        """依 device 設定選擇推論裝置"""
+        if self.requested_device == "cpu":
+            return torch.device("cpu")
+        if torch.cuda.is_available():
+            return torch.device("cuda")
+        if self.requested_device == "cuda":
+            print(">> CUDA not available, falling back to CPU")
+        return torch.device("cpu")
+    
+    @property
+    def precision(self) -> str:
+        """實際使用的 TrOCR 精度"""
+        if self.device is None:
+            return "fp16" if self.use_fp16 else ("int8" if self.use_int8 else "fp32")
+        if self.use_fp16 and self.device.type == "cuda":
+            return "fp16"
+        if self.use_int8 and self.device.type == "cpu":
+            return "int8"
+        return "fp32"
+    
     def _letterbox_36128(self, img: Image.Image) -> Image.Image:
         """Stage1：等比縮放 + 補邊到指定尺寸"""
         img = img.convert("RGB")
@@ -159,118 +279,413 @@ class YOLOOCR:
                     - text_count: int, 識別的文字數量
                 - error: str, 錯誤訊息（如果失敗）
         """
-        try:
-            # 開始計時
-            start_time = time.perf_counter()
+        return self.access_ocr_batch([image_path])[0]
+    
+    def access_ocr_batch(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        多張圖片一起處理: YOLO 一次檢測全部圖片，所有文字區域合併後分批送入 TrOCR
+        
+        Args:
+            image_paths: 圖片檔案路徑列表
             
+        Returns:
+            與 image_paths 順序相同的結果列表 (格式同 access_ocr，timing 另含 batch_size；
+            yolo_ms / trocr_ms 為整批的時間)
+        """
+        if not self._begin_call():
+            return [self._error_result("OCR processor has been closed") for _ in image_paths]
+        try:
+            return self._access_ocr_batch_cached(image_paths)
+        finally:
+            self._end_call()
+    
+    def _access_ocr_batch_cached(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """access_ocr_batch 的快取處理"""
+        if not self.cache_size:
+            return self._access_ocr_batch(image_paths)
+        
+        # 已辨識過且檔案未改變的圖片直接使用快取結果
+        keys = [self._cache_key(image_path) for image_path in image_paths]
+        results = [self._cache_get(key) for key in keys]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            for index, result in zip(missing, self._access_ocr_batch([image_paths[i] for i in missing])):
+                results[index] = result
+                if result['success']:
+                    self._cache_put(keys[index], result)
+        return results
+    
+    def _access_ocr_batch(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """access_ocr_batch 的實際處理 (不使用快取)"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(image_paths)
+        start_time = time.perf_counter()
+        try:
             # 延遲初始化模型
             self._initialize_models()
             
-            # 檢查檔案是否存在
-            if not os.path.exists(image_path):
-                return {
-                    "success": False,
-                    "results": [],
-                    "timing": {"total_ms": 0, "yolo_ms": 0, "trocr_ms": 0, "text_count": 0},
-                    "error": f"Image file not found: {image_path}"
-                }
+            # 讀取圖片，無法讀取的圖片個別回傳錯誤
+            images = []
+            for index, image_path in enumerate(image_paths):
+                try:
+                    images.append((index, *self._decode(image_path)))
+                except ValueError as e:
+                    results[index] = self._error_result(str(e))
+            if not images:
+                return results
             
-            # 讀取圖片
-            bgr = cv2.imread(image_path)
-            if bgr is None:
-                return {
-                    "success": False,
-                    "results": [],
-                    "timing": {"total_ms": 0, "yolo_ms": 0, "trocr_ms": 0, "text_count": 0},
-                    "error": f"Cannot read image: {image_path}"
-                }
-            
-            # YOLO 檢測計時
+            # YOLO 檢測計時 (使用已解碼的影像，不重複讀檔)
             yolo_start = time.perf_counter()
-            results = self.det_model(image_path)[0]
+            image_boxes = self._detect([bgr for _, bgr, _ in images], [pil_img for _, _, pil_img in images])
             yolo_time = (time.perf_counter() - yolo_start) * 1000  # 轉換為毫秒
             
-            # 轉換為 PIL 圖片
-            rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
-            pil_img = Image.fromarray(rgb)
+            # 裁剪文字區域並做兩段式幾何處理
+            crops = []
+            for (index, _, pil_img), boxes in zip(images, image_boxes):
+                crops.extend((index, bbox, confidence, img_384)
+                             for (bbox, confidence), img_384 in zip(boxes, self._prepare_crops(pil_img, boxes)))
             
-            ocr_results = []
+            # TrOCR 批次推論
             trocr_start = time.perf_counter()
-            
-            with torch.no_grad():
-                for box in results.boxes:
-                    cls_id = int(box.cls[0])
-                    class_name = self.det_model.names.get(cls_id, str(cls_id))
-                    
-                    # 只處理 'text' 類別
-                    if class_name != "text":
-                        continue
-                    
-                    # 取得邊界框座標
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-                    x1, y1, x2, y2 = self._clip_box(x1, y1, x2, y2, pil_img.width, pil_img.height)
-                    
-                    # 檢查邊界框有效性
-                    if x2 <= x1 or y2 <= y1:
-                        continue
-                    
-                    # 裁剪文字區域
-                    crop = pil_img.crop((x1, y1, x2, y2))
-                    
-                    # 兩段式幾何處理
-                    img_36128 = self._letterbox_36128(crop)
-                    img_384 = self._to_384_square(img_36128)
-                    
-                    # TrOCR 推論（GPU 優化）
-                    inputs = self.processor(images=img_384, return_tensors="pt").to(self.device)
-                    
-                    # 🧠 強制轉為 FP16（如果啟用）
-                    if self.use_fp16 and self.device.type == "cuda":
-                        inputs = {k: v.half() for k, v in inputs.items()}
-                    
-                    with torch.no_grad():
-                        pred_ids = self.trocr_model.generate(
-                            **inputs,
-                            max_length=self.gen_max_len,
-                            num_beams=self.gen_beams,  # ⚡ greedy 解碼，更快
-                            early_stopping=True
-                        )
-                    pred_text = self.processor.batch_decode(pred_ids, skip_special_tokens=True)[0].strip()
-                    
-                    # 取得置信度
-                    confidence = float(box.conf[0]) if hasattr(box, 'conf') else 0.0
-                    
-                    # 添加到結果
-                    ocr_results.append({
-                        "bbox": [x1, y1, x2, y2],
-                        "text": pred_text,
-                        "confidence": confidence
-                    })
-            
-            # 計算 TrOCR 時間
+            texts = self._recognize([img_384 for *_, img_384 in crops])
             trocr_time = (time.perf_counter() - trocr_start) * 1000  # 轉換為毫秒
             total_time = (time.perf_counter() - start_time) * 1000  # 轉換為毫秒
             
-            return {
-                "success": True,
-                "results": ocr_results,
-                "timing": {
-                    "total_ms": round(total_time, 2),
-                    "yolo_ms": round(yolo_time, 2),
-                    "trocr_ms": round(trocr_time, 2),
-                    "text_count": len(ocr_results)
-                },
-                "error": None
-            }
+            ocr_results = {index: [] for index, _, _ in images}
+            for (index, bbox, confidence, _), text in zip(crops, texts):
+                ocr_results[index].append({
+                    "bbox": bbox,
+                    "text": text,
+                    "confidence": confidence
+                })
+            
+            for index, _, _ in images:
+                results[index] = self._success_result(ocr_results[index], total_time, yolo_time, trocr_time,
+                                                      len(images))
+            return results
             
         except Exception as e:
-            total_time = (time.perf_counter() - start_time) * 1000 if 'start_time' in locals() else 0
-            return {
-                "success": False,
-                "results": [],
-                "timing": {"total_ms": round(total_time, 2), "yolo_ms": 0, "trocr_ms": 0, "text_count": 0},
-                "error": f"OCR processing failed: {str(e)}"
-            }
+            total_time = (time.perf_counter() - start_time) * 1000
+            error = self._error_result(f"OCR processing failed: {str(e)}", total_time)
+            return [result if result is not None else dict(error) for result in results]
+    
+    def iter_ocr_pipeline(self, image_paths: Iterable[Optional[str]], workers: int = 4,
+                          prefetch: int = 8, idle_wait: float = 0.05) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        管線模式處理大量圖片 (如稽核 inference/ 資料夾)
+        
+        解碼、色彩轉換、裁剪與 letterbox、TrOCR 前處理在線程池執行 (OpenCV / PIL 運算時釋放 GIL)，
+        最多預先準備 prefetch 張，模型線程 (呼叫端) 只執行 YOLO 與 TrOCR，不需等待前處理。
+        
+        Args:
+            image_paths: 圖片檔案路徑；產生 None 表示目前沒有新圖片 (如監看資料夾)，
+                         管線先處理完已讀入的圖片，之後再繼續取得
+            workers: 前處理線程數
+            prefetch: 預先解碼的圖片數 (有界佇列，避免大量圖片佔用記憶體)
+            idle_wait: 沒有任何圖片處理中且沒有新圖片時，再次取得前的等待秒數
+            
+        Yields:
+            (圖片路徑, 結果)，依輸入順序；結果格式同 access_ocr (timing 為各圖片的時間)
+        """
+        if not self._begin_call():
+            raise RuntimeError("OCR processor has been closed")
+        try:
+            yield from self._run_pipeline(image_paths, workers, prefetch, idle_wait)
+        finally:
+            self._end_call()
+    
+    def _run_pipeline(self, image_paths: Iterable[Optional[str]], workers: int, prefetch: int,
+                      idle_wait: float) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """iter_ocr_pipeline 的實際處理"""
+        self._initialize_models()
+        prefetch = max(1, prefetch)
+        paths = iter(image_paths)
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ocr-preprocess") as pool:
+            decoding = deque()      # (路徑, 解碼 Future, 開始時間)
+            preparing = deque()     # (路徑, 文字區域, 前處理 Future, YOLO 時間, 開始時間) 或 (路徑, 錯誤結果)
+            
+            exhausted = False
+            
+            def fill():
+                """取得圖片直到 prefetch 張，沒有新圖片 (None) 時立即返回，不等待"""
+                nonlocal exhausted
+                while not exhausted and len(decoding) < prefetch:
+                    image_path = next(paths, _PIPELINE_END)
+                    if image_path is _PIPELINE_END:
+                        exhausted = True
+                        return
+                    if image_path is None:
+                        return
+                    decoding.append((image_path, pool.submit(self._decode, image_path), time.perf_counter()))
+            
+            fill()
+            while decoding or preparing or not exhausted:
+                if not decoding and not preparing:
+                    time.sleep(idle_wait)
+                    fill()
+                    continue
+                if decoding:
+                    image_path, future, start_time = decoding.popleft()
+                    fill()
+                    try:
+                        bgr, pil_img = future.result()
+                        yolo_start = time.perf_counter()
+                        boxes = self._detect([bgr], [pil_img])[0]
+                        yolo_time = (time.perf_counter() - yolo_start) * 1000
+                        preparing.append((image_path, boxes, pool.submit(self._prepare_pixel_values, pil_img, boxes),
+                                          yolo_time, start_time))
+                    except Exception as e:
+                        preparing.append((image_path, self._error_result(str(e))))
+                
+                # 前處理已完成 (或沒有其他圖片可先做 YOLO) 時執行 TrOCR
+                while preparing and (len(preparing[0]) == 2 or preparing[0][2].done() or not decoding
+                                     or len(preparing) >= prefetch):
+                    entry = preparing.popleft()
+                    if len(entry) == 2:
+                        yield entry
+                        continue
+                    image_path, boxes, future, yolo_time, start_time = entry
+                    try:
+                        trocr_start = time.perf_counter()
+                        texts = self._generate(future.result())
+                        trocr_time = (time.perf_counter() - trocr_start) * 1000
+                        ocr_results = [{"bbox": bbox, "text": text, "confidence": confidence}
+                                       for (bbox, confidence), text in zip(boxes, texts)]
+                        total_time = (time.perf_counter() - start_time) * 1000
+                        yield image_path, self._success_result(ocr_results, total_time, yolo_time, trocr_time)
+                    except Exception as e:
+                        yield image_path, self._error_result(f"OCR processing failed: {str(e)}")
+    
+    def _decode(self, image_path: str) -> Tuple[Any, Image.Image]:
+        """讀取圖片，回傳 (BGR 陣列, RGB PIL 圖片)"""
+        if not os.path.exists(image_path):
+            raise ValueError(f"Image file not found: {image_path}")
+        bgr = cv2.imread(image_path)
+        if bgr is None:
+            raise ValueError(f"Cannot read image: {image_path}")
+        return bgr, Image.fromarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+    
+    def _detect(self, bgr_images: List[Any], pil_images: List[Image.Image]) -> List[List[Tuple[List[int], float]]]:
+        """各圖片的文字區域 [(bbox, 置信度)] (roi_mode 為 full 時整張圖片為一個區域)"""
+        if self.roi_mode == "full":
+            return [[([0, 0, pil_img.width, pil_img.height], 1.0)] for pil_img in pil_images]
+        detections = self.det_model(bgr_images, verbose=False, device=self._yolo_device())
+        return [self._text_boxes(detection, pil_img.width, pil_img.height)
+                for detection, pil_img in zip(detections, pil_images)]
+    
+    def _yolo_device(self):
+        """YOLO 使用的裝置 (與 TrOCR 相同)"""
+        return "cpu" if self.device.type == "cpu" else 0
+    
+    def _text_boxes(self, detection, width: int, height: int) -> List[Tuple[List[int], float]]:
+        """取出 YOLO 檢測結果中 'text' 類別的有效邊界框 [(bbox, 置信度)]"""
+        boxes = []
+        for box in detection.boxes:
+            cls_id = int(box.cls[0])
+            class_name = self.det_model.names.get(cls_id, str(cls_id))
+            
+            # 只處理 'text' 類別
+            if class_name != "text":
+                continue
+            
+            # 取得邊界框座標
+            x1, y1, x2, y2 = box.xyxy[0].tolist()
+            x1, y1, x2, y2 = self._clip_box(x1, y1, x2, y2, width, height)
+            
+            # 檢查邊界框有效性
+            if x2 <= x1 or y2 <= y1:
+                continue
+            
+            confidence = float(box.conf[0]) if hasattr(box, 'conf') else 0.0
+            boxes.append(([x1, y1, x2, y2], confidence))
+        return boxes
+    
+    def _prepare_crops(self, pil_img: Image.Image, boxes: List[Tuple[List[int], float]]) -> List[Image.Image]:
+        """裁剪文字區域並做兩段式幾何處理"""
+        return [self._to_384_square(self._letterbox_36128(pil_img.crop(tuple(bbox)))) for bbox, _ in boxes]
+    
+    def _prepare_pixel_values(self, pil_img: Image.Image, boxes: List[Tuple[List[int], float]]):
+        """裁剪文字區域並轉為 TrOCR 輸入張量 (前處理線程)，沒有文字區域時為 None"""
+        crops = self._prepare_crops(pil_img, boxes)
+        if not crops:
+            return None
+        return self.processor(images=crops, return_tensors="pt").pixel_values
+    
+    def _recognize(self, images: List[Image.Image]) -> List[str]:
+        """TrOCR 辨識 (啟用排程器時與其他線程的文字區域合併批次)"""
+        if not images:
+            return []
+        if self.recognizer:
+            return self.recognizer.map(images)
+        texts = []
+        for start in range(0, len(images), self.gen_batch_size):
+            texts.extend(self._recognize_batch(images[start:start + self.gen_batch_size]))
+        return texts
+    
+    def _recognize_batch(self, images: List[Image.Image]) -> List[str]:
+        """TrOCR 一次批次推論"""
+        return self._generate(self.processor(images=images, return_tensors="pt").pixel_values)
+    
+    def _generate(self, pixel_values) -> List[str]:
+        """以前處理完成的輸入張量執行 TrOCR (每次最多 gen_batch_size 張)"""
+        if pixel_values is None:
+            return []
+        texts = []
+        with torch.no_grad():
+            for start in range(0, pixel_values.shape[0], self.gen_batch_size):
+                inputs = pixel_values[start:start + self.gen_batch_size].to(self.device)
+                
+                # 🧠 強制轉為 FP16（如果啟用）
+                if self.use_fp16 and self.device.type == "cuda":
+                    inputs = inputs.half()
+                
+                pred_ids = self.trocr_model.generate(
+                    pixel_values=inputs,
+                    max_length=self.gen_max_len,
+                    num_beams=self.gen_beams,  # ⚡ greedy 解碼，更快
+                    early_stopping=True
+                )
+                texts.extend(text.strip() for text in self.processor.batch_decode(pred_ids, skip_special_tokens=True))
+        return texts
+    
+    @staticmethod
+    def _success_result(ocr_results: List[Dict[str, Any]], total_ms: float, yolo_ms: float, trocr_ms: float,
+                        batch_size: int = 1) -> Dict[str, Any]:
+        """成功時的回傳格式"""
+        return {
+            "success": True,
+            "results": ocr_results,
+            "timing": {
+                "total_ms": round(total_ms, 2),
+                "yolo_ms": round(yolo_ms, 2),
+                "trocr_ms": round(trocr_ms, 2),
+                "text_count": len(ocr_results),
+                "batch_size": batch_size
+            },
+            "error": None
+        }
+    
+    @staticmethod
+    def _error_result(error: str, total_ms: float = 0) -> Dict[str, Any]:
+        """失敗時的回傳格式"""
+        return {
+            "success": False,
+            "results": [],
+            "timing": {"total_ms": round(total_ms, 2), "yolo_ms": 0, "trocr_ms": 0, "text_count": 0},
+            "error": error
+        }
+    
+    @staticmethod
+    def _cache_key(image_path: str) -> Optional[Tuple[str, int, int]]:
+        """快取鍵 (路徑、修改時間、大小)，檔案不存在時為 None"""
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        return os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size
+    
+    def _cache_get(self, key) -> Optional[Dict[str, Any]]:
+        if key is None:
+            return None
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is None:
+                return None
+            self._cache.move_to_end(key)
+        return copy.deepcopy(result)
+    
+    def _cache_put(self, key, result: Dict[str, Any]):
+        if key is None:
+            return
+        with self._cache_lock:
+            self._cache[key] = copy.deepcopy(result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def clear_cache(self):
+        """清除辨識結果快取"""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def verify(self, image_path: str, expected: str) -> Dict[str, Any]:
+        """
+        辨識圖片並與預期文字比對
+        
+        Returns:
+            {'success', 'match', 'text', 'expected', 'result': access_ocr 的結果}
+        """
+        return self.verify_result(self.access_ocr(image_path), expected)
+    
+    @staticmethod
+    def verify_result(result: Dict[str, Any], expected: str) -> Dict[str, Any]:
+        """以第一個辨識結果與預期文字比對 (忽略前後空白)"""
+        text = result['results'][0]['text'] if result.get('success') and result.get('results') else ""
+        return {
+            "success": bool(result.get('success')),
+            "match": bool(text) and text.strip() == (expected or "").strip(),
+            "text": text,
+            "expected": expected,
+            "result": result
+        }
+    
+    def warm_up(self) -> float:
+        """
+        載入模型並以空白影像各執行一次推論 (第一次推論需要配置記憶體與編譯 kernel)
+        
+        Returns:
+            花費時間 (毫秒)
+        """
+        if not self._begin_call():
+            raise RuntimeError("OCR processor has been closed")
+        try:
+            start_time = time.perf_counter()
+            self._initialize_models()
+            blank = Image.new("RGB", (self.stage1_w, self.stage1_h), self.stage1_fill)
+            if self.det_model is not None:
+                with torch.no_grad():
+                    self.det_model(blank, verbose=False, device=self._yolo_device())
+            self._recognize([self._to_384_square(blank)])
+            return (time.perf_counter() - start_time) * 1000
+        finally:
+            self._end_call()
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        釋放模型 (切換設定檔後關閉原本的處理器)
+        
+        不再接受新的辨識，等待進行中的辨識完成後停止 TrOCR 排程器，
+        釋放 YOLO / TrOCR 模型與快取，GPU 上另清除 CUDA 快取記憶體。
+        逾時仍有辨識進行中時不釋放，改由最後一個辨識結束時釋放。
+        
+        Args:
+            timeout: 等待進行中辨識的最長秒數 (None 表示一直等待)
+            
+        Returns:
+            是否在時限內等到所有辨識完成並已釋放模型
+        """
+        with self._calls_cond:
+            self._closed = True
+            finished = self._calls_cond.wait_for(lambda: self._active_calls == 0, timeout)
+            release = self._take_release()
+            if not finished:
+                self._release_deferred = True
+        if release:
+            self._release_models()
+        return finished
+    
+    def _release_models(self):
+        """停止排程器並釋放模型、快取與 CUDA 快取記憶體"""
+        if self.recognizer:
+            self.recognizer.close()
+        with self._init_lock:
+            self.det_model = None
+            self.processor = None
+            self.trocr_model = None
+            self._initialized = False
+        self.clear_cache()
+        if self.device is not None and self.device.type == "cuda":
+            torch.cuda.empty_cache()
     
     def get_model_info(self) -> Dict[str, Any]:
         """取得模型資訊"""
@@ -282,14 +697,36 @@ class YOLOOCR:
             "initialized": self._initialized,
             "stage1_size": (self.stage1_w, self.stage1_h),
             "stage2_size": self.stage2_size,
+            "profile": self.profile,
+            "precision": self.precision,
+            "roi_mode": self.roi_mode,
+            "cache_size": self.cache_size,
             "use_fp16": self.use_fp16,
             "optimize_memory": self.optimize_memory,
-            "gen_beams": self.gen_beams
+            "gen_beams": self.gen_beams,
+            "gen_batch_size": self.gen_batch_size,
+            "recognizer_stats": self.recognizer.stats() if self.recognizer else None
         }
 
 
 # 使用範例
 if __name__ == "__main__":
+    import sys
+    
+    # python yolo_ocr.py <資料夾> [前處理線程數]: 以管線模式辨識資料夾內所有圖片 (如 inference/)
+    if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]):
+        folder = Path(sys.argv[1])
+        image_paths = sorted(str(p) for p in folder.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png", ".bmp"))
+        ocr = YOLOOCR()
+        ocr.warm_up()
+        start = time.perf_counter()
+        for image_path, result in ocr.iter_ocr_pipeline(image_paths, workers=int(sys.argv[2]) if len(sys.argv) > 2 else 4):
+            text = result["results"][0]["text"] if result["success"] and result["results"] else result["error"]
+            print(f"{os.path.basename(image_path)}\t{text}")
+        elapsed = time.perf_counter() - start
+        print(f"\n{len(image_paths)} 張，{elapsed:.1f} 秒，{len(image_paths) / max(elapsed, 1e-9):.1f} 張/秒")
+        sys.exit(0)
+    
     # 創建 OCR 處理器
     ocr = YOLOOCR()
     